@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""Alias registry: constant-time university alias lookup with hot reload."""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, List, NamedTuple, Pattern, Tuple
+
+log = logging.getLogger(__name__)
+
+
+def alias_key(name: str) -> str:
+    """Normalize a name to its lookup key: casefolded, alphanumerics only."""
+    return re.sub(r"[^0-9a-z]+", "", (name or "").casefold())
+
+
+class _Compiled(NamedTuple):
+    exact: Dict[str, str]
+    pattern: Pattern[str] | None
+    pattern_targets: Tuple[str, ...]
+
+
+def _parse(path: str) -> Tuple[Dict[str, str], List[Tuple[str, str, int]]]:
+    """Read ``alias<TAB>canonical`` lines; ``re:`` aliases (with their line numbers) are returned separately."""
+    exact: Dict[str, str] = {}
+    patterns: List[Tuple[str, str, int]] = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for lineno, ln in enumerate(f, start=1):
+                ln = ln.rstrip("\n")
+                if not ln.strip() or ln.lstrip().startswith("#") or "\t" not in ln:
+                    continue
+                alias, canonical = (p.strip() for p in ln.split("\t", 1))
+                if alias.startswith("re:"):
+                    patterns.append((alias[3:], canonical, lineno))
+                elif alias_key(alias):
+                    exact[alias_key(alias)] = canonical
+    except FileNotFoundError:
+        pass
+    return exact, patterns
+
+
+def _compile(path: str) -> _Compiled:
+    """Build the key→canonical hash map and one combined regex for patterns.
+
+    Raises ``re.error`` naming the line of the first pattern that does not
+    compile.
+    """
+    exact, patterns = _parse(path)
+    if not patterns:
+        return _Compiled(exact, None, ())
+    for pat, _, lineno in patterns:
+        try:
+            re.compile(pat)
+        except re.error as exc:
+            raise re.error(f"{path}:{lineno}: re:{pat}: {exc.msg}") from exc
+    combined = "|".join(f"(?P<a{i}>{pat})" for i, (pat, _, _) in enumerate(patterns))
+    return _Compiled(
+        exact,
+        re.compile(combined, re.IGNORECASE),
+        tuple(canonical for _, canonical, _ in patterns),
+    )
+
+
+class AliasRegistry:
+    """Alias file compiled into a hash map plus a single pattern regex.
+
+    ``lookup`` costs one dict probe and, on a miss, one ``fullmatch`` of the
+    combined regex, regardless of how many exact aliases the file holds.
+    The file's mtime is checked at most every ``check_interval`` seconds and
+    the compiled tables are swapped in atomically when it changes. A file
+    that does not compile (a bad ``re:`` line, an unreadable file) is logged
+    and kept in ``error``; lookups go on using the previous tables.
+    """
+
+    def __init__(self, path: str, check_interval: float = 2.0) -> None:
+        self.path = path
+        self.check_interval = check_interval
+        self.error: str | None = None
+        self._lock = threading.Lock()
+        self._tables = _Compiled({}, None, ())
+        self.reload()
+
+    def _stat(self) -> float | None:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def reload(self) -> int:
+        """Recompile from disk now; return the number of aliases loaded."""
+        with self._lock:
+            self._mtime = self._stat()
+            self._checked = time.monotonic()
+            try:
+                self._tables = _compile(self.path)
+                self.error = None
+            except (re.error, OSError, UnicodeDecodeError) as exc:
+                self.error = str(exc)
+                log.warning("alias file not reloaded, keeping the previous aliases: %s", exc)
+            return len(self)
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return
+        self._checked = now
+        if self._stat() != self._mtime:
+            self.reload()
+
+    def lookup(self, name: str) -> str | None:
+        """Return the canonical name for ``name``, or ``None`` if it is not an alias."""
+        self._maybe_reload()
+        tables = self._tables
+        hit = tables.exact.get(alias_key(name))
+        if hit is not None:
+            return hit
+        if tables.pattern is not None:
+            m = tables.pattern.fullmatch((name or "").strip())
+            if m:
+                return tables.pattern_targets[int(m.lastgroup[1:])]
+        return None
+
+    def __len__(self) -> int:
+        return len(self._tables.exact) + len(self._tables.pattern_targets)
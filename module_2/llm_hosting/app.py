@@ -3,19 +3,37 @@
 
 from __future__ import annotations
 
+import glob
 import json
+import multiprocessing
 import os
+import queue
 import re
 import sys
+import threading
+import time
 import difflib
-from typing import Any, Dict, List, Tuple
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Tuple
 
-from flask import Flask, jsonify, request
-from huggingface_hub import hf_hub_download
-from llama_cpp import Llama  # CPU-only by default if N_GPU_LAYERS=0
+from flask import Flask, Response, jsonify, request, stream_with_context
+
+from aliases import AliasRegistry
+
+# llama_cpp and huggingface_hub are imported on first model load, so the
+# HTTP server binds and answers health checks immediately.
+if TYPE_CHECKING:
+    from llama_cpp import Llama, LlamaGrammar
+    from resolver import NGramResolver
 
 app = Flask(__name__)
 
+# Data files and downloaded models default to this directory, not the working
+# directory, so the module behaves the same when imported from elsewhere
+# (e.g. by module_5's pipeline).
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
 # ---------------- Model config ----------------
 MODEL_REPO = os.getenv(
     "MODEL_REPO",
@@ -26,16 +44,61 @@ MODEL_FILE = os.getenv(
     "tinyllama-1.1b-chat-v1.0.Q4_K_M.gguf",
 )
 
+# Pinned local GGUF file; when set (or already downloaded to models/) the
+# Hugging Face Hub is never contacted.
+MODEL_PATH = os.getenv("MODEL_PATH", "")
+MODELS_DIR = os.getenv("MODELS_DIR", os.path.join(APP_DIR, "models"))
+# Load the model in a background thread as soon as the server starts.
+LLM_PREWARM = os.getenv("LLM_PREWARM", "1") == "1"
+
+# Rows whose program and university halves both match a canonical name with
+# at least this n-gram cosine score, and by this margin over the next-best
+# name, are resolved without calling the LLM.
+RESOLVER_ENABLED = os.getenv("RESOLVER", "1") == "1"
+RESOLVER_MIN_SCORE = float(os.getenv("RESOLVER_MIN_SCORE", "0.9"))
+RESOLVER_MIN_MARGIN = float(os.getenv("RESOLVER_MIN_MARGIN", "0.1"))
+# Degree labels are not in the canonical program list: programs are matched
+# without them and get them back afterwards, on both the LLM and fast paths.
+DEGREE_SUFFIX_RE = re.compile(
+    r"\b(Ph\.?D\.?|Masters?|M\.?S\.?c?|M\.?A\.?|MFA|MBA|MEng|MPH|PsyD|EdD)\s*$", re.IGNORECASE
+)
+
 N_THREADS = int(os.getenv("N_THREADS", str(os.cpu_count() or 2)))
 N_CTX = int(os.getenv("N_CTX", "2048"))
 N_GPU_LAYERS = int(os.getenv("N_GPU_LAYERS", "0"))  # 0 → CPU-only
 
-CANON_UNIS_PATH = os.getenv("CANON_UNIS_PATH", "canon_universities.txt")
-CANON_PROGS_PATH = os.getenv("CANON_PROGS_PATH", "canon_programs.txt")
+# ---------------- Worker pool config ----------------
+# LLM_WORKERS model instances share the N_THREADS budget (N_THREADS / K each).
+LLM_WORKERS = max(1, int(os.getenv("LLM_WORKERS", "1")))
+# Max requests allowed to wait for a free instance before we answer 503.
+LLM_QUEUE_MAX = int(os.getenv("LLM_QUEUE_MAX", str(4 * LLM_WORKERS)))
+# Per-request deadline (seconds) for all rows of one /standardize call.
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+
+CANON_UNIS_PATH = os.getenv("CANON_UNIS_PATH", os.path.join(APP_DIR, "canon_universities.txt"))
+CANON_PROGS_PATH = os.getenv("CANON_PROGS_PATH", os.path.join(APP_DIR, "canon_programs.txt"))
 
 # Precompiled, non-greedy JSON object matcher to tolerate chatter around JSON
 JSON_OBJ_RE = re.compile(r"\{.*?\}", re.DOTALL)
 
+# ---------------- Constrained decoding ----------------
+# With LLM_JSON_GRAMMAR=1 the sampler may only emit the two-key object below,
+# so decoding stops as soon as the closing brace is produced. LLM_MAX_TOKENS
+# is only a ceiling then, so it stays large enough for the longest names
+# plus the ~20 tokens of JSON keys and punctuation.
+LLM_JSON_GRAMMAR = os.getenv("LLM_JSON_GRAMMAR", "1") == "1"
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "128"))
+
+JSON_GRAMMAR = r"""
+root   ::= "{" ws "\"standardized_program\"" ws ":" ws string ws "," ws "\"standardized_university\"" ws ":" ws string ws "}"
+string ::= "\"" char* "\""
+char   ::= [^"\\\n] | "\\" ["\\/bnrt]
+ws     ::= " "?
+"""
+
+_DECODE_STATS: Dict[str, int] = {"calls": 0, "completion_tokens": 0, "fallbacks": 0, "resolver_hits": 0}
+_DECODE_LOCK = threading.Lock()
+
 # ---------------- Canonical lists + abbrev maps ----------------
 def _read_lines(path: str) -> List[str]:
     """Read non-empty, stripped lines from a file (UTF-8)."""
@@ -46,21 +109,66 @@ def _read_lines(path: str) -> List[str]:
         return []
 
 
-CANON_UNIS = _read_lines(CANON_UNIS_PATH)
-CANON_PROGS = _read_lines(CANON_PROGS_PATH)
+@lru_cache(maxsize=None)
+def _canon_unis() -> List[str]:
+    """Canonical university names, read on first use."""
+    return _read_lines(CANON_UNIS_PATH)
 
-ABBREV_UNI: Dict[str, str] = {
-    r"(?i)^mcg(\.|ill)?$": "McGill University",
-    r"(?i)^(ubc|u\.?b\.?c\.?)$": "University of British Columbia",
-    r"(?i)^uoft$": "University of Toronto",
-}
 
-COMMON_UNI_FIXES: Dict[str, str] = {
-    "McGiill University": "McGill University",
-    "Mcgill University": "McGill University",
-    # Normalize 'Of' → 'of'
-    "University Of British Columbia": "University of British Columbia",
-}
+@lru_cache(maxsize=None)
+def _canon_progs() -> List[str]:
+    """Canonical program names, read on first use."""
+    return _read_lines(CANON_PROGS_PATH)
+
+UNI_ALIASES_PATH = os.getenv("UNI_ALIASES_PATH", os.path.join(APP_DIR, "uni_aliases.txt"))
+
+
+@lru_cache(maxsize=None)
+def _uni_aliases() -> AliasRegistry:
+    """University alias registry (abbreviations + spelling fixes), hot-reloaded."""
+    return AliasRegistry(UNI_ALIASES_PATH)
+
+
+@lru_cache(maxsize=None)
+def _canon_uni_set() -> frozenset[str]:
+    """Set view of the canonical universities for O(1) membership checks."""
+    return frozenset(_canon_unis())
+
+
+@lru_cache(maxsize=None)
+def _canon_prog_set() -> frozenset[str]:
+    """Set view of the canonical programs for O(1) membership checks."""
+    return frozenset(_canon_progs())
+
+
+@lru_cache(maxsize=None)
+def _uni_resolver() -> NGramResolver:
+    """n-gram TF-IDF index over canonical universities (cached as .npy)."""
+    from resolver import NGramResolver
+
+    return NGramResolver(
+        _canon_unis(), cache_path=CANON_UNIS_PATH, min_score=RESOLVER_MIN_SCORE, min_margin=RESOLVER_MIN_MARGIN
+    )
+
+
+@lru_cache(maxsize=None)
+def _prog_resolver() -> NGramResolver:
+    """n-gram TF-IDF index over canonical programs (cached as .npy).
+
+    Program names are matched regardless of word order ("Computer and
+    Electrical Engineering"); university names are not, because there it
+    tells schools apart ("Washington University", "University of Washington").
+    """
+    from resolver import NGramResolver
+
+    return NGramResolver(
+        _canon_progs(),
+        cache_path=CANON_PROGS_PATH,
+        sort_tokens=True,
+        min_score=RESOLVER_MIN_SCORE,
+        min_margin=RESOLVER_MIN_MARGIN,
+    )
+
 
 COMMON_PROG_FIXES: Dict[str, str] = {
     "Mathematic": "Mathematics",
@@ -113,28 +221,192 @@ FEW_SHOTS: List[Tuple[Dict[str, str], Dict[str, str]]] = [
 _LLM: Llama | None = None
 
 
-def _load_llm() -> Llama:
-    """Download (or reuse) the GGUF file and initialize llama.cpp."""
-    global _LLM
-    if _LLM is not None:
-        return _LLM
+def _resolve_model_path() -> str:
+    """Return a local GGUF path, downloading from the Hub only if none exists."""
+    if MODEL_PATH:
+        return MODEL_PATH
+    local = os.path.join(MODELS_DIR, MODEL_FILE)
+    if os.path.exists(local):
+        return local
+
+    from huggingface_hub import hf_hub_download
 
-    model_path = hf_hub_download(
+    return hf_hub_download(
         repo_id=MODEL_REPO,
         filename=MODEL_FILE,
-        local_dir="models",
+        local_dir=MODELS_DIR,
         local_dir_use_symlinks=False,
         force_filename=MODEL_FILE,
     )
 
-    _LLM = Llama(
-        model_path=model_path,
+
+def _load_llm(n_threads: int = N_THREADS, shared: bool = True) -> Llama:
+    """Resolve the GGUF file and initialize llama.cpp (memory-mapped).
+
+    ``shared`` reuses (or becomes) the process-wide full-thread instance; a
+    pool of several workers passes False so every worker gets its own.
+    """
+    global _LLM
+    shared = shared and n_threads == N_THREADS
+    if shared and _LLM is not None:
+        return _LLM
+
+    from llama_cpp import Llama
+
+    llm = Llama(
+        model_path=_resolve_model_path(),
         n_ctx=N_CTX,
-        n_threads=N_THREADS,
+        n_threads=n_threads,
         n_gpu_layers=N_GPU_LAYERS,
+        use_mmap=True,
         verbose=False,
     )
-    return _LLM
+    if shared:
+        _LLM = llm
+    return llm
+
+
+def _json_grammar() -> LlamaGrammar | None:
+    """Parse ``JSON_GRAMMAR`` (None when ``LLM_JSON_GRAMMAR`` is off)."""
+    if not LLM_JSON_GRAMMAR:
+        return None
+    from llama_cpp import LlamaGrammar
+
+    return LlamaGrammar.from_string(JSON_GRAMMAR, verbose=False)
+
+
+# ---------------- Worker pool ----------------
+class PoolBusy(RuntimeError):
+    """Raised when the wait queue is full (backpressure)."""
+
+
+class PoolNotReady(PoolBusy):
+    """Raised to HTTP requests that arrive while the pool is still loading."""
+
+
+class PoolTimeout(RuntimeError):
+    """Raised when no model instance frees up before the request deadline."""
+
+
+class LLMPool:
+    """K llama.cpp instances behind a bounded wait queue.
+
+    A ``Llama`` object is not safe to share between threads, so each request
+    checks an instance out, runs one completion, and checks it back in.
+    Each instance also gets its own parsed JSON grammar, built once here: a
+    ``LlamaGrammar`` holds the parse state of the completion using it (reset
+    at the start of each one), so it can be reused but not shared.
+    """
+
+    def __init__(self, workers: int, queue_max: int, n_threads: int) -> None:
+        self.workers = workers
+        self.queue_max = queue_max
+        self.threads_per_worker = max(1, n_threads // workers)
+        self._idle: "queue.Queue[Llama]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._stats = {"served": 0, "rejected": 0, "timeouts": 0, "wait_s": 0.0}
+        self._grammars: Dict[int, LlamaGrammar | None] = {}
+        for _ in range(workers):
+            llm = _load_llm(self.threads_per_worker, shared=workers == 1)
+            self._grammars[id(llm)] = _json_grammar()
+            self._idle.put(llm)
+
+    def grammar(self, llm: Llama) -> LlamaGrammar | None:
+        """The JSON grammar parsed for instance ``llm``."""
+        return self._grammars.get(id(llm))
+
+    @contextmanager
+    def lease(self, deadline: float) -> Iterator[Llama]:
+        """Yield an idle instance, waiting at most until ``deadline``."""
+        with self._lock:
+            if self._idle.empty() and self._waiting >= self.queue_max:
+                self._stats["rejected"] += 1
+                raise PoolBusy("standardizer queue is full")
+            self._waiting += 1
+        start = time.monotonic()
+        try:
+            llm = self._idle.get(timeout=max(0.0, deadline - start))
+        except queue.Empty:
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise PoolTimeout("timed out waiting for a model instance") from None
+        finally:
+            with self._lock:
+                self._waiting -= 1
+                self._stats["wait_s"] += time.monotonic() - start
+        try:
+            yield llm
+        finally:
+            self._idle.put(llm)
+            with self._lock:
+                self._stats["served"] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of pool size, queue depth and counters."""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "threads_per_worker": self.threads_per_worker,
+                "idle": self._idle.qsize(),
+                "queue_depth": self._waiting,
+                "queue_max": self.queue_max,
+                **self._stats,
+            }
+
+
+_POOL: LLMPool | None = None
+_POOL_LOCK = threading.Lock()
+_READY = threading.Event()
+_PREWARM_ERROR: str | None = None
+_PREWARM_THREAD: threading.Thread | None = None
+_PREWARM_LOCK = threading.Lock()
+
+
+def _get_pool(wait: bool = True) -> LLMPool:
+    """Return the shared pool.
+
+    With ``wait`` (CLI, in-process callers, the pre-warm thread) the pool is
+    built now if needed. HTTP requests pass ``wait=False``: loading K models
+    takes far longer than any request deadline, so until the background load
+    is done they get ``PoolNotReady`` (503) instead of queueing on the lock.
+    """
+    global _POOL
+    if _POOL is not None:
+        return _POOL
+    if not wait:
+        _start_prewarm()
+        raise PoolNotReady("model is still loading")
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = LLMPool(LLM_WORKERS, LLM_QUEUE_MAX, N_THREADS)
+            _READY.set()
+        return _POOL
+
+
+def _prewarm() -> None:
+    """Load canonical lists and every pool instance; record any failure."""
+    global _PREWARM_ERROR
+    try:
+        _canon_uni_set()
+        _canon_prog_set()
+        _uni_aliases()
+        if RESOLVER_ENABLED:
+            _uni_resolver()
+            _prog_resolver()
+        _get_pool()
+    except Exception as exc:  # surfaced through /ready
+        _PREWARM_ERROR = f"{type(exc).__name__}: {exc}"
+
+
+def _start_prewarm() -> threading.Thread:
+    """Start loading the model in the background (once) and return the thread."""
+    global _PREWARM_THREAD
+    with _PREWARM_LOCK:
+        if _PREWARM_THREAD is None:
+            _PREWARM_THREAD = threading.Thread(target=_prewarm, name="llm-prewarm", daemon=True)
+            _PREWARM_THREAD.start()
+        return _PREWARM_THREAD
 
 
 def _split_fallback(text: str) -> Tuple[str, str]:
@@ -170,44 +442,85 @@ def _best_match(name: str, candidates: List[str], cutoff: float = 0.86) -> str |
     return matches[0] if matches else None
 
 
+def _split_degree(prog: str) -> Tuple[str, str]:
+    """Split a trailing degree label off a program name ("Statistics", "MS")."""
+    degree = DEGREE_SUFFIX_RE.search(prog)
+    if not degree or not prog[:degree.start()].strip():
+        return prog, ""
+    return prog[:degree.start()].strip(), degree.group(0).strip()
+
+
 def _post_normalize_program(prog: str) -> str:
-    """Apply common fixes, title case, then canonical/fuzzy mapping."""
+    """Apply common fixes, title case, then canonical/fuzzy mapping.
+
+    A trailing degree label is kept out of the mapping and put back after
+    it ("Statistics MS" becomes "Statistics Ms", not "Statistics").
+    """
     p = (prog or "").strip()
     p = COMMON_PROG_FIXES.get(p, p)
-    p = p.title()
-    if p in CANON_PROGS:
-        return p
-    match = _best_match(p, CANON_PROGS, cutoff=0.84)
-    return match or p
+    p, degree = _split_degree(p.title())
+    if p not in _canon_prog_set():
+        p = _best_match(p, _canon_progs(), cutoff=0.84) or p
+    return f"{p} {degree}" if degree else p
 
 
 def _post_normalize_university(uni: str) -> str:
-    """Expand abbreviations, apply common fixes, capitalization, and canonical map."""
+    """Resolve aliases, fix capitalization, then apply the canonical map."""
     u = (uni or "").strip()
 
-    # Abbreviations
-    for pat, full in ABBREV_UNI.items():
-        if re.fullmatch(pat, u):
-            u = full
-            break
-
-    # Common spelling fixes
-    u = COMMON_UNI_FIXES.get(u, u)
+    # Abbreviations and common spelling fixes (one hash/regex lookup)
+    alias = _uni_aliases().lookup(u)
+    if alias:
+        return alias
 
     # Normalize 'Of' → 'of'
     if u:
         u = re.sub(r"\bOf\b", "of", u.title())
 
     # Canonical or fuzzy map
-    if u in CANON_UNIS:
+    if u in _canon_uni_set():
         return u
-    match = _best_match(u, CANON_UNIS, cutoff=0.86)
+    match = _best_match(u, _canon_unis(), cutoff=0.86)
     return match or u or "Unknown"
 
 
-def _call_llm(program_text: str) -> Dict[str, str]:
-    """Query the tiny LLM and return standardized fields."""
-    llm = _load_llm()
+def _resolve_fast(program_text: str) -> Dict[str, str] | None:
+    """Resolve "<program>, <university>" without the LLM when both halves are confident.
+
+    The text is split at its first separator, so university names with a
+    comma ("University of California, Davis") stay whole; a program name
+    with a comma leaves a university half that does not clear the score and
+    goes to the LLM. The university half goes through the alias registry
+    first, then the n-gram index; the program half, without its degree
+    label, goes through the n-gram index and gets the label back. Both are
+    then post-normalized like LLM output, so the two paths give the same
+    form ("Sociology Phd"). Returns ``None`` (→ ask the LLM) unless every
+    lookup is confident (see ``NGramResolver.match``).
+    """
+    parts = [p.strip() for p in re.split(r",| at | @ ", program_text or "", maxsplit=1)]
+    if len(parts) != 2 or not all(parts):
+        return None
+    prog, uni = parts
+    prog, degree = _split_degree(prog)
+
+    std_uni = _uni_aliases().lookup(uni) or _uni_resolver().match(uni)
+    if std_uni is None:
+        return None
+    std_prog = _prog_resolver().match(prog)
+    if std_prog is None:
+        return None
+    if degree:
+        std_prog = f"{std_prog} {degree}"
+    return {
+        "standardized_program": _post_normalize_program(std_prog),
+        "standardized_university": _post_normalize_university(std_uni),
+    }
+
+
+def _call_llm(program_text: str, deadline: float | None = None, wait: bool = True) -> Dict[str, str]:
+    """Query the tiny LLM and return standardized fields (``wait``: see ``_get_pool``)."""
+    if deadline is None:
+        deadline = time.monotonic() + LLM_TIMEOUT
 
     messages = [{"role": "system", "content": SYSTEM_PROMPT}]
     for x_in, x_out in FEW_SHOTS:
@@ -227,14 +540,18 @@ def _call_llm(program_text: str) -> Dict[str, str]:
         }
     )
 
-    out = llm.create_chat_completion(
-        messages=messages,
-        temperature=0.0,
-        max_tokens=128,
-        top_p=1.0,
-    )
+    pool = _get_pool(wait)
+    with pool.lease(deadline) as llm:
+        out = llm.create_chat_completion(
+            messages=messages,
+            temperature=0.0,
+            max_tokens=LLM_MAX_TOKENS,
+            top_p=1.0,
+            grammar=pool.grammar(llm),
+        )
 
     text = (out["choices"][0]["message"]["content"] or "").strip()
+    fallback = False
     try:
         match = JSON_OBJ_RE.search(text)
         obj = json.loads(match.group(0) if match else text)
@@ -242,6 +559,12 @@ def _call_llm(program_text: str) -> Dict[str, str]:
         std_uni = str(obj.get("standardized_university", "")).strip()
     except Exception:
         std_prog, std_uni = _split_fallback(program_text)
+        fallback = True
+
+    with _DECODE_LOCK:
+        _DECODE_STATS["calls"] += 1
+        _DECODE_STATS["completion_tokens"] += int((out.get("usage") or {}).get("completion_tokens") or 0)
+        _DECODE_STATS["fallbacks"] += int(fallback)
 
     std_prog = _post_normalize_program(std_prog)
     std_uni = _post_normalize_university(std_uni)
@@ -260,29 +583,141 @@ def _normalize_input(payload: Any) -> List[Dict[str, Any]]:
     return []
 
 
+def _iter_ndjson(lines: Iterator[bytes | str]) -> Iterator[Tuple[int, Dict[str, Any] | None, str | None]]:
+    """Yield ``(line number, row, error)`` per non-blank JSON Lines record.
+
+    A line that is not a JSON object yields ``row=None`` and the reason, so
+    the caller can answer it in place and outputs stay aligned with inputs.
+    """
+    for n, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="replace")
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield n, None, f"invalid JSON: {exc}"
+            continue
+        if isinstance(row, dict):
+            yield n, row, None
+        else:
+            yield n, None, "expected a JSON object"
+
+
+def standardize_row(
+    row: Dict[str, Any], deadline: float | None = None, wait: bool = True
+) -> Dict[str, Any]:
+    """Add the two llm-generated fields to ``row`` in place and return it."""
+    program_text = (row or {}).get("program") or ""
+    result = _resolve_fast(program_text) if RESOLVER_ENABLED else None
+    if result is None:
+        result = _call_llm(program_text, deadline, wait)
+    else:
+        with _DECODE_LOCK:
+            _DECODE_STATS["resolver_hits"] += 1
+    row["llm-generated-program"] = result["standardized_program"]
+    row["llm-generated-university"] = result["standardized_university"]
+    return row
+
+
 @app.get("/")
 def health() -> Any:
     """Simple liveness check."""
     return jsonify({"ok": True})
 
 
+@app.get("/ready")
+def ready() -> Any:
+    """Readiness check: 200 once the model pool is loaded, 503 before that.
+
+    A probe also starts the background load if nothing has (``LLM_PREWARM=0``
+    or a server started without ``--serve``), so readiness never waits for
+    a first request that a not-ready instance would not be sent.
+    """
+    if _READY.is_set():
+        return jsonify({"ready": True})
+    _start_prewarm()
+    body: Dict[str, Any] = {"ready": False}
+    if _PREWARM_ERROR:
+        body["error"] = _PREWARM_ERROR
+    return jsonify(body), 503
+
+
+def _decode_metrics() -> Dict[str, Any]:
+    """Decode-token and fallback counters, with per-row averages."""
+    with _DECODE_LOCK:
+        stats: Dict[str, Any] = dict(_DECODE_STATS)
+    calls = stats["calls"] or 1
+    stats["tokens_per_row"] = round(stats["completion_tokens"] / calls, 2)
+    stats["fallback_rate"] = round(stats["fallbacks"] / calls, 4)
+    stats["json_grammar"] = LLM_JSON_GRAMMAR
+    return stats
+
+
+@app.get("/metrics")
+def metrics() -> Any:
+    """Worker-pool queue depth and counters, plus decode statistics."""
+    pool = _POOL.metrics() if _POOL is not None else {"workers": 0, "queue_depth": 0}
+    return jsonify({**pool, "decode": _decode_metrics()})
+
+
+@app.post("/aliases/reload")
+def reload_aliases() -> Any:
+    """Re-read the alias file now instead of waiting for the mtime check."""
+    registry = _uni_aliases()
+    count = registry.reload()
+    if registry.error:
+        return jsonify({"aliases": count, "error": registry.error}), 422
+    return jsonify({"aliases": count})
+
+
 @app.post("/standardize")
 def standardize() -> Any:
     """Standardize rows from an HTTP request and return JSON."""
     payload = request.get_json(force=True, silent=True)
     rows = _normalize_input(payload)
+    deadline = time.monotonic() + LLM_TIMEOUT
 
     out: List[Dict[str, Any]] = []
-    for row in rows:
-        program_text = (row or {}).get("program") or ""
-        result = _call_llm(program_text)
-        row["llm-generated-program"] = result["standardized_program"]
-        row["llm-generated-university"] = result["standardized_university"]
-        out.append(row)
+    try:
+        for row in rows:
+            out.append(standardize_row(row, deadline, wait=False))
+    except PoolBusy as exc:
+        return jsonify({"error": str(exc)}), 503, {"Retry-After": "1"}
+    except PoolTimeout as exc:
+        return jsonify({"error": str(exc), "rows_done": len(out)}), 504
 
     return jsonify({"rows": out})
 
 
+@app.post("/standardize/stream")
+def standardize_stream() -> Any:
+    """Standardize an NDJSON request body and stream NDJSON results row by row.
+
+    Each row gets its own ``LLM_TIMEOUT`` deadline. A line that is not a
+    JSON object is answered with ``{"error": ..., "line": n}`` in its place.
+    If the pool rejects or times out mid-stream, a final ``{"error": ...}``
+    line is written instead of a status code, since the headers have already
+    been sent.
+    """
+
+    def generate() -> Iterator[str]:
+        for n, row, error in _iter_ndjson(request.stream):
+            if row is None:
+                yield json.dumps({"error": error, "line": n}) + "\n"
+                continue
+            try:
+                standardize_row(row, time.monotonic() + LLM_TIMEOUT, wait=False)
+            except (PoolBusy, PoolTimeout) as exc:
+                yield json.dumps({"error": str(exc)}) + "\n"
+                return
+            yield json.dumps(row, ensure_ascii=False) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
 def _cli_process_file(
     in_path: str,
     out_path: str | None,
@@ -303,10 +738,7 @@ def _cli_process_file(
 
     try:
         for row in rows:
-            program_text = (row or {}).get("program") or ""
-            result = _call_llm(program_text)
-            row["llm-generated-program"] = result["standardized_program"]
-            row["llm-generated-university"] = result["standardized_university"]
+            standardize_row(row)
 
             json.dump(row, sink, ensure_ascii=False)
             sink.write("\n")
@@ -314,6 +746,152 @@ def _cli_process_file(
     finally:
         if sink is not sys.stdout:
             sink.close()
+    print(f"decode stats: {json.dumps(_decode_metrics())}", file=sys.stderr)
+
+
+# ---------------- Parallel, resumable chunk driver ----------------
+def _write_json_atomic(path: str, obj: Any) -> None:
+    """Write JSON to ``path`` via a temp file + rename so readers never see half a file."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _recover_part(part_path: str) -> Dict[str, Dict[str, Any]]:
+    """Return ``{key: row}`` already written to a part file.
+
+    A worker killed mid-write can leave a torn last line; it is truncated
+    away so that appending resumes on a clean line boundary.
+    """
+    if not os.path.exists(part_path):
+        return {}
+    with open(part_path, "rb") as f:
+        data = f.read()
+    good = data[: data.rfind(b"\n") + 1]
+    if len(good) != len(data):
+        with open(part_path, "wb") as f:
+            f.write(good)
+    done: Dict[str, Dict[str, Any]] = {}
+    for line in good.splitlines():
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            continue
+        done[rec["key"]] = rec["row"]
+    return done
+
+
+def _init_chunk_worker(n_threads: int) -> None:
+    """Give each worker process one model instance with its share of threads."""
+    global N_THREADS, LLM_WORKERS
+    N_THREADS = n_threads
+    LLM_WORKERS = 1
+
+
+def _process_chunk(job: Tuple[str, str]) -> Tuple[str, int, int]:
+    """Standardize the rows of one chunk not yet present in its part file."""
+    in_path, part_path = job
+    name = os.path.basename(in_path)
+    with open(in_path, "r", encoding="utf-8") as f:
+        rows = _normalize_input(json.load(f))
+    done = _recover_part(part_path)
+
+    with open(part_path, "a", encoding="utf-8") as sink:
+        for i, row in enumerate(rows):
+            key = f"{name}#{i}"
+            if key in done:
+                continue
+            standardize_row(row)
+            sink.write(json.dumps({"key": key, "row": row}, ensure_ascii=False) + "\n")
+            sink.flush()
+            done[key] = row
+    return name, len(rows), len(done)
+
+
+def _cli_process_chunks(
+    chunks_dir: str,
+    out_path: str | None,
+    workers: int,
+    manifest_path: str | None,
+) -> None:
+    """Standardize every chunk in ``chunks_dir`` across ``workers`` processes.
+
+    Each chunk streams into its own part file under ``<out>.parts/``; the
+    manifest records per-chunk row counts and completion. Re-running the same
+    command skips finished chunks and, within a chunk, rows whose key
+    (``<chunk file>#<row index>``) is already in the part file. When every
+    chunk is complete, parts are merged into ``out`` in chunk-name then
+    row-index order, so the output does not depend on scheduling. Part paths
+    in the manifest are relative to the directory of ``out``, so a resume
+    works from any working directory.
+    """
+    out_path = out_path or (chunks_dir.rstrip("/\\") + ".jsonl")
+    manifest_path = manifest_path or (out_path + ".manifest.json")
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    parts_name = os.path.basename(out_path) + ".parts"
+    os.makedirs(os.path.join(out_dir, parts_name), exist_ok=True)
+
+    chunk_paths = sorted(glob.glob(os.path.join(chunks_dir, "*.json")))
+    manifest: Dict[str, Any] = {"chunks": {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+    pending: List[Tuple[str, str]] = []
+    for path in chunk_paths:
+        name = os.path.basename(path)
+        part = os.path.join(parts_name, name + "l")
+        part_path = os.path.join(out_dir, part)
+        entry = manifest["chunks"].get(name) or {}
+        if entry.get("complete") and os.path.exists(part_path):
+            continue
+        entry.update({"part": part, "done": len(_recover_part(part_path)), "complete": False})
+        manifest["chunks"][name] = entry
+        pending.append((path, part_path))
+    _write_json_atomic(manifest_path, manifest)
+
+    workers = max(1, min(workers, len(pending) or 1))
+    threads = max(1, N_THREADS // workers)
+    with multiprocessing.Pool(workers, _init_chunk_worker, (threads,)) as pool:
+        for name, total, done in pool.imap_unordered(_process_chunk, pending):
+            manifest["chunks"][name].update(
+                {"rows": total, "done": done, "complete": done >= total}
+            )
+            _write_json_atomic(manifest_path, manifest)
+            print(f"{name}: {done}/{total} rows", file=sys.stderr)
+
+    tmp = out_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as sink:
+        for path in chunk_paths:
+            name = os.path.basename(path)
+            done = _recover_part(os.path.join(out_dir, manifest["chunks"][name]["part"]))
+            for i in range(manifest["chunks"][name]["rows"]):
+                sink.write(json.dumps(done[f"{name}#{i}"], ensure_ascii=False) + "\n")
+    os.replace(tmp, out_path)
+
+
+def _bench_startup() -> Dict[str, float]:
+    """Time module import (fresh interpreter), model load, and first completion."""
+    import subprocess
+
+    probe = (
+        "import time; t = time.perf_counter(); import app; "
+        "print(time.perf_counter() - t)"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", probe], cwd=APP_DIR, capture_output=True, text=True, check=True
+    )
+    timings = {"import_s": float(proc.stdout.strip().splitlines()[-1])}
+
+    t = time.perf_counter()
+    _get_pool()
+    timings["model_load_s"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    _call_llm("Information Studies, McGill University")
+    timings["first_call_s"] = time.perf_counter() - t
+    return {k: round(v, 4) for k, v in timings.items()}
 
 
 if __name__ == "__main__":
@@ -348,11 +926,44 @@ if __name__ == "__main__":
         action="store_true",
         help="Write JSON Lines to stdout instead of a file.",
     )
+    parser.add_argument(
+        "--chunks-dir",
+        default=None,
+        help="Standardize every *.json chunk in this directory (resumable). "
+        "--out defaults to <chunks-dir>.jsonl.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for --chunks-dir (each loads its own model).",
+    )
+    parser.add_argument(
+        "--manifest",
+        default=None,
+        help="Progress manifest for --chunks-dir. Defaults to <out>.manifest.json.",
+    )
+    parser.add_argument(
+        "--bench-startup",
+        action="store_true",
+        help="Print import / model-load / first-call timings as JSON and exit.",
+    )
     args = parser.parse_args()
 
-    if args.serve or args.file is None:
+    if args.bench_startup:
+        print(json.dumps(_bench_startup()))
+    elif args.chunks_dir:
+        _cli_process_chunks(
+            chunks_dir=args.chunks_dir,
+            out_path=args.out,
+            workers=args.workers,
+            manifest_path=args.manifest,
+        )
+    elif args.serve or args.file is None:
         port = int(os.getenv("PORT", "8000"))
-        app.run(host="0.0.0.0", port=port, debug=False)
+        if LLM_PREWARM:
+            _start_prewarm()
+        app.run(host="0.0.0.0", port=port, debug=False, threaded=True)
     else:
         _cli_process_file(
             in_path=args.file,
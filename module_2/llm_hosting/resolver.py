@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""Character n-gram TF-IDF resolver: batched nearest-neighbour lookup with NumPy.
+
+Canonical names are embedded once as hashed character n-gram TF-IDF vectors
+(L2-normalized, float32) and cached next to the list as ``.npy`` files that
+are memory-mapped on later starts. Scoring a batch of queries is a single
+``queries @ matrix.T`` product followed by ``argpartition`` for top-k.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import zlib
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+NGRAM_SIZES = (2, 3, 4)
+DEFAULT_DIM = 4096
+# Term weighting of the cached vectors: smoothed IDF, L2-normalized rows.
+# Change it whenever the formula in NGramResolver.__init__ changes, so old
+# .npy caches are not reused.
+WEIGHTING = "smooth-idf+l2"
+# A match must clear MIN_SCORE and lead the runner-up by MIN_MARGIN, so a
+# name halfway between two canonical ones is left to the caller.
+MIN_SCORE = 0.9
+MIN_MARGIN = 0.1
+
+
+def _ngrams(text: str, sizes: Sequence[int] = NGRAM_SIZES, sort_tokens: bool = False) -> List[str]:
+    """Character n-grams of the padded, lowercased, whitespace-collapsed text.
+
+    With ``sort_tokens`` the words are put in alphabetical order first, so
+    "Computer and Electrical Engineering" and "Electrical and Computer
+    Engineering" get the same n-grams.
+    """
+    tokens = (text or "").lower().split()
+    if sort_tokens:
+        tokens.sort()
+    t = " " + " ".join(tokens) + " "
+    return [t[i : i + n] for n in sizes for i in range(len(t) - n + 1)]
+
+
+def _counts(
+    texts: Sequence[str], dim: int, sizes: Sequence[int] = NGRAM_SIZES, sort_tokens: bool = False
+) -> np.ndarray:
+    """Hashed n-gram count matrix (len(texts) × dim)."""
+    out = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for g in _ngrams(text, sizes, sort_tokens):
+            out[row, zlib.crc32(g.encode("utf-8")) % dim] += 1.0
+    return out
+
+
+def _l2_normalize(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+
+class NGramResolver:
+    """Top-k resolver over a fixed list of canonical names.
+
+    ``ngram_sizes``, ``dim`` and ``sort_tokens`` shape the vectors (all of
+    them are part of the ``.npy`` cache key); ``min_score`` and
+    ``min_margin`` only decide which matches ``match`` accepts.
+    """
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        dim: int = DEFAULT_DIM,
+        cache_path: str | None = None,
+        ngram_sizes: Sequence[int] = NGRAM_SIZES,
+        sort_tokens: bool = False,
+        min_score: float = MIN_SCORE,
+        min_margin: float = MIN_MARGIN,
+    ) -> None:
+        self.names = list(names)
+        self.dim = dim
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.sort_tokens = sort_tokens
+        self.min_score = min_score
+        self.min_margin = min_margin
+        loaded = self._load_cache(cache_path) if cache_path else None
+        if loaded is None:
+            counts = _counts(self.names, dim, self.ngram_sizes, sort_tokens)
+            df = np.count_nonzero(counts, axis=0).astype(np.float32)
+            self.idf = np.log((1.0 + len(self.names)) / (1.0 + df)).astype(np.float32) + 1.0
+            self.matrix = _l2_normalize(counts * self.idf)
+            if cache_path:
+                self._save_cache(cache_path)
+        else:
+            self.idf, self.matrix = loaded
+
+    # ---------------- cache ----------------
+    def _cache_files(self, cache_path: str) -> Tuple[str, str]:
+        key = {
+            "names": self.names,
+            "dim": self.dim,
+            "ngram_sizes": self.ngram_sizes,
+            "sort_tokens": self.sort_tokens,
+            "weighting": WEIGHTING,
+        }
+        digest = hashlib.sha1(json.dumps(key).encode("utf-8")).hexdigest()[:12]
+        stem = f"{cache_path}.ngram-{self.dim}-{digest}"
+        return stem + ".matrix.npy", stem + ".idf.npy"
+
+    def _load_cache(self, cache_path: str) -> Tuple[np.ndarray, np.ndarray] | None:
+        matrix_path, idf_path = self._cache_files(cache_path)
+        if not (os.path.exists(matrix_path) and os.path.exists(idf_path)):
+            return None
+        return np.load(idf_path), np.load(matrix_path, mmap_mode="r")
+
+    def _save_cache(self, cache_path: str) -> None:
+        matrix_path, idf_path = self._cache_files(cache_path)
+        try:
+            np.save(idf_path, self.idf)
+            np.save(matrix_path, self.matrix)
+        except OSError:
+            pass  # read-only checkout: keep the in-memory matrix
+
+    # ---------------- lookup ----------------
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """TF-IDF vectors for ``texts`` in the canonical space."""
+        return _l2_normalize(_counts(texts, self.dim, self.ngram_sizes, self.sort_tokens) * self.idf)
+
+    def top_k(self, texts: Sequence[str], k: int = 3) -> List[List[Tuple[str, float]]]:
+        """Return the ``k`` best ``(name, cosine)`` pairs for each text."""
+        if not texts or not self.names:
+            return [[] for _ in texts]
+        k = min(k, len(self.names))
+        scores = self.embed(texts) @ self.matrix.T
+        idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        out: List[List[Tuple[str, float]]] = []
+        for row, cand in enumerate(idx):
+            ordered = cand[np.argsort(-scores[row, cand])]
+            out.append([(self.names[j], float(scores[row, j])) for j in ordered])
+        return out
+
+    def best(self, text: str) -> Tuple[str | None, float]:
+        """Best single match and its cosine score."""
+        hits = self.top_k([text], k=1)[0]
+        return hits[0] if hits else (None, 0.0)
+
+    def match(self, text: str) -> str | None:
+        """The best name if it clears ``min_score`` and leads the runner-up by ``min_margin``."""
+        hits = self.top_k([text], k=2)[0]
+        if not hits or hits[0][1] < self.min_score:
+            return None
+        if len(hits) > 1 and hits[0][1] - hits[1][1] < self.min_margin:
+            return None
+        return hits[0][0]
+
+
+# ---------------- Benchmark vs difflib ----------------
+def _perturb(name: str, rng: np.random.Generator) -> str:
+    """Typo-style variant: drop, swap, or duplicate one character, or change case."""
+    if len(name) < 4:
+        return name.lower()
+    i = int(rng.integers(1, len(name) - 2))
+    op = int(rng.integers(0, 4))
+    if op == 0:
+        return name[:i] + name[i + 1 :]
+    if op == 1:
+        return name[:i] + name[i + 1] + name[i] + name[i + 2 :]
+    if op == 2:
+        return name[:i] + name[i] + name[i:]
+    return name.lower()
+
+
+def benchmark(names: Sequence[str], n_queries: int = 1000, seed: int = 0) -> dict:
+    """Top-1 accuracy and queries/sec of NGramResolver vs difflib on typo variants."""
+    import difflib
+    import time
+
+    rng = np.random.default_rng(seed)
+    truth = [names[int(j)] for j in rng.integers(0, len(names), n_queries)]
+    queries = [_perturb(t, rng) for t in truth]
+
+    t = time.perf_counter()
+    resolver = NGramResolver(names)
+    build_s = time.perf_counter() - t
+
+    t = time.perf_counter()
+    hits = resolver.top_k(queries, k=1)
+    ngram_s = time.perf_counter() - t
+    ngram_ok = sum(h[0][0] == want for h, want in zip(hits, truth))
+
+    t = time.perf_counter()
+    diff_ok = 0
+    for q, want in zip(queries, truth):
+        m = difflib.get_close_matches(q, names, n=1, cutoff=0.0)
+        diff_ok += bool(m) and m[0] == want
+    diff_s = time.perf_counter() - t
+
+    return {
+        "names": len(names),
+        "queries": n_queries,
+        "ngram": {"accuracy": ngram_ok / n_queries, "qps": round(n_queries / ngram_s), "build_s": round(build_s, 3)},
+        "difflib": {"accuracy": diff_ok / n_queries, "qps": round(n_queries / diff_s)},
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Benchmark the n-gram resolver against difflib.")
+    parser.add_argument("--canon", default="canon_universities.txt")
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    with open(args.canon, "r", encoding="utf-8") as f:
+        canon = [ln.strip() for ln in f if ln.strip()]
+    print(json.dumps(benchmark(canon, args.queries), indent=2))
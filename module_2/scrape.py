@@ -41,13 +41,22 @@ def scrape_data(max_records: int = MAX_RECORDS_DEFAULT) -> list[dict]:
     Pull data from GradCafe survey pages until max_records is reached (or pages run out).
     Returns raw records; cleaning happens in clean.py.
     """
+    return list(iter_records(max_records))
+
+
+def iter_records(max_records: int = MAX_RECORDS_DEFAULT, on_page=None):
+    """
+    Yield raw records page by page so downstream stages can start on page 1
+    while later pages are still being fetched (see module_5/src/pipeline.py).
+    ``on_page(page, total)`` is called after each page is parsed.
+    """
     if not check_robots_txt():
         raise RuntimeError("robots.txt does not permit scraping the survey pages")
 
-    all_records: list[dict] = []
+    total = 0
     page = 1
 
-    while len(all_records) < max_records:
+    while total < max_records:
         page_url = _build_survey_url(page)
 
         html = _fetch_html(page_url)
@@ -57,14 +66,18 @@ def scrape_data(max_records: int = MAX_RECORDS_DEFAULT) -> list[dict]:
             print(f"No rows found on page {page}. Stopping.")
             break
 
-        all_records.extend(page_records)
-        print(f"Page {page}: +{len(page_records)} records | total={len(all_records)}")
+        page_records = page_records[:max_records - total]
+        total += len(page_records)
+        print(f"Page {page}: +{len(page_records)} records | total={total}")
+        if on_page is not None:
+            on_page(page, total)
+        yield from page_records
 
+        if total >= max_records:
+            break
         page += 1
         time.sleep(random.uniform(DELAY_MIN, DELAY_MAX))
 
-    return all_records[:max_records]
-
 
 def save_data(records: list[dict], output_path: str = "module_2/applicant_data.json") -> None:
     """
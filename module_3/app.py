@@ -1,9 +1,14 @@
+import importlib.util
 import os
-import threading
 import subprocess
+import sys
+import threading
+import time
 import psycopg2
 from flask import Flask, render_template, redirect, url_for, flash, request
 
+import load_data
+
 # -------------------------
 # Flask setup
 # -------------------------
@@ -19,7 +24,6 @@ PROJECT_ROOT = os.path.dirname(BASE_DIR)                       # repo root
 MODULE2_DIR = os.path.join(PROJECT_ROOT, "module_2")
 MODULE3_DIR = BASE_DIR
 
-LOAD_SCRIPT = os.path.join(MODULE3_DIR, "load_data.py")
 QUERY_SCRIPT = os.path.join(MODULE3_DIR, "query_data.py")
 
 # -------------------------
@@ -32,6 +36,10 @@ DB_PORT = int(os.getenv("PGPORT", "5432"))
 
 FALL_2026 = "Fall 2026"
 
+# Pull Data runs scrape → clean → LLM → load in this process (see _pull_worker).
+PULL_MAX_RECORDS = int(os.getenv("PULL_MAX_RECORDS", "200"))
+PULL_USE_LLM = os.getenv("PULL_USE_LLM", "1") == "1"
+
 # -------------------------
 # Thread-safe state
 # -------------------------
@@ -306,53 +314,76 @@ def _run_script(script_path: str) -> tuple[int, str]:
     return proc.returncode, out.strip()
 
 
+def _load_module(name: str, path: str):
+    """Import a Module 2 script by path (once), with its folder on sys.path."""
+    if name in sys.modules:
+        return sys.modules[name]
+    folder = os.path.dirname(path)
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    sys.modules[name] = module
+    return module
+
+
+def _timed(name: str, records, timings: dict):
+    """Yield from records, adding the time spent producing them to timings[name]."""
+    timings[name] = 0.0
+    it = iter(records)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(it)
+        except StopIteration:
+            timings[name] += time.perf_counter() - start
+            return
+        timings[name] += time.perf_counter() - start
+        yield item
+
+
 def _pull_worker(max_records: int | None = None):
     """
-    Pull Data should run Module 2 scraper + cleaner (+ LLM if you decide),
-    then load into Postgres via module_3/load_data.py.
+    Pull Data: Module 2 scraper + cleaner (+ LLM standardizer), then load into
+    Postgres via load_data.insert_records — all chained as generators in this
+    process, so records stream through memory instead of JSON files and no
+    stage pays interpreter start-up / heavy imports again.
     """
     global _PULL_RUNNING, _PULL_MESSAGE
 
-    def run(cmd: list[str], cwd: str):
-        proc = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True)
-        out = (proc.stdout or "") + ("\n" + proc.stderr if proc.stderr else "")
-        print("\n=== RUN:", " ".join(cmd), "===\n", out, "\n")
-        return proc.returncode
-
+    timings: dict = {}
     try:
-        # 1) Module 2 scrape
-        code = run(["python", "scrape.py"], cwd=MODULE2_DIR)
-        if code != 0:
-            raise RuntimeError("module_2/scrape.py failed")
+        scrape = _load_module("m2_scrape", os.path.join(MODULE2_DIR, "scrape.py"))
+        clean = _load_module("m2_clean", os.path.join(MODULE2_DIR, "clean.py"))
 
-        # 2) Module 2 clean
-        code = run(["python", "clean.py"], cwd=MODULE2_DIR)
-        if code != 0:
-            raise RuntimeError("module_2/clean.py failed")
-
-        # 3) OPTIONAL: run Module 2 LLM standardizer (CLI) to generate JSONL
-        # If you want this to run every time, point --file to your LLM input file.
-        # (Many students create module_2/llm_in.json first.)
-        llm_hosting_dir = os.path.join(MODULE2_DIR, "llm_hosting")
-        llm_in = os.path.join(MODULE2_DIR, "llm_in.json")  # <-- change if your input file name differs
-        llm_out = os.path.join(MODULE2_DIR, "llm_extend_applicant_data.json")
-
-        if os.path.exists(llm_in):
-            code = run(
-                ["python", "app.py", "--file", llm_in, "--out", llm_out],
-                cwd=llm_hosting_dir,
-            )
-            if code != 0:
-                raise RuntimeError("module_2/llm_hosting/app.py CLI failed")
-        else:
-            print(f"Skipping LLM step (no input file found): {llm_in}")
+        # 1) Module 2 scrape (page by page)
+        records = _timed("scrape", scrape.iter_records(int(max_records or PULL_MAX_RECORDS)), timings)
 
-        # 4) Module 3 load into Postgres
-        code = run(["python", "load_data.py"], cwd=MODULE3_DIR)
-        if code != 0:
-            raise RuntimeError("module_3/load_data.py failed")
-
-        msg = "Pull Data complete: scraped + cleaned (and LLM if available) then loaded into PostgreSQL."
+        # 2) Module 2 clean
+        records = _timed("clean", (clean.clean_record(r) for r in records), timings)
+        stages = ["scrape", "clean"]
+
+        # 3) Module 2 LLM standardizer
+        if PULL_USE_LLM:
+            llm = _load_module("m2_llm", os.path.join(MODULE2_DIR, "llm_hosting", "app.py"))
+            records = _timed("llm", (llm._standardize_row(r) for r in records), timings)
+            stages.append("llm")
+
+        # 4) Module 3 load into Postgres (drives the whole chain)
+        load_data.ensure_index()
+        start = time.perf_counter()
+        read_rows, inserted = load_data.insert_records(records)
+        timings["load"] = time.perf_counter() - start
+        stages.append("load")
+
+        # Generator timings are inclusive of upstream stages; report each stage's own time.
+        own, upstream = [], 0.0
+        for name in stages:
+            own.append(f"{name} {timings[name] - upstream:.1f}s")
+            upstream = timings[name]
+        msg = (f"Pull Data complete: {read_rows} rows processed, {inserted} new rows loaded "
+               f"({', '.join(own)}).")
     except Exception as e:
         msg = f"Pull Data failed: {e}"
     finally:
@@ -397,7 +428,7 @@ def pull_data():
             flash("Pull Data is already running. Please wait.", "warning")
             return redirect(url_for("index"))
         _PULL_RUNNING = True
-        _PULL_MESSAGE = "Pull Data started: running Module 2 scrape+clean (and optional LLM) then loading into DB…"
+        _PULL_MESSAGE = "Pull Data started: streaming Module 2 scrape → clean → LLM into the DB…"
 
     threading.Thread(target=_pull_worker, args=(max_records,), daemon=True).start()
     flash("Pull Data started. When it finishes, click Update Analysis.", "info")
@@ -265,91 +265,102 @@ def ensure_index():
         conn.close()
 
 
-def main():
-    if not os.path.exists(LIV_LLM_JSONL):
-        raise FileNotFoundError(
-            f"Missing Liv JSONL at {LIV_LLM_JSONL}\n"
-            f"Fix: cp module_2/llm_extend_applicant_data.json module_3/data/llm_extend_applicant_data.json"
-        )
+INSERT_SQL = """
+INSERT INTO applicants (
+  program, comments, date_added, url,
+  status, term, us_or_international,
+  gpa, gre, gre_v, gre_aw,
+  degree, llm_generated_program, llm_generated_university
+)
+VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+ON CONFLICT (url, program, comments) DO NOTHING;
+"""
+
+
+def normalize_record(r: Dict[str, Any]) -> tuple:
+    """Turn one Liv/LLM-extended record into the parameter tuple for INSERT_SQL."""
+    program = clean_text(r.get("program"))
+    comments = clean_text(r.get("comments"))
+    url = clean_text(r.get("url"))
+    date_added = parse_date(r.get("date_added") or r.get("date_added_raw"))
+
+    # degree (Liv key: masters_or_phd)
+    deg = normalize_degree(r.get("masters_or_phd") or r.get("degree"))
+
+    # llm fields (support both key styles)
+    llm_prog = clean_text(r.get("llm-generated-program") or r.get("llm_generated_program"))
+    llm_uni = clean_text(r.get("llm-generated-university") or r.get("llm_generated_university"))
+
+    # status may exist in Liv file; otherwise derive from text
+    status = clean_text(r.get("status"))
+    combined = " ".join([program or "", comments or "", status or "", llm_prog or "", llm_uni or ""])
+
+    # term
+    term = extract_term(combined)
+
+    # IMPORTANT fallback: if no term but date_added is in 2026 -> Fall 2026
+    if term is None and date_added and date_added.year == 2026:
+        term = FALL_2026
+
+    # derive status/us_intl if missing
+    if not status:
+        status = extract_status(combined)
+    us_intl = extract_us_intl(combined)
+
+    # GPA/GRE extraction from combined text
+    gpa, gre_q, gre_v, gre_aw = extract_gpa_gre(combined)
+
+    return (
+        program,
+        comments,
+        date_added,
+        url,
+        status,
+        term,
+        us_intl,
+        gpa,
+        gre_q,   # stored in column "gre" (Quant)
+        gre_v,
+        gre_aw,
+        deg,
+        llm_prog,
+        llm_uni,
+    )
 
-    ensure_index()
 
-    insert_sql = """
-    INSERT INTO applicants (
-      program, comments, date_added, url,
-      status, term, us_or_international,
-      gpa, gre, gre_v, gre_aw,
-      degree, llm_generated_program, llm_generated_university
-    )
-    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-    ON CONFLICT (url, program, comments) DO NOTHING;
+def insert_records(records: Iterable[Dict[str, Any]]) -> tuple[int, int]:
+    """
+    Insert records from any iterable (consumed lazily, e.g. the in-process
+    Pull Data pipeline in app.py). Returns (read_rows, inserted).
     """
-
     inserted = 0
     read_rows = 0
 
     conn = get_conn()
     try:
         with conn.cursor() as cur:
-            for r in load_jsonl(LIV_LLM_JSONL):
+            for r in records:
                 read_rows += 1
-
-                program = clean_text(r.get("program"))
-                comments = clean_text(r.get("comments"))
-                url = clean_text(r.get("url"))
-                date_added = parse_date(r.get("date_added") or r.get("date_added_raw"))
-
-                # degree (Liv key: masters_or_phd)
-                deg = normalize_degree(r.get("masters_or_phd") or r.get("degree"))
-
-                # llm fields (support both key styles)
-                llm_prog = clean_text(r.get("llm-generated-program") or r.get("llm_generated_program"))
-                llm_uni = clean_text(r.get("llm-generated-university") or r.get("llm_generated_university"))
-
-                # status may exist in Liv file; otherwise derive from text
-                status = clean_text(r.get("status"))
-                combined = " ".join([program or "", comments or "", status or "", llm_prog or "", llm_uni or ""])
-
-                # term
-                term = extract_term(combined)
-
-                # IMPORTANT fallback: if no term but date_added is in 2026 -> Fall 2026
-                if term is None and date_added and date_added.year == 2026:
-                    term = FALL_2026
-
-                # derive status/us_intl if missing
-                if not status:
-                    status = extract_status(combined)
-                us_intl = extract_us_intl(combined)
-
-                # GPA/GRE extraction from combined text
-                gpa, gre_q, gre_v, gre_aw = extract_gpa_gre(combined)
-
-                cur.execute(
-                    insert_sql,
-                    (
-                        program,
-                        comments,
-                        date_added,
-                        url,
-                        status,
-                        term,
-                        us_intl,
-                        gpa,
-                        gre_q,   # stored in column "gre" (Quant)
-                        gre_v,
-                        gre_aw,
-                        deg,
-                        llm_prog,
-                        llm_uni,
-                    ),
-                )
+                cur.execute(INSERT_SQL, normalize_record(r))
                 inserted += cur.rowcount
 
         conn.commit()
     finally:
         conn.close()
 
+    return read_rows, inserted
+
+
+def main():
+    if not os.path.exists(LIV_LLM_JSONL):
+        raise FileNotFoundError(
+            f"Missing Liv JSONL at {LIV_LLM_JSONL}\n"
+            f"Fix: cp module_2/llm_extend_applicant_data.json module_3/data/llm_extend_applicant_data.json"
+        )
+
+    ensure_index()
+    read_rows, inserted = insert_records(load_jsonl(LIV_LLM_JSONL))
+
     # Report
     conn = get_conn()
     try:
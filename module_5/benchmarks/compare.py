@@ -0,0 +1,163 @@
+"""
+benchmarks/compare.py – Fail when a pipeline stage got slower than the baseline.
+
+Compares a ``pipeline_bench.py`` result with a stored baseline stage by
+stage. The relative change of the medians counts as a regression only when
+it exceeds both ``--threshold`` (default 10%) and the measured noise,
+``--sigmas`` × the combined standard deviation of the two runs. A jittery
+stage therefore needs a larger slowdown before it fails. The exit status is
+1 if any stage regressed::
+
+    # record a baseline (on a private throwaway PostgreSQL cluster)
+    python benchmarks/compare.py --update-baseline
+    # later: re-run with the baseline's settings and compare
+    python benchmarks/compare.py
+    # or compare two existing result files
+    python benchmarks/compare.py --current benchmarks/results/abc123-1k.json
+
+Without ``--current`` the benchmark is re-run with the baseline's scale,
+seed, repeats and stages, against ``--database-url`` if given and otherwise
+a temporary cluster from ``pg_temp.py``. Everything runs offline.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+import pg_temp  # noqa: E402
+import pipeline_bench  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_SIGMAS = 3.0
+DEFAULT_ROWS = 1_000
+
+
+class NotComparable(ValueError):
+    """The two runs used different data or a different result schema."""
+
+
+def compare_stage(base, cur, threshold=DEFAULT_THRESHOLD, sigmas=DEFAULT_SIGMAS):
+    """Verdict for one stage: ``regressed``, ``improved`` or ``ok``, with the numbers."""
+    b, c = base["median"], cur["median"]
+    change = (c - b) / b if b else 0.0
+    noise = sigmas * math.hypot(base["stdev"], cur["stdev"]) / b if b else 0.0
+    band = max(threshold, noise)
+    if change > band:
+        verdict = "regressed"
+    elif change < -band:
+        verdict = "improved"
+    else:
+        verdict = "ok"
+    return {"baseline": b, "current": c, "change": change, "band": band, "verdict": verdict,
+            "baseline_rps": base.get("rows_per_sec"), "current_rps": cur.get("rows_per_sec")}
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD, sigmas=DEFAULT_SIGMAS):
+    """Compare every stage present in both results; ``{stage: compare_stage(...)}``."""
+    for key in ("schema", "rows", "seed"):
+        if baseline.get(key) != current.get(key):
+            raise NotComparable(f"{key} differs: baseline {baseline.get(key)!r}, "
+                                f"current {current.get(key)!r}")
+    return {stage: compare_stage(baseline["stages"][stage], current["stages"][stage],
+                                 threshold, sigmas)
+            for stage in baseline["stages"] if stage in current["stages"]}
+
+
+def _ref(result):
+    sha = (result.get("commit") or "unknown")[:10]
+    return sha + ("+dirty" if result.get("dirty") else "")
+
+
+def report(baseline, current, verdicts):
+    """Human-readable table, followed by one line per regressed stage."""
+    lines = [f"baseline {_ref(baseline)}  vs  current {_ref(current)}  "
+             f"({current['rows']} rows, {current['repeats']} repeats)",
+             "",
+             f"{'stage':<15}{'baseline':>11}{'current':>11}{'change':>10}{'noise':>9}  verdict",
+             "-" * 64]
+    for stage, v in verdicts.items():
+        lines.append(f"{stage:<15}{v['baseline']:>10.4f}s{v['current']:>10.4f}s"
+                     f"{v['change']:>+10.1%}{'±' + format(v['band'], '.1%'):>9}  {v['verdict'].upper()}")
+    missing = sorted(set(baseline["stages"]) - set(verdicts))
+    if missing:
+        lines.append(f"not compared (missing from current run): {', '.join(missing)}")
+    regressed = [(s, v) for s, v in verdicts.items() if v["verdict"] == "regressed"]
+    if regressed:
+        lines.append("")
+        for stage, v in regressed:
+            lines.append(f"REGRESSION {stage}: {v['change']:+.1%} slower "
+                         f"({v['baseline']:.4f}s → {v['current']:.4f}s, "
+                         f"{v['baseline_rps']} → {v['current_rps']} rows/s), "
+                         f"beyond the ±{v['band']:.1%} noise band")
+    else:
+        lines.append("")
+        lines.append("no stage regressed")
+    return "\n".join(lines)
+
+
+def _load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save(path, result):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+
+
+def run_like(baseline, database_url=None, log=None):
+    """Re-run the benchmark with the baseline's settings (or the defaults if None)."""
+    settings = baseline or {"rows": DEFAULT_ROWS, "seed": 0, "repeats": 5, "warmup": 1,
+                            "stages": dict.fromkeys(pipeline_bench.STAGES)}
+    kwargs = {"n": settings["rows"], "stages": tuple(settings["stages"]),
+              "repeats": settings["repeats"], "warmup": settings["warmup"],
+              "seed": settings["seed"], "layout": settings.get("layout", "wide"),
+              "log": log or (lambda msg: print(msg, file=sys.stderr))}
+    needs_db = any(s in pipeline_bench.DB_STAGES for s in kwargs["stages"])
+    if database_url or not needs_db:
+        return pipeline_bench.run(database_url=database_url, **kwargs)
+    with pg_temp.temporary_postgres() as conninfo:
+        return pipeline_bench.run(database_url=conninfo, **kwargs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare pipeline benchmark results with a baseline.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--current", help="result JSON to check (default: run the benchmark now)")
+    parser.add_argument("--database-url", help="scratch database instead of a temporary cluster")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="minimum relative slowdown that can fail (default 0.10)")
+    parser.add_argument("--sigmas", type=float, default=DEFAULT_SIGMAS,
+                        help="noise band in combined standard deviations (default 3)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="store the current result as the new baseline and exit")
+    args = parser.parse_args(argv)
+
+    baseline = _load(args.baseline) if os.path.exists(args.baseline) else None
+    try:
+        current = _load(args.current) if args.current else run_like(baseline, args.database_url)
+    except pg_temp.PostgresUnavailable as exc:
+        parser.exit(2, f"error: {exc} (or pass --database-url)\n")
+
+    if args.update_baseline:
+        _save(args.baseline, current)
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if baseline is None:
+        parser.exit(2, f"error: no baseline at {args.baseline}; run with --update-baseline first\n")
+    try:
+        verdicts = compare(baseline, current, args.threshold, args.sigmas)
+    except NotComparable as exc:
+        parser.exit(2, f"error: results are not comparable: {exc}\n")
+    print(report(baseline, current, verdicts))
+    return 1 if any(v["verdict"] == "regressed" for v in verdicts.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+benchmarks/load_test.py – Compare the sync and async dashboard under load.
+
+Starts ``app.create_app`` and ``async_app.create_async_app`` on local
+threaded servers (metrics cache disabled so every request hits PostgreSQL),
+drives each with N concurrent clients and prints p50/p99 latency and
+requests/sec as JSON::
+
+    python benchmarks/load_test.py --clients 50 --requests 1000
+    python benchmarks/load_test.py --path /api/metrics --out results.json
+
+Uses ``DATABASE_URL`` (or the PG* variables) like the app itself.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import make_server
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from app import create_app  # noqa: E402
+from async_app import create_async_app  # noqa: E402
+
+
+def _serve(flask_app):
+    server = make_server("127.0.0.1", 0, flask_app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def run_load(url, clients, total, warmup=10):
+    """Issue ``total`` GETs to ``url`` from ``clients`` threads; return latency stats."""
+    def hit(_):
+        start = time.perf_counter()
+        with urllib.request.urlopen(url, timeout=60) as resp:
+            resp.read()
+            ok = resp.status == 200
+        return time.perf_counter() - start, ok
+
+    for _ in range(warmup):
+        hit(None)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(hit, range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(r[0] for r in results)
+    return {
+        "requests": total,
+        "errors": sum(1 for r in results if not r[1]),
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync vs async dashboard load test")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--out", default=None, help="Also write the JSON report here.")
+    args = parser.parse_args(argv)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    config = {"METRICS_CACHE": False, "JOBS_INLINE": False}
+    report = {"clients": args.clients, "path": args.path, "results": {}}
+    for name, factory in (("sync", create_app), ("async", create_async_app)):
+        flask_app = factory(dict(config))
+        server = _serve(flask_app)
+        try:
+            url = f"http://127.0.0.1:{server.server_port}{args.path}"
+            report["results"][name] = run_load(url, args.clients, args.requests)
+        finally:
+            server.shutdown()
+            pool = flask_app.extensions.get("async_metrics")
+            if pool is not None:
+                pool.close()
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
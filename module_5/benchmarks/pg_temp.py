@@ -0,0 +1,78 @@
+"""
+benchmarks/pg_temp.py – Throwaway PostgreSQL cluster for benchmark runs.
+
+``temporary_postgres()`` runs ``initdb`` into a temporary directory, starts
+the server on a free port that listens only on a Unix socket inside that
+directory, yields a connection string, then stops the server and deletes
+everything. Nothing touches the network or an existing cluster::
+
+    with temporary_postgres() as conninfo:
+        pipeline_bench.run(1000, database_url=conninfo)
+
+The server binaries are looked up in ``$PG_BIN``, then ``pg_config
+--bindir``, then ``PATH``. PostgreSQL refuses to run as root, so run this
+as an ordinary user.
+"""
+import contextlib
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+
+
+class PostgresUnavailable(RuntimeError):
+    """No usable PostgreSQL server binaries (or running as root)."""
+
+
+def find_bindir():
+    """Directory holding ``initdb`` and ``pg_ctl``."""
+    candidates = [os.getenv("PG_BIN")]
+    try:
+        candidates.append(subprocess.run(["pg_config", "--bindir"], capture_output=True,
+                                         text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    initdb = shutil.which("initdb")
+    if initdb:
+        candidates.append(os.path.dirname(initdb))
+    for bindir in filter(None, candidates):
+        if os.path.exists(os.path.join(bindir, "initdb")) and os.path.exists(os.path.join(bindir, "pg_ctl")):
+            return bindir
+    raise PostgresUnavailable("initdb/pg_ctl not found; set PG_BIN or put them on PATH")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def temporary_postgres(dbname="gradcafe_bench"):
+    """Yield a conninfo for database ``dbname`` on a fresh private cluster."""
+    if hasattr(os, "geteuid") and os.geteuid() == 0:
+        raise PostgresUnavailable("PostgreSQL cannot run as root; run the benchmark as a normal user")
+    bindir = find_bindir()
+    root = tempfile.mkdtemp(prefix="gradcafe-pg-")
+    data = os.path.join(root, "data")
+    port = _free_port()
+    pg_ctl = os.path.join(bindir, "pg_ctl")
+
+    def run(*cmd):
+        subprocess.run(cmd, check=True, capture_output=True, text=True)
+
+    started = False
+    try:
+        run(os.path.join(bindir, "initdb"), "-D", data, "-A", "trust", "-U", "postgres",
+            "--no-sync", "-E", "UTF8")
+        run(pg_ctl, "-D", data, "-l", os.path.join(root, "server.log"), "-w", "-o",
+            f"-p {port} -k {root} -c listen_addresses='' -c fsync=off", "start")
+        started = True
+        run(os.path.join(bindir, "createdb"), "-h", root, "-p", str(port), "-U", "postgres", dbname)
+        yield f"dbname={dbname} user=postgres host={root} port={port}"
+    finally:
+        if started:
+            subprocess.run([pg_ctl, "-D", data, "-m", "immediate", "-w", "stop"],
+                           capture_output=True, check=False)
+        shutil.rmtree(root, ignore_errors=True)
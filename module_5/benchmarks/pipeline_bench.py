@@ -0,0 +1,255 @@
+"""
+benchmarks/pipeline_bench.py – Per-stage pipeline throughput on synthetic data.
+
+Times each stage of the pipeline separately on data from ``synth.py``:
+
+- ``parse_html``    – ``scrape._parse_rows_from_html`` over generated survey pages
+- ``clean_record``  – ``clean.clean_record`` over raw scraped records
+- ``load_data``     – ``load_data.main`` loading the LLM-extended JSONL into an
+  empty ``applicants`` table
+- ``fetch_metrics`` – ``app.fetch_metrics`` over the loaded table
+
+Only the stage itself is inside the timer; generating its input is not.
+Each stage runs ``--warmup`` untimed and ``--repeats`` timed rounds, and the
+results (min/median/mean/stdev seconds and rows/sec at the median) are
+written as JSON together with the git commit, so runs can be compared
+between commits::
+
+    python benchmarks/pipeline_bench.py --scale 1k
+    python benchmarks/pipeline_bench.py --scale 100k --database-url "dbname=gradcafe_bench"
+
+``load_data`` and ``fetch_metrics`` empty ``applicants``, so they only run
+against a database named explicitly with ``--database-url``. A ``duckdb:``
+URL runs them on the embedded DuckDB backend instead of PostgreSQL::
+
+    python benchmarks/pipeline_bench.py --scale 1m --stages load_data,fetch_metrics \
+        --database-url "duckdb:///tmp/gradcafe-bench.duckdb"
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+MODULE_DIR = os.path.dirname(BENCH_DIR)
+MODULE2_DIR = os.path.join(os.path.dirname(MODULE_DIR), "module_2")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+sys.path.insert(0, os.path.join(MODULE_DIR, "src"))
+sys.path.insert(0, BENCH_DIR)
+
+import synth  # noqa: E402
+
+STAGES = ("parse_html", "clean_record", "load_data", "fetch_metrics")
+DB_STAGES = ("load_data", "fetch_metrics")
+SCHEMA_VERSION = 1
+
+
+def _module2():
+    if MODULE2_DIR not in sys.path:
+        sys.path.insert(0, MODULE2_DIR)
+    import clean
+    import scrape
+    return scrape, clean
+
+
+def time_parse_html(gen, n):
+    """Seconds spent in ``_parse_rows_from_html`` for ``n`` rows of pages; rows parsed."""
+    scrape, _ = _module2()
+    seconds, rows = 0.0, 0
+    for page_html, page_url, page in gen.html_pages(n):
+        start = time.perf_counter()
+        rows += len(scrape._parse_rows_from_html(page_html, page_url, page))
+        seconds += time.perf_counter() - start
+    return seconds, rows
+
+
+def time_clean_record(gen, n):
+    """Seconds spent in ``clean_record`` for ``n`` raw records; rows cleaned."""
+    _, clean = _module2()
+    records = gen.raw_records(n)
+    clean_record = clean.clean_record
+    seconds, rows = 0.0, 0
+    while True:
+        chunk = [r for _, r in zip(range(10_000), records)]
+        if not chunk:
+            return seconds, rows
+        start = time.perf_counter()
+        for r in chunk:
+            clean_record(r)
+        seconds += time.perf_counter() - start
+        rows += len(chunk)
+
+
+def _execute(app, query):
+    """Run ``query`` on the benchmark database (PostgreSQL or DuckDB); first row or None."""
+    import load_data
+    duck = load_data.duckdb_url(app)
+    if duck:
+        import duckdb_backend
+        with duckdb_backend.connect(duck) as con:
+            return con.execute(query).fetchone()
+    with load_data.get_conn(app) as conn:
+        cur = conn.execute(query)
+        return cur.fetchone() if cur.description else None
+
+
+def _truncate(app):
+    import load_data
+    if load_data.duckdb_url(app):
+        _execute(app, "TRUNCATE applicants;")
+    elif load_data.normalized_layout(app):
+        import dimensions
+        _execute(app, dimensions.TRUNCATE_SQL)
+    else:
+        _execute(app, "TRUNCATE TABLE applicants RESTART IDENTITY;")
+
+
+def time_load_data(app, jsonl_path):
+    """Seconds for ``load_data.main`` into an emptied table; rows inserted."""
+    import load_data
+    _truncate(app)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_data.main(app=app, jsonl_path=jsonl_path)
+    seconds = time.perf_counter() - start
+    rows = _execute(app, "SELECT COUNT(*) FROM applicants;")[0]
+    return seconds, rows
+
+
+def time_fetch_metrics(app, rows):
+    """Seconds for one ``fetch_metrics`` call over ``rows`` loaded rows."""
+    import app as app_module
+    start = time.perf_counter()
+    app_module.fetch_metrics(app)
+    return time.perf_counter() - start, rows
+
+
+def summarize(samples, rows):
+    """Statistics for one stage's timed rounds."""
+    median = statistics.median(samples)
+    return {
+        "samples": [round(s, 6) for s in samples],
+        "min": round(min(samples), 6),
+        "median": round(median, 6),
+        "mean": round(statistics.fmean(samples), 6),
+        "stdev": round(statistics.stdev(samples), 6) if len(samples) > 1 else 0.0,
+        "rows": rows,
+        "rows_per_sec": round(rows / median, 1) if median else None,
+    }
+
+
+def git_commit():
+    """``(sha, dirty)`` of the checkout, or ``(None, None)`` outside git."""
+    try:
+        sha = subprocess.run(["git", "rev-parse", "HEAD"], cwd=MODULE_DIR, capture_output=True,
+                             text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--", "src"], cwd=MODULE_DIR,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return sha, dirty
+
+
+def run(n, stages=STAGES, repeats=5, warmup=1, seed=0, database_url=None, log=print,
+        layout="wide"):
+    """Benchmark ``stages`` on ``n`` synthetic rows; return the result document."""
+    gen = synth.Generator(synth.Templates.from_jsonl(), seed)
+    sha, dirty = git_commit()
+    result = {
+        "schema": SCHEMA_VERSION,
+        "commit": sha, "dirty": dirty,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "rows": n, "seed": seed, "repeats": repeats, "warmup": warmup,
+        "python": platform.python_version(), "machine": platform.platform(),
+        "cpus": os.cpu_count(),
+        "backend": "duckdb" if (database_url or "").startswith("duckdb:") else "postgres",
+        "layout": layout,
+        "stages": {},
+    }
+    app = None
+    if database_url and any(s in DB_STAGES for s in stages):
+        import load_data
+        from app import create_app
+        app = create_app({"DATABASE_URL": database_url, "JOBS_INLINE": False,
+                          "METRICS_CACHE": False, "APPLICANTS_LAYOUT": layout})
+        load_data.ensure_table(app)
+
+    with tempfile.TemporaryDirectory(prefix="gradcafe-bench-") as tmp:
+        jsonl = None
+        loaded_rows = None
+        for stage in stages:
+            if stage in DB_STAGES and app is None:
+                log(f"skip {stage}: pass --database-url to run database stages")
+                continue
+            if stage in DB_STAGES and jsonl is None:
+                jsonl = os.path.join(tmp, "llm.jsonl")
+                synth.write_jsonl(jsonl, gen.llm_records(n))
+            if stage == "fetch_metrics" and loaded_rows is None:
+                _, loaded_rows = time_load_data(app, jsonl)
+            measure = {
+                "parse_html": lambda: time_parse_html(gen, n),
+                "clean_record": lambda: time_clean_record(gen, n),
+                "load_data": lambda: time_load_data(app, jsonl),
+                "fetch_metrics": lambda: time_fetch_metrics(app, loaded_rows),
+            }[stage]
+            for _ in range(warmup):
+                measure()
+            samples, rows = [], 0
+            for _ in range(repeats):
+                seconds, rows = measure()
+                samples.append(seconds)
+            if stage == "load_data":
+                loaded_rows = rows
+            result["stages"][stage] = summarize(samples, rows)
+            log(f"{stage:>14}: median {result['stages'][stage]['median']:.4f}s "
+                f"({result['stages'][stage]['rows_per_sec']} rows/s)")
+    return result
+
+
+def default_output(result, scale):
+    """``benchmarks/results/<short sha>-<scale>.json``."""
+    sha = (result["commit"] or "nogit")[:10] + ("-dirty" if result["dirty"] else "")
+    return os.path.join(RESULTS_DIR, f"{sha}-{scale}.json")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-stage pipeline benchmark on synthetic data.")
+    parser.add_argument("--scale", default="1k", help="1k, 100k, 1m or a row count")
+    parser.add_argument("--stages", default=",".join(STAGES),
+                        help=f"comma-separated subset of {', '.join(STAGES)}")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", help="scratch database for load_data/fetch_metrics "
+                                               "(its applicants table is truncated)")
+    parser.add_argument("--layout", choices=("wide", "normalized", "partitioned"), default="wide",
+                        help="applicants storage layout for the database stages (PostgreSQL)")
+    parser.add_argument("--out", help="result JSON path (default: benchmarks/results/<sha>-<scale>.json)")
+    args = parser.parse_args(argv)
+
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+    result = run(synth.parse_scale(args.scale), stages, args.repeats, args.warmup,
+                 args.seed, args.database_url, log=lambda msg: print(msg, file=sys.stderr),
+                 layout=args.layout)
+    result["scale"] = args.scale
+    out = args.out or default_output(result, args.scale)
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(out)
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+benchmarks/record_memory.py – Memory held per record by each representation.
+
+Builds ``n`` synthetic records into each in-memory form the pipeline can
+buffer them in and reports the bytes still allocated per record (measured
+with ``tracemalloc``, values included), projected to 1M records:
+
+- ``clean_dicts``       – ``clean.clean_record`` output, one dict per record
+- ``clean_columns``     – the same records in a ``records.RecordColumns``
+- ``llm_dicts``         – LLM-extended JSONL records, one dict per record
+- ``applicant_tuples``  – ``load_data.normalize_record`` → ``records.Applicant``
+- ``applicant_batch``   – the same rows in a ``records.ApplicantBatch``
+
+::
+
+    python benchmarks/record_memory.py --scale 1m
+"""
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+
+import pipeline_bench  # noqa: F401  (puts src/ and module_2 on sys.path)
+import synth
+
+import load_data
+from records import ApplicantBatch, RecordColumns
+
+FORMS = ("clean_dicts", "clean_columns", "llm_dicts", "applicant_tuples", "applicant_batch")
+
+
+def _builders(gen, n):
+    _, clean = pipeline_bench._module2()
+    return {
+        "clean_dicts": lambda: [clean.clean_record(r) for r in gen.raw_records(n)],
+        "clean_columns": lambda: RecordColumns(clean.clean_record(r) for r in gen.raw_records(n)),
+        "llm_dicts": lambda: list(gen.llm_records(n)),
+        "applicant_tuples": lambda: [load_data.normalize_record(r) for r in gen.llm_records(n)],
+        "applicant_batch": lambda: ApplicantBatch(load_data.normalize_record(r) for r in gen.llm_records(n)),
+    }
+
+
+def measure(build) -> int:
+    """Bytes still allocated once ``build()`` returns, while its result is alive."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        held = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del held
+    return size
+
+
+def run(n: int, forms=FORMS, seed: int = 0):
+    """``{form: {"bytes": ..., "bytes_per_record": ..., "mb_per_1m": ...}}`` for ``n`` records."""
+    builders = _builders(synth.Generator(synth.Templates.from_jsonl(), seed=seed), n)
+    out = {}
+    for form in forms:
+        size = measure(builders[form])
+        out[form] = {"bytes": size, "bytes_per_record": round(size / n, 1),
+                     "mb_per_1m": round(size / n * 1_000_000 / 2**20, 1)}
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory per record of each in-memory representation.")
+    parser.add_argument("--scale", default="100k", help="1k, 100k, 1m or a row count")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    args = parser.parse_args(argv)
+
+    result = run(synth.parse_scale(args.scale), seed=args.seed)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{'form':<18} {'bytes/record':>12} {'MB per 1M':>10}")
+        for form, r in result.items():
+            print(f"{form:<18} {r['bytes_per_record']:>12} {r['mb_per_1m']:>10}")
+    sys.stdout.flush()
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+benchmarks/synth.py – Synthetic GradCafe data at benchmark scale.
+
+Learns value pools from ``module_2/part1.json.jsonl`` (universities,
+program/degree pairs, decisions, dates, the term/nationality/GRE/GPA badge
+strings and free-text notes) and samples them with a seeded RNG into the
+three shapes the pipeline consumes:
+
+- survey result pages in the GradCafe table layout (``_parse_rows_from_html``),
+- raw scraped records (``clean.clean_record``),
+- LLM-extended JSONL records (``load_data.main``).
+
+Every table row (an applicant's main row, its badge row, and sometimes a
+notes row) becomes one record, as in the real scrape, and the scale counts
+those records. Output is generated lazily, so 1M rows never sit in memory::
+
+    python benchmarks/synth.py --scale 100k --out /tmp/gradcafe-100k
+"""
+import argparse
+import html
+import json
+import os
+import random
+import re
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Tuple
+
+MODULE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE_SOURCE = os.path.join(os.path.dirname(MODULE_DIR), "module_2", "part1.json.jsonl")
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+ROWS_PER_PAGE = 100
+BASE_URL = "https://www.thegradcafe.com"
+SURVEY_URL = BASE_URL + "/survey/index.php?page={page}&pp=100&sort=newest"
+FIRST_RESULT_ID = 2_000_000
+
+DEGREES = ("PhD", "Masters", "MFA", "PsyD", "EdD", "MBA", "JD", "MD", "Other")
+_BADGE = re.compile(r"(?:Fall|Spring|Summer|Winter) \d{4}|American|International"
+                    r"|GRE (?:V |AW )?[\d.]+|GPA [\d.]+")
+_TERM = re.compile(r"(?:Fall|Spring|Summer|Winter) \d{4}")
+_NATIONALITY = re.compile(r"American|International")
+
+
+def parse_scale(value: str) -> int:
+    """``1k``/``100k``/``1m`` or a plain row count."""
+    return SCALES.get(value.lower()) or int(value)
+
+
+class Templates:
+    """Empirical value pools (with their observed frequencies) from a scrape."""
+
+    def __init__(self, universities, programs, decisions, dates, badges, notes, notes_rate):
+        self.universities: List[str] = universities
+        self.programs: List[Tuple[str, str]] = programs
+        self.decisions: List[str] = decisions
+        self.dates: List[str] = dates
+        self.badges: List[str] = badges
+        self.notes: List[str] = notes
+        self.notes_rate: float = notes_rate
+
+    @classmethod
+    def from_jsonl(cls, path: str = TEMPLATE_SOURCE) -> "Templates":
+        """
+        Learn pools from LLM-extended scrape output, where each applicant is a
+        row with ``date_added`` followed by its badge row and optional notes.
+        """
+        universities, programs, decisions, dates, badges, notes = [], [], [], [], [], []
+        last_decision = None
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                r = json.loads(line)
+                if r.get("date_added"):
+                    universities.append(r["program"])
+                    words = (r.get("status") or "").rsplit(" ", 1)
+                    if len(words) == 2 and words[1] in DEGREES:
+                        programs.append((words[0], words[1]))
+                    last_decision = r.get("comments") or None
+                    if last_decision:
+                        decisions.append(last_decision)
+                    dates.append(r["date_added"])
+                elif last_decision and r["program"].startswith(last_decision):
+                    badges.append(r["program"][len(last_decision):].strip())
+                    last_decision = None
+                elif r.get("program"):
+                    notes.append(r["program"])
+        return cls(universities, programs, decisions, dates, badges, notes,
+                   notes_rate=len(notes) / max(len(universities), 1))
+
+    def summary(self) -> Dict[str, Any]:
+        """Pool sizes and the most common decisions/degrees, for sanity checks."""
+        return {
+            "universities": len(set(self.universities)),
+            "programs": len(set(self.programs)),
+            "badges": len(self.badges),
+            "notes": len(self.notes),
+            "notes_rate": round(self.notes_rate, 3),
+            "decisions": Counter(d.split(" on ")[0] for d in self.decisions).most_common(4),
+            "degrees": Counter(d for _, d in self.programs).most_common(4),
+        }
+
+
+class Generator:
+    """Seeded sampler of table rows; renderers turn rows into each input format."""
+
+    def __init__(self, templates: Templates, seed: int = 0):
+        self.t = templates
+        self.seed = seed
+
+    def rows(self, n: int) -> Iterator[Dict[str, Any]]:
+        """Yield ``n`` table rows (``kind`` = main / badges / notes)."""
+        rng = random.Random(self.seed)
+        t = self.t
+        emitted = 0
+        applicant = 0
+        while emitted < n:
+            program, degree = rng.choice(t.programs)
+            base = {
+                "applicant": applicant,
+                "result_id": FIRST_RESULT_ID + applicant,
+                "university": rng.choice(t.universities),
+                "program": program,
+                "degree": degree,
+                "date": rng.choice(t.dates),
+                "decision": rng.choice(t.decisions),
+            }
+            group = [dict(base, kind="main"), dict(base, kind="badges", badges=rng.choice(t.badges))]
+            if rng.random() < t.notes_rate:
+                group.append(dict(base, kind="notes", note=rng.choice(t.notes)))
+            for row in group:
+                if emitted == n:
+                    return
+                row["row"] = emitted
+                emitted += 1
+                yield row
+            applicant += 1
+
+    # -- renderers -----------------------------------------------------------
+
+    @staticmethod
+    def page_of(row: Dict[str, Any]) -> int:
+        """1-based survey page a row lands on."""
+        return row["row"] // ROWS_PER_PAGE + 1
+
+    @staticmethod
+    def _row_url(row: Dict[str, Any]) -> str:
+        if row["kind"] == "main":
+            return f"{BASE_URL}/result/{row['result_id']}"
+        page = Generator.page_of(row)
+        return f"{SURVEY_URL.format(page=page)}#row-{page}-{row['row'] % ROWS_PER_PAGE + 1}"
+
+    @staticmethod
+    def _first_cell_text(row: Dict[str, Any]) -> str:
+        if row["kind"] == "badges":
+            return f"{row['decision']} {row['badges']}".strip()
+        return row["note"]
+
+    def raw_records(self, n: int) -> Iterator[Dict[str, Any]]:
+        """Records as ``scrape._parse_rows_from_html`` returns them."""
+        for row in self.rows(n):
+            if row["kind"] == "main":
+                yield {"source_url": self._row_url(row),
+                       "program_university_raw": f"{row['program']} {row['degree']}, {row['university']}",
+                       "status_raw": row["decision"], "date_added_raw": row["date"],
+                       "comments_raw": None}
+            else:
+                yield {"source_url": self._row_url(row),
+                       "program_university_raw": self._first_cell_text(row),
+                       "status_raw": None, "date_added_raw": None, "comments_raw": None}
+
+    def llm_records(self, n: int) -> Iterator[Dict[str, Any]]:
+        """Records in the ``llm_extend_applicant_data.json`` JSONL shape."""
+        for row in self.rows(n):
+            if row["kind"] == "main":
+                yield {"program": f"{row['program']} {row['degree']}, {row['university']}",
+                       "comments": None, "date_added": row["date"], "url": self._row_url(row),
+                       "status": row["decision"], "term": "", "US/International": "",
+                       "Degree": row["degree"],
+                       "llm-generated-program": f"{row['program']} {row['degree'].capitalize()}",
+                       "llm-generated-university": row["university"]}
+                continue
+            text = self._first_cell_text(row)
+            term = _TERM.search(text) if row["kind"] == "badges" else None
+            nationality = _NATIONALITY.search(text) if row["kind"] == "badges" else None
+            yield {"program": text, "comments": None, "date_added": None,
+                   "url": self._row_url(row),
+                   "status": row["decision"].split(" on ")[0] if row["kind"] == "badges" else "",
+                   "term": term.group(0) if term else "",
+                   "US/International": nationality.group(0) if nationality else "",
+                   "Degree": "", "llm-generated-program": text.title()[:70],
+                   "llm-generated-university": row["university"]}
+
+    def html_pages(self, n: int) -> Iterator[Tuple[str, str, int]]:
+        """Yield ``(html, page_url, page_num)`` survey pages holding ``n`` rows in total."""
+        page_rows: List[str] = []
+        page = 1
+        for row in self.rows(n):
+            if self.page_of(row) != page:
+                yield _page_html(page_rows), SURVEY_URL.format(page=page), page
+                page_rows, page = [], self.page_of(row)
+            page_rows.append(_row_html(row))
+        if page_rows:
+            yield _page_html(page_rows), SURVEY_URL.format(page=page), page
+
+
+_HEADER = (
+    '<tr class=""><th scope="col">School</th><th scope="col">Program</th>'
+    '<th scope="col">Added On</th><th scope="col">Decision</th>'
+    '<th scope="col"><div class="tw-relative tw-text-right"><button id="sort-button">Sort</button>'
+    '</div></th></tr>'
+)
+
+
+def _page_html(rows: List[str]) -> str:
+    return ('<!DOCTYPE html><html><body><div class="tw-overflow-x-auto"><table>'
+            f'<thead>{_HEADER}</thead><tbody>{"".join(rows)}</tbody></table></div></body></html>')
+
+
+def _row_html(row: Dict[str, Any]) -> str:
+    esc = html.escape
+    if row["kind"] == "main":
+        return (
+            '<tr><td class="tw-py-5 tw-pr-3 tw-text-sm tw-pl-0"><div class="tw-flex tw-items-center">'
+            f'<div class="tw-font-medium tw-text-gray-900 tw-text-sm">{esc(row["university"])}</div></div></td>'
+            f'<td class="tw-px-3 tw-py-5 tw-text-sm"><div class="tw-text-gray-900"><span>{esc(row["program"])}</span>'
+            '<svg class="tw-h-0.5 tw-w-0.5" viewbox="0 0 2 2"><circle cx="1" cy="1" r="1"></circle></svg>'
+            f'<span class="tw-text-gray-500">{esc(row["degree"])}</span></div></td>'
+            f'<td class="tw-px-3 tw-py-5 tw-text-sm tw-whitespace-nowrap">{esc(row["date"])}</td>'
+            '<td class="tw-px-3 tw-py-5 tw-text-sm tw-whitespace-nowrap"><div class="tw-inline-flex '
+            f'tw-rounded-md tw-px-2 tw-py-1">{esc(row["decision"])}</div></td>'
+            '<td class="tw-relative tw-py-5 tw-pl-3 tw-pr-0"><div class="tw-flex tw-gap-x-2.5 tw-justify-end">'
+            f'<a href="/result/{row["result_id"]}"><span class="tw-sr-only">Total comments</span></a>'
+            '</div></td></tr>'
+        )
+    if row["kind"] == "badges":
+        badges = [row["decision"]] + _BADGE.findall(row["badges"])
+        cells = "".join(f'<div class="tw-inline-flex tw-rounded-md tw-px-2 tw-py-1 tw-text-xs">{esc(b)}</div>'
+                        for b in badges)
+    else:
+        cells = f'<p class="tw-text-gray-500 tw-text-sm">{esc(row["note"])}</p>'
+    return (f'<tr class="tw-border-none"><td class="tw-pt-2 tw-pb-5 tw-pr-4 tw-pl-0" colspan="3">'
+            f'<div class="tw-gap-2 tw-flex tw-flex-wrap">{cells}</div></td></tr>')
+
+
+def write_dataset(out_dir: str, n: int, seed: int = 0, templates: Templates = None) -> Dict[str, Any]:
+    """Write ``pages/``, ``raw.json`` and ``llm.jsonl`` for ``n`` rows into ``out_dir``."""
+    gen = Generator(templates or Templates.from_jsonl(), seed)
+    pages_dir = os.path.join(out_dir, "pages")
+    os.makedirs(pages_dir, exist_ok=True)
+    pages = 0
+    for page_html, _, page in gen.html_pages(n):
+        with open(os.path.join(pages_dir, f"page-{page:05d}.html"), "w", encoding="utf-8") as f:
+            f.write(page_html)
+        pages += 1
+    with open(os.path.join(out_dir, "raw.json"), "w", encoding="utf-8") as f:
+        f.write('{"source": "synthetic", "records": [')
+        for i, rec in enumerate(gen.raw_records(n)):
+            f.write(("," if i else "") + json.dumps(rec))
+        f.write("]}")
+    jsonl = os.path.join(out_dir, "llm.jsonl")
+    write_jsonl(jsonl, gen.llm_records(n))
+    return {"rows": n, "pages": pages, "seed": seed, "out": out_dir}
+
+
+def write_jsonl(path: str, records) -> None:
+    """Stream ``records`` to ``path`` one JSON object per line."""
+    with open(path, "w", encoding="utf-8") as f:
+        for rec in records:
+            f.write(json.dumps(rec) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", 1)[0])
+    parser.add_argument("--scale", default="1k", help="1k, 100k, 1m or a row count")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--templates", default=TEMPLATE_SOURCE)
+    parser.add_argument("--out", required=True, help="output directory")
+    args = parser.parse_args(argv)
+    templates = Templates.from_jsonl(args.templates)
+    print(json.dumps(templates.summary()))
+    print(json.dumps(write_dataset(args.out, parse_scale(args.scale), args.seed, templates)))
+
+
+if __name__ == "__main__":
+    main()
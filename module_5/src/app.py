@@ -1,16 +1,28 @@
 """Flask application for GradCafe Analytics (Module 5)."""
+import gzip
+import json
 import os
 import threading
-import subprocess
+import time
 import psycopg
-from flask import Flask, render_template, jsonify
-from psycopg import sql
+from flask import Flask, Response, render_template, jsonify, request, stream_with_context
+from markupsafe import Markup
 
-_LOCK = threading.Lock()
-_PULL_RUNNING: bool = False
-_PULL_MESSAGE: str = "No load has been run yet."
-_LAST_ANALYSIS: str = ""
-FALL_2026 = "Fall 2026"
+import changes
+import jobs
+import load_data
+import pipeline
+import profiling
+import query_api
+import snapshot
+import stats
+from db_utils import clamp_limit
+from metric_queries import METRIC_QUERIES, default_metrics, metric_value
+
+DEFAULT_DASHBOARD_STATE = {
+    "pull_running": False, "pull_message": "No load has been run yet.",
+    "pull_job_id": None, "last_analysis": None,
+}
 
 def _build_conninfo(database_url=None):
     """Return psycopg3-compatible connection string."""
@@ -25,109 +37,23 @@ def _build_conninfo(database_url=None):
 
 def get_conn(app=None):
     """Open and return a psycopg3 connection."""
-    return psycopg.connect(_build_conninfo(
-        app.config.get("DATABASE_URL") if app else None))
+    return profiling.connect(_build_conninfo(
+        app.config.get("DATABASE_URL") if app else None), app)
 
 def fetch_metrics(app=None):
-    """Fetch analytics metrics from the database."""
-    metrics = {
-        "fall_2026": 0, "pct_intl": None, "avg_gpa": None, "avg_gre": None,
-        "avg_gre_v": None, "avg_gre_aw": None, "avg_gpa_american_fall": None,
-        "acceptance_pct": None, "avg_gpa_accepted": None,
-        "q7": 0, "q8": 0, "q9": 0,
-        "q10a_title": "Top 5 terms by volume", "q10a_rows": [],
-        "q10b_title": "Top 5 universities in Fall 2026", "q10b_rows": [],
-        "term_dist": [], "decision_dist": [],
-    }
+    """Fetch analytics metrics from the database (PostgreSQL or a ``duckdb:`` file)."""
+    metrics = default_metrics()
     try:
+        duck = load_data.duckdb_url(app)
+        if duck:
+            import duckdb_backend
+            return duckdb_backend.fetch_metrics(duck)
         conn = get_conn(app)
         try:
             with conn.cursor() as cur:
-                cur.execute("SELECT COUNT(*) FROM applicants WHERE term = %s LIMIT 1;", (FALL_2026,))
-                metrics["fall_2026"] = cur.fetchone()[0] or 0
-                cur.execute("""
-                    SELECT ROUND(
-                        100.0 * SUM(CASE WHEN us_or_international ILIKE 'International%%' THEN 1 ELSE 0 END)
-                        / NULLIF(SUM(CASE WHEN us_or_international IS NOT NULL
-                                              AND us_or_international <> '' THEN 1 ELSE 0 END), 0), 2)
-                    FROM applicants;
-                """)
-                for col, key in [("gpa","avg_gpa"),("gre","avg_gre"),("gre_v","avg_gre_v"),("gre_aw","avg_gre_aw")]:
-                    query = sql.SQL(
-                        "SELECT ROUND(AVG({col})::numeric, 3) FROM applicants WHERE {col} IS NOT NULL"
-                    ).format(col=sql.Identifier(col))
-                    cur.execute(query)
-                    metrics[key] = cur.fetchone()[0]
-                    metrics[key] = cur.fetchone()[0]
-                cur.execute("""
-                    SELECT ROUND(AVG(gpa)::numeric, 3) FROM applicants
-                    WHERE term = %s AND us_or_international ILIKE 'American%%' AND gpa IS NOT NULL;
-                """, (FALL_2026,))
-                metrics["avg_gpa_american_fall"] = cur.fetchone()[0]
-                cur.execute("""
-                    SELECT ROUND(
-                        100.0 * SUM(CASE WHEN status ILIKE 'Accepted%%' THEN 1 ELSE 0 END)
-                        / NULLIF(SUM(CASE WHEN status ILIKE 'Accepted%%' OR status ILIKE 'Rejected%%'
-                            OR status ILIKE 'Waitlisted%%' OR status ILIKE 'Interview%%'
-                            THEN 1 ELSE 0 END), 0), 2)
-                    FROM applicants WHERE term = %s;
-                """, (FALL_2026,))
-                metrics["acceptance_pct"] = cur.fetchone()[0]
-                cur.execute("""
-                    SELECT ROUND(AVG(gpa)::numeric, 3) FROM applicants
-                    WHERE term = %s AND status ILIKE 'Accepted%%' AND gpa IS NOT NULL;
-                """, (FALL_2026,))
-                metrics["avg_gpa_accepted"] = cur.fetchone()[0]
-                cur.execute("""
-                    SELECT COUNT(*) FROM applicants
-                    WHERE (program ILIKE '%%johns hopkins%%' OR program ILIKE '%%jhu%%'
-                        OR llm_generated_university ILIKE '%%johns hopkins%%')
-                    AND (program ILIKE '%%computer science%%' OR comments ILIKE '%%computer science%%'
-                        OR llm_generated_program ILIKE '%%computer science%%')
-                    AND (degree ILIKE 'Master%%' OR program ILIKE '%%master%%');
-                """)
-                metrics["q7"] = cur.fetchone()[0] or 0
-                cur.execute("""
-                    SELECT COUNT(*) FROM applicants
-                    WHERE status ILIKE 'Accepted%%'
-                    AND date_added >= DATE '2026-01-01' AND date_added < DATE '2027-01-01'
-                    AND (program ILIKE '%%computer science%%' OR comments ILIKE '%%computer science%%')
-                    AND (degree = 'PhD' OR program ILIKE '%%phd%%')
-                    AND (program ILIKE '%%mit%%' OR program ILIKE '%%stanford%%'
-                        OR program ILIKE '%%carnegie mellon%%' OR program ILIKE '%%georgetown%%');
-                """)
-                metrics["q8"] = cur.fetchone()[0] or 0
-                cur.execute("""
-                    SELECT COUNT(*) FROM applicants
-                    WHERE status ILIKE 'Accepted%%'
-                    AND date_added >= DATE '2026-01-01' AND date_added < DATE '2027-01-01'
-                    AND (llm_generated_program ILIKE '%%computer science%%' OR program ILIKE '%%computer science%%')
-                    AND (degree = 'PhD' OR program ILIKE '%%phd%%')
-                    AND (llm_generated_university ILIKE '%%mit%%' OR llm_generated_university ILIKE '%%stanford%%'
-                        OR llm_generated_university ILIKE '%%carnegie mellon%%'
-                        OR program ILIKE '%%mit%%' OR program ILIKE '%%stanford%%');
-                """)
-                metrics["q9"] = cur.fetchone()[0] or 0
-                cur.execute("""
-                    SELECT COALESCE(NULLIF(term,''), 'No term detected'), COUNT(*)::int
-                    FROM applicants GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 5;
-                """)
-                metrics["q10a_rows"] = cur.fetchall()
-                cur.execute("""
-                    SELECT COALESCE(NULLIF(llm_generated_university,''), 'Unknown'), COUNT(*)::int
-                    FROM applicants WHERE term = %s GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 5;
-                """, (FALL_2026,))
-                metrics["q10b_rows"] = cur.fetchall()
-                cur.execute("""
-                    SELECT COALESCE(NULLIF(term,''), 'No term detected'), COUNT(*)::int
-                    FROM applicants GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 10;
-                """)
-                metrics["term_dist"] = cur.fetchall()
-                cur.execute("""
-                    SELECT COALESCE(NULLIF(status,''), 'No status'), COUNT(*)::int
-                    FROM applicants GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 10;
-                """)
-                metrics["decision_dist"] = cur.fetchall()
+                for key, query, params, mode in METRIC_QUERIES:
+                    cur.execute(query, params)
+                    metrics[key] = metric_value(mode, cur.fetchall())
         finally:
             conn.close()
     except Exception:
@@ -135,8 +61,10 @@ def fetch_metrics(app=None):
     return metrics
 
 def _load_rows(app, rows):
+    """Insert already-structured rows; return the number actually inserted."""
     if not rows:
-        return
+        return 0
+    inserted = 0
     conn = get_conn(app)
     try:
         with conn.cursor() as cur:
@@ -152,89 +80,414 @@ def _load_rows(app, rows):
                               %(degree)s, %(llm_generated_program)s, %(llm_generated_university)s)
                     ON CONFLICT DO NOTHING;
                 """, row)
+                inserted += cur.rowcount
         conn.commit()
     finally:
         conn.close()
+    return inserted
+
+# Pipeline stage → progress counter shown on the dashboard / SSE stream.
+PIPELINE_COUNTERS = {
+    "scrape": "rows_scraped", "clean": "rows_cleaned",
+    "llm": "rows_standardized", "load": "rows_inserted",
+}
 
-def _pull_worker(app, module2_dir, module3_dir):
-    global _PULL_RUNNING, _PULL_MESSAGE
+def _pull_worker(app, ctx):
+    """Job runner for ``pull``: scrape → clean → LLM → load, streamed in-process."""
     scraper_fn = app.config.get("SCRAPER_FN")
-    try:
-        if scraper_fn is not None:
+    if scraper_fn is not None:
+        with ctx.stage("scrape"):
             rows = scraper_fn()
-            _load_rows(app, rows)
-        else:
-            def _run(cmd, cwd):
-                proc = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True)
-                return proc.returncode
-            if _run(["python", "scrape.py"], module2_dir) != 0:  # pragma: no cover
-                raise RuntimeError("scrape.py failed")  # pragma: no cover
-            if _run(["python", "clean.py"], module2_dir) != 0:  # pragma: no cover
-                raise RuntimeError("clean.py failed")  # pragma: no cover
-            if _run(["python", "load_data.py"], module3_dir) != 0:  # pragma: no cover
-                raise RuntimeError("load_data.py failed")  # pragma: no cover
-        msg = "Pull Data complete."
-    except Exception as exc:
-        msg = f"Pull Data failed: {exc}"
-    finally:
-        with _LOCK:
-            _PULL_RUNNING = False
-            _PULL_MESSAGE = msg
-
-def _analysis_worker(app):
-    global _LAST_ANALYSIS
-    import sys
-    src_dir = os.path.dirname(os.path.abspath(__file__))
-    if src_dir not in sys.path:
-        sys.path.insert(0, src_dir)  # pragma: no cover
-    from query_data import fetch_metrics as qd_fetch
-    m = qd_fetch(app)
-    with _LOCK:
-        _LAST_ANALYSIS = str(m)
+            ctx.progress(rows_scraped=len(rows))
+        with ctx.stage("load"):
+            ctx.progress(force=True, rows_inserted=_load_rows(app, rows))
+    else:
+        def on_item(stage, count):
+            ctx.progress(**{PIPELINE_COUNTERS[stage]: count})
 
-def create_app(config=None):
-    """Create and configure Flask application."""
-    app = Flask(__name__, template_folder="templates", static_folder="static")
+        def on_page(page, _total):
+            ctx.progress(force=True, pages_scraped=page)
+
+        with ctx.stage("pull"):
+            result = pipeline.run_pull(
+                app, app.config["MODULE2_DIR"],
+                max_records=app.config["PULL_MAX_RECORDS"],
+                use_llm=app.config["PULL_USE_LLM"],
+                options=pipeline.PullOptions(
+                    checkpoint_dir=app.config.get("PULL_CHECKPOINT_DIR"),
+                    checkpoint_format=app.config["PULL_CHECKPOINT_FORMAT"],
+                    on_item=on_item, on_page=on_page,
+                ),
+            )
+        ctx.timings.update(result["timings"])
+        ctx.progress(force=True, rows_read=result["rows_read"],
+                     rows_inserted=result["rows_inserted"])
+    return {"message": "Pull Data complete.", **ctx.counters}
+
+def _build_snapshot(app):
+    """Return ``(version, metrics, html)`` for the current data, html pre-rendered."""
+    version = _data_version(app)
+    metrics = jobs.to_jsonable(app.extensions.get("fetch_metrics", fetch_metrics)(app))
+    with app.app_context():
+        html = (render_template("_metrics.html", metrics=metrics)
+                + render_template("_stats.html", stats=stats_snapshot(app)[1]))
+    return version, metrics, html
+
+def _analysis_worker(app, _ctx=None):
+    """
+    Job runner for ``analysis``: recompute metrics, store them as the job result
+    and, with ``SNAPSHOT_DIR`` set, write the pre-rendered dashboard snapshot.
+    """
+    version, metrics, html = _build_snapshot(app)
+    if app.config.get("SNAPSHOT_DIR"):
+        snapshot.write_snapshot(app.config["SNAPSHOT_DIR"], version, metrics, html)
+    return {"message": "Analysis updated.", "data_version": version, **metrics}
+
+jobs.RUNNERS.update({"pull": _pull_worker, "analysis": _analysis_worker})
+jobs.SWEEPERS.append(changes.reap_stale)
+
+def _dispatch(app):
+    """Run queued jobs in a daemon thread unless an external worker owns the queue."""
+    if app.config.get("JOBS_INLINE", True):
+        threading.Thread(target=jobs.run_next, args=(app,), daemon=True).start()
+
+def dashboard_state(app):
+    """Busy flags and messages for the dashboard; the defaults if the jobs table is unreachable."""
+    try:
+        return jobs.dashboard_state(app)
+    except psycopg.Error:
+        return dict(DEFAULT_DASHBOARD_STATE)
+
+# Responses smaller than this are sent uncompressed.
+GZIP_MIN_BYTES = 500
+
+def _data_version(app):
+    """Current ``data_version`` counter, or None if it cannot be read."""
+    try:
+        return load_data.get_data_version(app)
+    except psycopg.Error:
+        return None
+
+def metrics_snapshot(app):
+    """
+    Return ``(version, metrics, encoded)`` for the current data version.
+
+    ``fetch_metrics`` only re-runs when the version changes; ``encoded`` caches
+    the JSON (and gzip) bodies for ``/api/metrics``. Set ``METRICS_CACHE`` to
+    False to re-query on every request (load tests). The version is read
+    before the metrics, so a concurrent load can only make the cache newer
+    than its label, never leave stale data under a current version.
+    """
+    version = _data_version(app)
+    cache = app.config["METRICS_CACHE"] and version is not None
+    cached = app.extensions.get("metrics_cache")
+    if cache and cached is not None and cached[0] == version:
+        return cached
+    fetch = app.extensions.get("fetch_metrics", fetch_metrics)
+    snap = (version, fetch(app), {})
+    if cache:
+        app.extensions["metrics_cache"] = snap
+    return snap
+
+def stats_snapshot(app):
+    """
+    Return ``(version, stats)`` for the current data version.
+
+    Same caching rules as :func:`metrics_snapshot`; ``stats.fetch_stats``
+    reads the table in one scan, so a new version costs one scan.
+    """
+    version = _data_version(app)
+    cache = app.config["METRICS_CACHE"] and version is not None
+    cached = app.extensions.get("stats_cache")
+    if cache and cached is not None and cached[0] == version:
+        return cached
+    fetch = app.extensions.get("fetch_stats", stats.fetch_stats)
+    snap = (version, fetch(app))
+    if cache:
+        app.extensions["stats_cache"] = snap
+    return snap
+
+def _metrics_body(snap, encoding):
+    """JSON body for ``/api/metrics`` (``encoding`` is ``"identity"`` or ``"gzip"``)."""
+    _, metrics, encoded = snap
+    if "identity" not in encoded:
+        encoded["identity"] = json.dumps(jobs.to_jsonable(metrics)).encode()
+    if encoding not in encoded:
+        encoded[encoding] = gzip.compress(encoded["identity"], compresslevel=6)
+    return encoded[encoding]
+
+def _snapshot_checks(app):
+    """
+    Return ``(state, version)`` for a ``/`` served from ``SNAPSHOT_DIR``.
+
+    Both are re-read at most every ``SNAPSHOT_CHECK_SECONDS``, so a snapshot
+    hit inside that window does no database work. The job endpoints drop
+    the cached pair, so a pull or analysis started here shows on the next view.
+    """
+    now = time.monotonic()
+    cached = app.extensions.get("snapshot_checks")
+    if cached is not None and now < cached[0]:
+        return cached[1], cached[2]
+    state, version = dashboard_state(app), _data_version(app)
+    app.extensions["snapshot_checks"] = (now + app.config["SNAPSHOT_CHECK_SECONDS"], state, version)
+    return state, version
+
+def current_snapshot(app):
+    """
+    Return ``(state, snap)``: the dashboard state and the snapshot to serve from ``SNAPSHOT_DIR``.
+
+    The first request builds it synchronously. After that a stale snapshot
+    (older ``data_version``) is still served while an ``analysis`` job
+    refreshes it in the background; no refresh is queued during a pull.
+    """
+    directory = app.config["SNAPSHOT_DIR"]
+    state, version = _snapshot_checks(app)
+    snap = snapshot.read_snapshot(directory)
+    if snap is None:
+        return state, snapshot.write_snapshot(directory, *_build_snapshot(app))
+    if not state["pull_running"] and version is not None and version != snap["version"]:
+        if jobs.enqueue(app, "analysis") is not None:
+            _dispatch(app)
+    return state, snap
+
+def _sse(event, data):
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(jobs.to_jsonable(data))}\n\n"
+
+def _pull_event_stream(app):
+    """
+    Yield SSE messages for the current pull: a ``snapshot`` of the latest pull
+    job, a ``progress`` message per job event, then ``done`` once it is final.
+    Events arrive via LISTEN/NOTIFY, so an open stream issues no queries.
+    """
+    with jobs.subscribe(app) as events:
+        state = jobs.dashboard_state(app)
+        job = jobs.get_job(app, state["pull_job_id"]) if state["pull_job_id"] else None
+        latest = jobs.event_payload(job) if job else {"kind": "pull", "status": None}
+        yield _sse("snapshot", latest)
+        if not state["pull_running"]:
+            yield _sse("done", latest)
+            return
+        for event in events(app.config["SSE_HEARTBEAT"]):
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            if event["kind"] != "pull":
+                continue
+            yield _sse("progress", event)
+            if event["status"] in jobs.FINAL_STATUSES:
+                yield _sse("done", event)
+                return
+
+def _query_response(app, build, cursor_name, page, headers=None):
+    """
+    Run an ad-hoc ``query_api`` query for the current request.
+
+    ``format=json`` returns ``page(rows, columns)`` for one clamped page;
+    ``ndjson``/``csv`` stream every matching row from a named server-side
+    cursor. Arguments outside the whitelist are a 400.
+    """
+    try:
+        fmt = query_api.parse_format(request.args)
+        query, params, columns = build(request.args, paged=fmt == "json")
+    except query_api.QueryError as exc:
+        return jsonify({"error": str(exc)}), 400
+    if fmt == "json":
+        return jsonify(page(query_api.fetch_page(app, query, params), columns)), 200
+    encode, mimetype = query_api.ENCODERS[fmt]
+    batches = query_api.stream_rows(app, query, params, name=cursor_name)
+    return Response(encode(columns, batches), mimetype=mimetype,
+                    headers={"X-Accel-Buffering": "no", **(headers or {})})
+
+def _configure(app, config=None):
+    """Fill ``app.config`` from the environment, then apply ``config`` overrides."""
     app.secret_key = os.getenv("FLASK_SECRET_KEY", "dev-secret")
     this_dir = os.path.dirname(os.path.abspath(__file__))
     repo_root = os.path.dirname(this_dir)
     app.config["MODULE2_DIR"] = os.path.join(os.path.dirname(repo_root), "module_2")
-    app.config["MODULE3_DIR"] = this_dir
+    app.config["PULL_MAX_RECORDS"] = int(os.getenv("PULL_MAX_RECORDS", "200"))
+    app.config["PULL_USE_LLM"] = os.getenv("PULL_USE_LLM", "1") == "1"
+    app.config["PULL_CHECKPOINT_DIR"] = os.getenv("PULL_CHECKPOINT_DIR") or None
+    app.config["PULL_CHECKPOINT_FORMAT"] = os.getenv("PULL_CHECKPOINT_FORMAT", "jsonl")
+    app.config["JOBS_INLINE"] = os.getenv("JOBS_INLINE", "1") == "1"
+    app.config["SSE_HEARTBEAT"] = float(os.getenv("SSE_HEARTBEAT", "15"))
+    app.config["METRICS_MAX_AGE"] = int(os.getenv("METRICS_MAX_AGE", "5"))
+    app.config["METRICS_CACHE"] = os.getenv("METRICS_CACHE", "1") == "1"
+    app.config["SNAPSHOT_DIR"] = os.getenv("SNAPSHOT_DIR") or None
+    app.config["SNAPSHOT_CHECK_SECONDS"] = float(os.getenv("SNAPSHOT_CHECK_SECONDS", "2"))
+    app.config["PROFILING"] = os.getenv("PROFILING", "0") == "1"
+    app.config["APPLICANTS_LAYOUT"] = os.getenv("APPLICANTS_LAYOUT", "wide")
     if config:
         app.config.update(config)
 
+def render_dashboard(state, metrics, stats_data=None, snap=None):
+    """Render ``index.html``, embedding the pre-rendered HTML of ``snap`` when given."""
+    if snap is not None:
+        metrics, metrics_html = snap["metrics"], Markup(snap["html"])
+    else:
+        metrics_html = None
+    return render_template("index.html", metrics=metrics, metrics_html=metrics_html,
+                           stats=stats_data,
+                           pull_running=state["pull_running"],
+                           pull_message=state["pull_message"],
+                           last_analysis=state["last_analysis"])
+
+def _index_page(app):
+    """Render the dashboard from the snapshot file or the cached metrics."""
+    if app.config["SNAPSHOT_DIR"]:
+        state, snap = current_snapshot(app)
+        return render_dashboard(state, None, snap=snap)
+    state = dashboard_state(app)
+    _, metrics, _ = metrics_snapshot(app)
+    _, stats_data = stats_snapshot(app)
+    return render_dashboard(state, metrics, stats_data)
+
+def _metrics_etags(version, gzip_ok):
+    """The ``/api/metrics`` ETags a client may hold for ``version``, identity first.
+
+    Each encoding is its own representation, so the gzip body has its own
+    ETag; a client that cannot take gzip can only hold the identity one.
+    """
+    if version is None:
+        return ()
+    return (f"metrics-{version}", f"metrics-{version}-gz") if gzip_ok else (f"metrics-{version}",)
+
+def _metrics_response(app):
+    """``/api/metrics``: cached JSON, gzipped when large enough, with an ETag per data version and encoding."""
+    gzip_ok = bool(request.accept_encodings["gzip"])
+    held = [tag for tag in _metrics_etags(_data_version(app), gzip_ok) if request.if_none_match.contains_weak(tag)]
+    if held:
+        resp = Response(status=304)
+        etag = held[-1]
+    else:
+        snap = metrics_snapshot(app)
+        # A load may have landed since the version check; label what we serve.
+        etags = _metrics_etags(snap[0], gzip_ok)
+        etag = etags[0] if etags else None
+        body = _metrics_body(snap, "identity")
+        resp = Response(body, mimetype="application/json")
+        if len(body) >= GZIP_MIN_BYTES and gzip_ok:
+            resp.set_data(_metrics_body(snap, "gzip"))
+            resp.headers["Content-Encoding"] = "gzip"
+            etag = etags[-1] if etags else None
+    if etag:
+        resp.set_etag(etag)
+    resp.vary.add("Accept-Encoding")
+    resp.cache_control.public = True
+    resp.cache_control.max_age = app.config["METRICS_MAX_AGE"]
+    resp.cache_control.must_revalidate = True
+    return resp
+
+def _stats_response(app):
+    """``/api/stats``: score distributions with an ETag per data version."""
+    version, result = stats_snapshot(app)
+    resp = jsonify({"data_version": version, **result})
+    if version is not None:
+        resp.set_etag(f"stats-{version}")
+    resp.cache_control.max_age = app.config["METRICS_MAX_AGE"]
+    return resp.make_conditional(request)
+
+def _keyset_page(rows, columns):
+    """One ``/api/applicants`` or ``/api/changes`` page and the ``after`` value for the next one."""
+    full = len(rows) == query_api.page_size(request.args)
+    return {"rows": query_api.to_records(columns, rows),
+            "next_after": rows[-1][0] if rows and full else None}
+
+def _aggregate_page(rows, columns):
+    """One ``/api/aggregate`` result with its column names."""
+    return {"columns": list(columns), "rows": query_api.to_records(columns, rows)}
+
+def _changes_response(app):
+    """``/api/changes``: rows of load runs after ``since``, up to the watermark."""
+    watermark = changes.watermark(app)
+    try:
+        since, until = query_api.change_window(request.args, watermark)
+    except query_api.QueryError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    def build(args, paged):
+        return query_api.changes_query(args, paged, watermark)
+
+    def page(rows, columns):
+        return {"since": since, "until": until, **_keyset_page(rows, columns)}
+    return _query_response(app, build, "changes_export", page,
+                           headers={"X-Changes-Since": str(since), "X-Changes-Until": str(until)})
+
+def create_app(config=None):
+    """Create and configure Flask application."""
+    app = Flask(__name__, template_folder="templates", static_folder="static")
+    _configure(app, config)
+    if app.config["PROFILING"]:
+        profiling.init_app(app)
+
     @app.get("/")
     def index():
-        with _LOCK:
-            pull_running  = _PULL_RUNNING
-            pull_message  = _PULL_MESSAGE
-            last_analysis = _LAST_ANALYSIS
-        metrics = fetch_metrics(app)
-        return render_template("index.html", metrics=metrics,
-                               pull_running=pull_running,
-                               pull_message=pull_message,
-                               last_analysis=last_analysis)
+        return _index_page(app)
+
+    @app.get("/api/metrics")
+    def api_metrics():
+        return _metrics_response(app)
+
+    @app.get("/api/stats")
+    def api_stats():
+        return _stats_response(app)
+
+    @app.get("/api/applicants")
+    def api_applicants():
+        return _query_response(app, query_api.applicants_query, "applicants_export", _keyset_page)
+
+    @app.get("/api/aggregate")
+    def api_aggregate():
+        return _query_response(app, query_api.aggregate_query, "aggregate_export", _aggregate_page)
+
+    @app.get("/api/changes")
+    def api_changes():
+        return _changes_response(app)
+
+    @app.get("/api/load-runs")
+    def api_load_runs():
+        limit = clamp_limit(request.args.get("limit", 20), 100)
+        return jsonify({"watermark": changes.watermark(app),
+                        "runs": jobs.to_jsonable(changes.list_runs(app, limit))}), 200
 
     @app.post("/pull-data")
     def pull_data():
-        global _PULL_RUNNING, _PULL_MESSAGE
-        with _LOCK:
-            if _PULL_RUNNING:
-                return jsonify({"busy": True}), 409
-            _PULL_RUNNING = True
-            _PULL_MESSAGE = "Pull Data started..."
-        threading.Thread(target=_pull_worker,
-                         args=(app, app.config["MODULE2_DIR"], app.config["MODULE3_DIR"]),
-                         daemon=True).start()
-        return jsonify({"ok": True}), 200
+        job_id = jobs.enqueue(app, "pull")
+        if job_id is None:
+            return jsonify({"busy": True}), 409
+        app.extensions.pop("snapshot_checks", None)
+        _dispatch(app)
+        return jsonify({"ok": True, "job_id": job_id}), 200
+
+    @app.get("/pull-data/events")
+    def pull_events():
+        return Response(stream_with_context(_pull_event_stream(app)),
+                        mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
     @app.post("/update-analysis")
     def update_analysis():
-        with _LOCK:
-            if _PULL_RUNNING:
-                return jsonify({"busy": True}), 409
-        threading.Thread(target=_analysis_worker, args=(app,), daemon=True).start()
-        return jsonify({"ok": True}), 200
+        if dashboard_state(app)["pull_running"]:
+            return jsonify({"busy": True}), 409
+        job_id = jobs.enqueue(app, "analysis")
+        if job_id is not None:
+            app.extensions.pop("snapshot_checks", None)
+            _dispatch(app)
+        return jsonify({"ok": True, "job_id": job_id}), 200
+
+    @app.get("/jobs/<int:job_id>")
+    def job_status(job_id):
+        job = jobs.get_job(app, job_id)
+        if job is None:
+            return jsonify({"error": "not found"}), 404
+        return jsonify(jobs.to_jsonable(job)), 200
+
+    @app.post("/jobs/<int:job_id>/cancel")
+    def job_cancel(job_id):
+        status = jobs.request_cancel(app, job_id)
+        if status is None:
+            return jsonify({"error": "not found"}), 404
+        return jsonify({"ok": True, "status": status}), 200
 
     return app
 
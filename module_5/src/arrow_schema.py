@@ -0,0 +1,65 @@
+"""
+arrow_schema.py – The ``applicants`` row layout as Arrow.
+
+Shared by the Parquet files in ``columnar`` and the DuckDB inserts in
+``duckdb_backend``:
+
+- :data:`APPLICANT_SCHEMA` has the columns and order of
+  ``load_data.INSERT_SQL`` / ``normalize_record()``; low-cardinality text
+  columns are dictionary-encoded.
+- :func:`applicant_batch` turns a :class:`records.ApplicantBatch` into an
+  Arrow record batch without building per-row Python objects.
+- :func:`iter_applicant_rows` reads the rows back from a Parquet file.
+"""
+
+from datetime import date
+from typing import Iterator
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from records import ApplicantBatch
+
+_TEXT = pa.string()
+_CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+# Same columns and order as load_data.INSERT_SQL / normalize_record().
+APPLICANT_SCHEMA = pa.schema([
+    ("program", _TEXT), ("comments", _TEXT), ("date_added", pa.date32()), ("url", _TEXT),
+    ("status", _CATEGORY), ("term", _CATEGORY), ("us_or_international", _CATEGORY),
+    ("gpa", pa.float64()), ("gre", pa.float64()), ("gre_v", pa.float64()), ("gre_aw", pa.float64()),
+    ("degree", _CATEGORY), ("llm_generated_program", _TEXT), ("llm_generated_university", _CATEGORY),
+])
+APPLICANT_COLUMNS = tuple(APPLICANT_SCHEMA.names)
+
+BATCH_SIZE = 50_000
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def applicant_batch(rows) -> pa.RecordBatch:
+    """Arrow batch from an :class:`records.ApplicantBatch` (or a list of row tuples)."""
+    batch = rows if isinstance(rows, ApplicantBatch) else ApplicantBatch(rows)
+    arrays = []
+    for field in APPLICANT_SCHEMA:
+        name = field.name
+        if name in batch.codes:
+            codes = np.frombuffer(batch.codes[name], dtype=np.int32)
+            indices = pa.array(codes, pa.int32(), mask=codes < 0)
+            arrays.append(pa.DictionaryArray.from_arrays(indices, pa.array(batch.labels[name], _TEXT)))
+        elif name in batch.numbers:
+            values = np.frombuffer(batch.numbers[name], dtype=np.float64)
+            arrays.append(pa.array(values, field.type, from_pandas=True))  # NaN → NULL
+        elif name == "date_added":
+            days = np.frombuffer(batch.dates, dtype=np.int32) - _EPOCH_ORDINAL
+            arrays.append(pa.array(days, pa.int32(), mask=days == -_EPOCH_ORDINAL).cast(field.type))
+        else:
+            arrays.append(pa.array(batch.text[name], field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=APPLICANT_SCHEMA)
+
+
+def iter_applicant_rows(path: str, batch_size: int = BATCH_SIZE) -> Iterator[tuple]:
+    """Yield ``INSERT_SQL`` parameter tuples from an applicants Parquet file."""
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=list(APPLICANT_COLUMNS)):
+        yield from zip(*(col.to_pylist() for col in batch.columns))
@@ -0,0 +1,109 @@
+"""
+async_app.py – Async serving variant of the dashboard.
+
+``create_async_app()`` builds the regular app from ``app.create_app`` but
+runs the independent ``METRIC_QUERIES`` concurrently with ``asyncio.gather``
+over a ``psycopg_pool.AsyncConnectionPool`` instead of one after another on
+a single connection, and serves ``/`` from an async view that overlaps the
+job-state lookup with the metrics fetch. With ``SNAPSHOT_DIR`` set it serves
+the same snapshot as the sync view (``app.current_snapshot``).
+
+Flask executes each async view in its own short-lived event loop, and an
+async pool is bound to the loop it was opened on, so the pool lives on one
+long-lived background loop (:class:`AsyncMetrics`); views hand their
+coroutines to it and only wait for the result. Run it like the sync app::
+
+    python src/async_app.py            # http://127.0.0.1:8000
+
+Requires ``flask[async]`` (asgiref) and ``psycopg-pool``.
+"""
+
+import asyncio
+import os
+import threading
+
+from psycopg_pool import AsyncConnectionPool
+
+import app as sync_app
+from db_utils import build_conninfo
+
+
+class AsyncMetrics:
+    """Background event loop owning an AsyncConnectionPool for metric queries."""
+
+    def __init__(self, conninfo, min_size=2, max_size=20):
+        self._conninfo = conninfo
+        self._min_size = min_size
+        self._max_size = max_size
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever,
+                                        name="async-metrics", daemon=True)
+        self._thread.start()
+        self._pool = self._submit(self._open_pool()).result()
+
+    async def _open_pool(self):
+        pool = AsyncConnectionPool(self._conninfo, min_size=self._min_size,
+                                   max_size=self._max_size, open=False)
+        await pool.open(wait=True)
+        return pool
+
+    def _submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def _query(self, query, params, mode):
+        async with self._pool.connection() as conn:
+            cur = await conn.execute(query, params)
+            return sync_app.metric_value(mode, await cur.fetchall())
+
+    async def _gather(self):
+        metrics = sync_app.default_metrics()
+        results = await asyncio.gather(
+            *(self._query(q, p, mode) for _, q, p, mode in sync_app.METRIC_QUERIES),
+            return_exceptions=True,
+        )
+        for (key, *_), value in zip(sync_app.METRIC_QUERIES, results):
+            if not isinstance(value, Exception):
+                metrics[key] = value
+        return metrics
+
+    def __call__(self, app=None):
+        """Blocking form with the ``fetch_metrics(app)`` signature."""
+        return self._submit(self._gather()).result()
+
+    def close(self):
+        """Close the pool and stop the background loop."""
+        self._submit(self._pool.close()).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+def create_async_app(config=None):
+    """Create the dashboard app with concurrent metric queries and async views."""
+    app = sync_app.create_app(config)
+    metrics = AsyncMetrics(
+        build_conninfo(app),
+        min_size=int(os.getenv("ASYNC_POOL_MIN", "2")),
+        max_size=int(os.getenv("ASYNC_POOL_MAX", "20")),
+    )
+    app.extensions["fetch_metrics"] = metrics
+    app.extensions["async_metrics"] = metrics
+
+    async def index():
+        if app.config["SNAPSHOT_DIR"]:
+            state, snap = await asyncio.to_thread(sync_app.current_snapshot, app)
+            return sync_app.render_dashboard(state, None, snap=snap)
+        state, (_, data, _), (_, stats) = await asyncio.gather(
+            asyncio.to_thread(sync_app.dashboard_state, app),
+            asyncio.to_thread(sync_app.metrics_snapshot, app),
+            asyncio.to_thread(sync_app.stats_snapshot, app),
+        )
+        return sync_app.render_dashboard(state, data, stats)
+
+    app.view_functions["index"] = index
+    return app
+
+
+if __name__ == "__main__":
+    flask_app = create_async_app()
+    flask_app.run(host="127.0.0.1", port=8000, debug=False, use_reloader=False)
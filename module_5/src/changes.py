@@ -0,0 +1,225 @@
+"""
+changes.py – Load runs and the change feed over ``applicants``.
+
+Every PostgreSQL ``load_data.insert_records`` (or ``upsert_records``) call
+is a *load run*. It gets a row in ``load_runs`` with the source, start and
+finish times, rows read, inserted and updated, and a status. Its id is
+stamped on each row the run inserts or refreshes, in
+``applicants.load_run_id``, next to ``loaded_at``. A consumer that keeps
+the last run it processed only reads what arrived after it::
+
+    until = changes.watermark(app)
+    for row in changes.iter_changes(app, since=last_run, until=until):
+        ...
+    last_run = until
+
+``GET /api/changes?since=<run>`` serves the same rows (JSON pages or
+``format=ndjson``), and ``GET /api/load-runs`` lists the runs.
+
+Run ids are allocated when a run starts, but runs can commit in any order.
+:func:`watermark` is therefore the highest id below every run that is still
+running, and the feed never returns rows above it. A consumer that saves
+``until`` cannot skip a slower run. A running load bumps its
+``updated_at`` between batches (:class:`Heartbeat`); a run without a bump
+for ``JOB_STALE_SECONDS`` is marked failed by the job sweep
+(:func:`reap_stale`, run by the worker and when a job is queued), and it
+can no longer commit. Reading the watermark or the feed never writes.
+
+The ``load_run_id`` column default reads the transaction-local setting
+``gradcafe.load_run_id`` that :func:`stamp` sets. Every layout (wide,
+partitioned, normalized) therefore stamps rows without changing
+``INSERT_SQL``. Rows inserted outside a load run have no ``load_run_id`` and
+are not part of the feed. DuckDB loads do not record runs.
+"""
+
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from psycopg import sql
+
+import jobs
+import query_api
+from db_utils import get_conn
+
+RUNS_SQL = """
+CREATE TABLE IF NOT EXISTS load_runs (
+    id             BIGSERIAL PRIMARY KEY,
+    source         TEXT,
+    status         TEXT NOT NULL DEFAULT 'running',
+    started_at     TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at     TIMESTAMPTZ NOT NULL DEFAULT now(),
+    finished_at    TIMESTAMPTZ,
+    rows_read      INTEGER,
+    rows_inserted  INTEGER,
+    rows_updated   INTEGER,
+    error          TEXT
+);
+CREATE INDEX IF NOT EXISTS load_runs_running_idx ON load_runs (id) WHERE status = 'running';
+DO $$ BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_attribute WHERE attrelid = 'load_runs'::regclass
+                 AND attname = 'rows_updated' AND NOT attisdropped) THEN
+    ALTER TABLE load_runs ADD COLUMN rows_updated INTEGER;
+  END IF;
+  IF NOT EXISTS (SELECT 1 FROM pg_attribute WHERE attrelid = 'load_runs'::regclass
+                 AND attname = 'updated_at' AND NOT attisdropped) THEN
+    ALTER TABLE load_runs ADD COLUMN updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+  END IF;
+END $$;
+"""
+
+_COLUMNS_SQL = """
+ALTER TABLE {table}
+    ADD COLUMN IF NOT EXISTS load_run_id BIGINT
+        DEFAULT NULLIF(current_setting('gradcafe.load_run_id', true), '')::bigint,
+    ADD COLUMN IF NOT EXISTS loaded_at TIMESTAMPTZ DEFAULT now();
+CREATE INDEX IF NOT EXISTS {index} ON {table} (load_run_id);
+"""
+
+_WATERMARK_SQL = """
+SELECT COALESCE((SELECT MIN(id) - 1 FROM load_runs WHERE status = 'running'),
+                (SELECT MAX(id) FROM load_runs), 0);
+"""
+
+# Minimum seconds between two heartbeats of one load run.
+HEARTBEAT_INTERVAL = 5.0
+
+RUN_COLUMNS = ("id", "source", "status", "started_at", "updated_at", "finished_at",
+               "rows_read", "rows_inserted", "rows_updated", "error")
+
+
+class RunAborted(RuntimeError):
+    """The run was marked failed (stale) before it could finish."""
+
+
+def ensure_columns(cur, table: str) -> None:
+    """Add ``load_run_id`` / ``loaded_at`` (and their index) to ``table``.
+
+    Checks the catalog first: ``ALTER TABLE`` takes an exclusive lock even
+    when there is nothing to add, and ``ensure_table`` runs on every start.
+    """
+    cur.execute("""
+        SELECT COUNT(*) FROM pg_attribute
+        WHERE attrelid = to_regclass(%s) AND attname IN ('load_run_id', 'loaded_at')
+          AND NOT attisdropped;""", (table,))
+    if cur.fetchone()[0] == 2:
+        return
+    cur.execute(sql.SQL(_COLUMNS_SQL).format(table=sql.Identifier(table),
+                                             index=sql.Identifier(f"{table}_load_run_idx")))
+
+
+def ensure_schema(cur, table: str = "applicants") -> None:
+    """Create ``load_runs`` and the run columns on ``table``. Idempotent."""
+    cur.execute(RUNS_SQL)
+    ensure_columns(cur, table)
+
+
+def start_run(app, source: Optional[str] = None) -> int:
+    """Record a running load run and return its id.
+
+    Committed on its own connection, so :func:`watermark` sees the run
+    before any of its rows exist.
+    """
+    with get_conn(app) as conn:
+        return conn.execute("INSERT INTO load_runs (source) VALUES (%s) RETURNING id;",
+                            (source,)).fetchone()[0]
+
+
+def stamp(cur, run_id: int) -> None:
+    """Make rows inserted in this transaction default to ``run_id``."""
+    cur.execute("SELECT set_config('gradcafe.load_run_id', %s, true);", (str(run_id),))
+
+
+def finish_run(cur, run_id: int, rows_read: int, rows_inserted: int, rows_updated: int = 0) -> None:
+    """Mark the run finished inside the load transaction, so it commits with the rows."""
+    cur.execute("""
+        UPDATE load_runs SET status = 'finished', finished_at = now(),
+                             rows_read = %s, rows_inserted = %s, rows_updated = %s
+        WHERE id = %s AND status = 'running';""", (rows_read, rows_inserted, rows_updated, run_id))
+    if cur.rowcount != 1:
+        raise RunAborted(f"load run {run_id} was marked failed while loading")
+
+
+def fail_run(app, run_id: int, error: Any) -> None:
+    """Mark the run failed; its rows were rolled back."""
+    with get_conn(app) as conn:
+        conn.execute("""
+            UPDATE load_runs SET status = 'failed', finished_at = now(), error = %s
+            WHERE id = %s AND status = 'running';""", (str(error)[:500], run_id))
+
+
+class Heartbeat:
+    """Keeps one running load run's ``updated_at`` fresh while it loads.
+
+    The load's own transaction commits only at the end, so the bumps go
+    through a second, autocommit connection, opened on the first bump.
+    """
+
+    def __init__(self, app, run_id: int, interval: float = HEARTBEAT_INTERVAL):
+        self.app = app
+        self.run_id = run_id
+        self.interval = interval
+        self._conn = None
+        self._last = time.monotonic()
+
+    def beat(self) -> None:
+        """Bump ``updated_at`` unless the last bump is less than ``interval`` old.
+
+        Raises :class:`RunAborted` once the run has been reaped, so the load
+        stops instead of finishing work that can no longer commit.
+        """
+        now = time.monotonic()
+        if now - self._last < self.interval:
+            return
+        self._last = now
+        if self._conn is None:
+            self._conn = get_conn(self.app)
+            self._conn.autocommit = True
+        cur = self._conn.execute("UPDATE load_runs SET updated_at = now() WHERE id = %s AND status = 'running';",
+                                 (self.run_id,))
+        if cur.rowcount != 1:
+            raise RunAborted(f"load run {self.run_id} was marked failed while loading")
+
+    def close(self) -> None:
+        """Close the heartbeat connection, if one was opened."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def reap_stale(app=None, max_age: int = jobs.STALE_AFTER_SECONDS) -> int:
+    """Fail runs without a heartbeat for ``max_age`` seconds; return the count."""
+    with get_conn(app) as conn:
+        return conn.execute("""
+            UPDATE load_runs SET status = 'failed', finished_at = now(),
+                                 error = 'Load stopped responding.'
+            WHERE status = 'running' AND updated_at < now() - make_interval(secs => %s);""",
+                            (max_age,)).rowcount
+
+
+def watermark(app=None) -> int:
+    """The newest run id whose rows, and every earlier run's, are final."""
+    with get_conn(app) as conn:
+        return conn.execute(_WATERMARK_SQL).fetchone()[0]
+
+
+def list_runs(app=None, limit: int = 20) -> List[Dict[str, Any]]:
+    """The latest ``limit`` load runs, newest first."""
+    with get_conn(app) as conn:
+        rows = conn.execute(sql.SQL("SELECT {} FROM load_runs ORDER BY id DESC LIMIT %s;").format(
+            sql.SQL(", ").join(map(sql.Identifier, RUN_COLUMNS))), (limit,)).fetchall()
+    return [dict(zip(RUN_COLUMNS, row)) for row in rows]
+
+
+def iter_changes(app, since: int = 0, until: Optional[int] = None,
+                 batch_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Stream the rows of runs ``since < load_run_id <= until`` in ``p_id`` order.
+
+    ``until`` defaults to the current :func:`watermark`. The rows are read
+    through a server-side cursor, so a consumer pays for the new rows only.
+    """
+    if until is None:
+        until = watermark(app)
+    query, params, columns = query_api.changes_query({"since": since}, False, until)
+    for rows in query_api.stream_rows(app, query, params, name="changes_feed", batch_size=batch_size):
+        for row in rows:
+            yield dict(zip(columns, row))
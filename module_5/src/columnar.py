@@ -0,0 +1,256 @@
+"""
+columnar.py – Parquet storage for applicant data and offline Q1–Q10 metrics.
+
+The pipeline's intermediate files are pretty-printed JSON, which is large on
+disk and slow to parse. This module stores the same data as Parquet instead:
+
+- :func:`write_applicants` normalises records with
+  :func:`load_data.normalize_record` and streams them to a Parquet file with
+  :data:`arrow_schema.APPLICANT_SCHEMA`, whose columns match the
+  ``applicants`` table. Low-cardinality text columns (status, term,
+  nationality, degree, university) are dictionary-encoded.
+- :func:`write_records` / :func:`read_records` store arbitrary records, such
+  as the scrape/clean checkpoints or the Module 2 JSON files, column-wise.
+- :func:`compute_metrics` computes the ``fetch_metrics`` dictionary directly
+  from an applicants Parquet file with Arrow compute kernels and NumPy, so
+  no PostgreSQL is needed for local exploration.
+
+::
+
+    python src/columnar.py to-parquet ../module_2/llm_extend_applicant_data.json data/applicants.parquet
+    python src/columnar.py metrics data/applicants.parquet
+"""
+
+import argparse
+import json
+import os
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+import load_data
+from arrow_schema import APPLICANT_SCHEMA, BATCH_SIZE, applicant_batch
+from metric_queries import FALL_2026, default_metrics
+from records import ApplicantBatch, RecordColumns
+
+DICTIONARY_COLUMNS = ("status", "term", "us_or_international", "degree",
+                      "llm_generated_university", "university")
+
+_TEXT = pa.string()
+
+WRITE_BATCH_SIZE = BATCH_SIZE
+
+
+# ---------------------------------------------------------------------------
+# Writing / reading
+# ---------------------------------------------------------------------------
+
+def write_applicants(records: Iterable[Dict[str, Any]], path: str,
+                     batch_size: int = WRITE_BATCH_SIZE) -> int:
+    """Normalise ``records`` and stream them to ``path`` as Parquet; return the row count."""
+    rows = ApplicantBatch()
+    count = 0
+    with pq.ParquetWriter(path, APPLICANT_SCHEMA, compression="zstd") as writer:
+        for r in records:
+            rows.append(load_data.normalize_record(r))
+            if len(rows) >= batch_size:
+                writer.write_batch(applicant_batch(rows))
+                count += len(rows)
+                rows.clear()
+        if len(rows):
+            writer.write_batch(applicant_batch(rows))
+            count += len(rows)
+    return count
+
+
+def write_records(records: Iterable[Dict[str, Any]], path: str) -> int:
+    """Write arbitrary records (or a :class:`records.RecordColumns`) to ``path`` as Parquet.
+
+    The schema is inferred from all records, so they are collected first,
+    column-wise. Returns the row count.
+    """
+    columns = records if isinstance(records, RecordColumns) else RecordColumns(records)
+    table = pa.Table.from_pydict(columns.columns)
+    for i, name in enumerate(table.column_names):
+        if name in DICTIONARY_COLUMNS and pa.types.is_string(table.schema.field(i).type):
+            table = table.set_column(i, name, pc.dictionary_encode(table.column(i)))
+    pq.write_table(table, path, compression="zstd")
+    return table.num_rows
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the rows of a Parquet file as dicts, one record batch at a time."""
+    for batch in pq.ParquetFile(path).iter_batches():
+        yield from batch.to_pylist()
+
+
+def read_json_records(path: str) -> List[Dict[str, Any]]:
+    """Records from a Module 2 JSON file: a list, a ``{"records": [...]}`` payload or JSONL."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return list(load_data.load_jsonl(path))
+    if isinstance(data, dict):
+        return data.get("records", data.get("rows", []))
+    return data
+
+
+# ---------------------------------------------------------------------------
+# Offline metrics
+# ---------------------------------------------------------------------------
+
+def flat_column(table: pa.Table, name: str):
+    """Column ``name`` of ``table`` as one contiguous Arrow array."""
+    return table.column(name).combine_chunks()
+
+
+def match_mask(arr, fn):
+    """``fn(arr)`` with NULL → False; dictionary columns only evaluate their dictionary."""
+    if pa.types.is_dictionary(arr.type):
+        out = fn(arr.dictionary).take(arr.indices)
+    else:
+        out = fn(arr)
+    return pc.fill_null(out, False)
+
+
+def prefix_mask(arr, prefix):
+    """Rows of ``arr`` that start with ``prefix`` (case-insensitive, NULL → False)."""
+    return match_mask(arr, lambda a: pc.starts_with(a, prefix, ignore_case=True))
+
+
+def _contains(arr, *needles):
+    mask = None
+    for needle in needles:
+        hit = match_mask(arr, lambda a, n=needle: pc.match_substring(a, n, ignore_case=True))
+        mask = hit if mask is None else pc.or_(mask, hit)
+    return mask
+
+
+def _any(*masks):
+    out = masks[0]
+    for m in masks[1:]:
+        out = pc.or_(out, m)
+    return out
+
+
+def _all(*masks):
+    out = masks[0]
+    for m in masks[1:]:
+        out = pc.and_(out, m)
+    return out
+
+
+def _count(mask) -> int:
+    return int(np.count_nonzero(mask.to_numpy(zero_copy_only=False)))
+
+
+def _avg(values, mask=None) -> Optional[float]:
+    arr = values if mask is None else pc.filter(values, mask)
+    mean = pc.mean(arr).as_py()
+    return None if mean is None else round(mean, 3)
+
+
+def _pct(num: int, den: int) -> Optional[float]:
+    return round(100.0 * num / den, 2) if den else None
+
+
+def _top(labels, default: str, limit: int, mask=None) -> List[tuple]:
+    """``COALESCE(NULLIF(label, ''), default)`` grouped and counted, largest first."""
+    if mask is not None:
+        labels = pc.filter(labels, mask)
+    labels = labels.cast(_TEXT)
+    labels = pc.fill_null(pc.if_else(pc.equal(labels, ""), pa.scalar(None, _TEXT), labels), default)
+    counts = pc.value_counts(labels)
+    names = np.array(counts.field("values").to_pylist(), dtype=str)
+    totals = counts.field("counts").to_numpy()
+    order = np.lexsort((names, -totals))[:limit]  # count desc, then label
+    return [(str(names[i]), int(totals[i])) for i in order]
+
+
+def compute_metrics(source) -> Dict[str, Any]:
+    """The ``app.fetch_metrics`` dictionary computed from an applicants Parquet file (or Table)."""
+
+    table = source if isinstance(source, pa.Table) else pq.read_table(source)
+    table = table.unify_dictionaries()
+    metrics = default_metrics()
+    if table.num_rows == 0:
+        return metrics
+
+    program, comments, status, term, nat, degree, llm_prog, llm_uni, dates = (
+        flat_column(table, name) for name in (
+            "program", "comments", "status", "term", "us_or_international", "degree",
+            "llm_generated_program", "llm_generated_university", "date_added"))
+
+    fall = match_mask(term, lambda a: pc.equal(a, FALL_2026))
+    accepted = prefix_mask(status, "Accepted")
+    decided = _any(accepted, prefix_mask(status, "Rejected"), prefix_mask(status, "Waitlisted"),
+                   prefix_mask(status, "Interview"))
+    in_2026 = pc.fill_null(_all(pc.greater_equal(dates, pa.scalar(date(2026, 1, 1))),
+                                pc.less(dates, pa.scalar(date(2027, 1, 1)))), False)
+    phd = _any(match_mask(degree, lambda a: pc.equal(a, "PhD")), _contains(program, "phd"))
+    program_cs = _contains(program, "computer science")
+
+    metrics["fall_2026"] = _count(fall)
+    metrics["pct_intl"] = _pct(_count(prefix_mask(nat, "International")),
+                               _count(match_mask(nat, lambda a: pc.not_equal(a, ""))))
+    for col, key in [("gpa", "avg_gpa"), ("gre", "avg_gre"), ("gre_v", "avg_gre_v"), ("gre_aw", "avg_gre_aw")]:
+        metrics[key] = _avg(table.column(col))
+    gpa = table.column("gpa").combine_chunks()
+    metrics["avg_gpa_american_fall"] = _avg(gpa, _all(fall, prefix_mask(nat, "American")))
+    metrics["acceptance_pct"] = _pct(_count(_all(fall, accepted)), _count(_all(fall, decided)))
+    metrics["avg_gpa_accepted"] = _avg(gpa, _all(fall, accepted))
+    metrics["q7"] = _count(_all(
+        _any(_contains(program, "johns hopkins", "jhu"), _contains(llm_uni, "johns hopkins")),
+        _any(program_cs, _contains(comments, "computer science"), _contains(llm_prog, "computer science")),
+        _any(prefix_mask(degree, "Master"), _contains(program, "master")),
+    ))
+    metrics["q8"] = _count(_all(
+        accepted, in_2026, _any(program_cs, _contains(comments, "computer science")), phd,
+        _contains(program, "mit", "stanford", "carnegie mellon", "georgetown"),
+    ))
+    metrics["q9"] = _count(_all(
+        accepted, in_2026, _any(_contains(llm_prog, "computer science"), program_cs), phd,
+        _any(_contains(llm_uni, "mit", "stanford", "carnegie mellon"), _contains(program, "mit", "stanford")),
+    ))
+    metrics["q10a_rows"] = _top(term, "No term detected", 5)
+    metrics["q10b_rows"] = _top(llm_uni, "Unknown", 5, fall)
+    metrics["term_dist"] = _top(term, "No term detected", 10)
+    metrics["decision_dist"] = _top(status, "No status", 10)
+    return metrics
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main(argv=None):
+    """``to-parquet SRC DST [--raw]`` converts JSON/JSONL; ``metrics FILE`` prints Q1–Q10."""
+    parser = argparse.ArgumentParser(description="Parquet export and offline metrics.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    conv = sub.add_parser("to-parquet", help="convert a JSON/JSONL file to Parquet")
+    conv.add_argument("src")
+    conv.add_argument("dst")
+    conv.add_argument("--raw", action="store_true",
+                      help="keep the records' own fields instead of the applicants columns")
+    met = sub.add_parser("metrics", help="compute the dashboard metrics from an applicants file")
+    met.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "metrics":
+        print(json.dumps(compute_metrics(args.path), indent=2))
+        return 0
+    records = read_json_records(args.src)
+    write = write_records if args.raw else write_applicants
+    rows = write(records, args.dst)
+    print(f"{rows} rows: {os.path.getsize(args.src)} → {os.path.getsize(args.dst)} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,10 @@
 import os
 import psycopg
 
+import profiling
+
+DUCKDB_SCHEME = "duckdb:"
+
 
 def build_conninfo(app=None):
     """Return a psycopg3-compatible connection string.
@@ -37,7 +41,20 @@ def get_conn(app=None):
     Returns:
         psycopg.Connection
     """
-    return psycopg.connect(build_conninfo(app))
+    return profiling.connect(build_conninfo(app), app)
+
+
+def duckdb_url(app=None):
+    """Return the ``duckdb:`` database URL if DuckDB is the backend.
+
+    Args:
+        app: Optional Flask app with DATABASE_URL in config
+
+    Returns:
+        The URL, or None when the backend is PostgreSQL
+    """
+    url = build_conninfo(app)
+    return url if url.startswith(DUCKDB_SCHEME) else None
 
 
 def clamp_limit(limit, max_limit=100):
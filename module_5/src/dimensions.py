@@ -0,0 +1,273 @@
+"""
+dimensions.py – Dictionary-encoded ``applicants`` storage for PostgreSQL.
+
+With ``APPLICANTS_LAYOUT=normalized`` the repeated text columns move into
+lookup tables and each row stores integer keys instead:
+
+============  ============================  ==================
+lookup table  ``applicants`` column         key column
+============  ============================  ==================
+statuses      ``status``                    ``status_id``
+terms         ``term``                      ``term_id``
+programs      ``llm_generated_program``     ``program_id``
+universities  ``llm_generated_university``  ``university_id``
+============  ============================  ==================
+
+The rows live in ``applicant_facts``; ``applicants`` becomes a view that
+joins the names back, so every query (metrics, ``/api/*``, stats) keeps
+working unchanged. An ``INSTEAD OF INSERT`` trigger on the view resolves the
+names for ad-hoc ``INSERT INTO applicants``. Bulk loads skip it:
+:class:`Encoder` keeps an in-memory ``name → id`` cache per lookup table and
+resolves the names of a whole batch with one round trip per table and only
+for names it has not seen, so the rows go straight into
+``applicant_facts``.
+
+:func:`ensure_schema` creates the layout, or converts an existing wide
+``applicants`` table in place (ids and ``p_id`` values are kept).
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from psycopg import sql
+
+import changes
+from records import FIELDS
+
+LAYOUT_WIDE = "wide"
+LAYOUT_NORMALIZED = "normalized"
+FACTS_TABLE = "applicant_facts"
+
+# (lookup table, applicants column, applicant_facts key column)
+DIMENSIONS = (
+    ("statuses", "status", "status_id"),
+    ("terms", "term", "term_id"),
+    ("programs", "llm_generated_program", "program_id"),
+    ("universities", "llm_generated_university", "university_id"),
+)
+
+_LOOKUPS_SQL = "".join(f"""
+CREATE TABLE IF NOT EXISTS {table} (
+    id   INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);""" for table, _, _ in DIMENSIONS)
+
+_FACTS_SQL = """
+CREATE TABLE IF NOT EXISTS applicant_facts (
+    p_id                    SERIAL PRIMARY KEY,
+    program                 TEXT,
+    comments                TEXT,
+    date_added              DATE,
+    url                     TEXT,
+    status_id               INTEGER REFERENCES statuses,
+    term_id                 INTEGER REFERENCES terms,
+    us_or_international     TEXT,
+    gpa                     NUMERIC,
+    gre                     NUMERIC,
+    gre_v                   NUMERIC,
+    gre_aw                  NUMERIC,
+    degree                  TEXT,
+    program_id              INTEGER REFERENCES programs,
+    university_id           INTEGER REFERENCES universities
+);
+CREATE UNIQUE INDEX IF NOT EXISTS applicant_facts_sig_unique
+ON applicant_facts (COALESCE(url, ''), COALESCE(program, ''), COALESCE(comments, ''));
+"""
+
+# applicant_facts columns in load_data.INSERT_SQL order.
+FACT_COLUMNS = ("program", "comments", "date_added", "url", "status_id", "term_id",
+                "us_or_international", "gpa", "gre", "gre_v", "gre_aw", "degree",
+                "program_id", "university_id")
+
+_VIEW_SQL = """
+CREATE OR REPLACE VIEW applicants AS
+SELECT f.p_id, f.program, f.comments, f.date_added, f.url,
+       s.name AS status, t.name AS term, f.us_or_international,
+       f.gpa, f.gre, f.gre_v, f.gre_aw, f.degree,
+       p.name AS llm_generated_program, u.name AS llm_generated_university,
+       f.load_run_id, f.loaded_at
+FROM applicant_facts f
+LEFT JOIN statuses s     ON s.id = f.status_id
+LEFT JOIN terms t        ON t.id = f.term_id
+LEFT JOIN programs p     ON p.id = f.program_id
+LEFT JOIN universities u ON u.id = f.university_id;
+"""
+
+# Name → id for ad-hoc inserts through the view (bulk loads use Encoder).
+_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION lookup_id(tbl regclass, val text) RETURNS integer
+LANGUAGE plpgsql AS $f$
+DECLARE found_id integer;
+BEGIN
+  IF val IS NULL THEN RETURN NULL; END IF;
+  EXECUTE format('SELECT id FROM %s WHERE name = $1', tbl) INTO found_id USING val;
+  IF found_id IS NULL THEN
+    EXECUTE format('INSERT INTO %s (name) VALUES ($1) ON CONFLICT (name) DO UPDATE
+                    SET name = EXCLUDED.name RETURNING id', tbl) INTO found_id USING val;
+  END IF;
+  RETURN found_id;
+END $f$;
+
+CREATE OR REPLACE FUNCTION applicants_view_insert() RETURNS trigger
+LANGUAGE plpgsql AS $f$
+BEGIN
+  INSERT INTO applicant_facts (
+      program, comments, date_added, url, status_id, term_id, us_or_international,
+      gpa, gre, gre_v, gre_aw, degree, program_id, university_id)
+  VALUES (
+      NEW.program, NEW.comments, NEW.date_added, NEW.url,
+      lookup_id('statuses', NEW.status), lookup_id('terms', NEW.term), NEW.us_or_international,
+      NEW.gpa, NEW.gre, NEW.gre_v, NEW.gre_aw, NEW.degree,
+      lookup_id('programs', NEW.llm_generated_program),
+      lookup_id('universities', NEW.llm_generated_university))
+  ON CONFLICT DO NOTHING
+  RETURNING p_id INTO NEW.p_id;
+  IF NOT FOUND THEN RETURN NULL; END IF;
+  RETURN NEW;
+END $f$;
+
+DROP TRIGGER IF EXISTS applicants_view_insert ON applicants;
+CREATE TRIGGER applicants_view_insert INSTEAD OF INSERT ON applicants
+  FOR EACH ROW EXECUTE FUNCTION applicants_view_insert();
+"""
+
+# Wide table → facts: fill the lookups, copy the rows with their p_id, drop it.
+_MIGRATE_SQL = "".join(f"""
+INSERT INTO {table} (name)
+SELECT DISTINCT {column} FROM applicants WHERE {column} IS NOT NULL
+ON CONFLICT (name) DO NOTHING;""" for table, column, _ in DIMENSIONS) + """
+INSERT INTO applicant_facts (p_id, program, comments, date_added, url, status_id, term_id,
+                             us_or_international, gpa, gre, gre_v, gre_aw, degree,
+                             program_id, university_id, load_run_id, loaded_at)
+SELECT a.p_id, a.program, a.comments, a.date_added, a.url, s.id, t.id,
+       a.us_or_international, a.gpa, a.gre, a.gre_v, a.gre_aw, a.degree, p.id, u.id,
+       a.load_run_id, a.loaded_at
+FROM applicants a
+LEFT JOIN statuses s     ON s.name = a.status
+LEFT JOIN terms t        ON t.name = a.term
+LEFT JOIN programs p     ON p.name = a.llm_generated_program
+LEFT JOIN universities u ON u.name = a.llm_generated_university
+ON CONFLICT DO NOTHING;
+SELECT setval(pg_get_serial_sequence('applicant_facts', 'p_id'),
+              GREATEST((SELECT MAX(p_id) FROM applicant_facts), 1));
+DROP TABLE applicants;
+"""
+
+# One statement per batch: the columns arrive as arrays, so the FK checks,
+# the unique index probe and the data_version trigger run set-based.
+INSERT_SQL = """
+INSERT INTO applicant_facts (
+    program, comments, date_added, url,
+    status_id, term_id, us_or_international,
+    gpa, gre, gre_v, gre_aw,
+    degree, program_id, university_id
+)
+SELECT * FROM unnest(
+    %s::text[], %s::text[], %s::date[], %s::text[],
+    %s::int[], %s::int[], %s::text[],
+    %s::numeric[], %s::numeric[], %s::numeric[], %s::numeric[],
+    %s::text[], %s::int[], %s::int[])
+ON CONFLICT DO NOTHING;
+"""
+
+ANALYZE_SQL = "ANALYZE applicant_facts, statuses, terms, programs, universities;"
+
+TRUNCATE_SQL = "TRUNCATE TABLE applicant_facts, statuses, terms, programs, universities RESTART IDENTITY;"
+
+# Refresh mode (load_data.upsert_records): names new to the staged rows first.
+STAGE_LOOKUPS_SQL = "".join(f"""
+INSERT INTO {table} (name)
+SELECT DISTINCT {column} FROM {{stage}} WHERE {column} IS NOT NULL
+ON CONFLICT (name) DO NOTHING;""" for table, column, _ in DIMENSIONS)
+
+_KEYS = {column: key for _, column, key in DIMENSIONS}
+
+
+def ensure_schema(cur) -> None:
+    """Create the lookup tables, ``applicant_facts`` and the ``applicants`` view.
+
+    A wide ``applicants`` table is migrated into the new layout first.
+    """
+    cur.execute(_LOOKUPS_SQL + _FACTS_SQL)
+    changes.ensure_columns(cur, FACTS_TABLE)
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('applicants');")
+    row = cur.fetchone()
+    if row is not None and row[0] == "r":
+        changes.ensure_columns(cur, "applicants")
+        cur.execute(_MIGRATE_SQL)
+    cur.execute(_VIEW_SQL + _TRIGGER_SQL)
+
+
+def upsert_sql(stage: str, columns: Sequence[str]) -> sql.Composed:
+    """Merge the staged rows into ``applicant_facts``, refreshing ``columns``.
+
+    The staged names are swapped for lookup ids in the ``SELECT``; a row that
+    already exists is only updated when one of the refreshed ids differs.
+    """
+    values, joins = [], []
+    for column in FIELDS:
+        if column not in _KEYS:
+            values.append(sql.SQL("s.{}").format(sql.Identifier(column)))
+            continue
+        alias = sql.Identifier(f"d_{_KEYS[column]}")
+        table = next(t for t, c, _ in DIMENSIONS if c == column)
+        values.append(sql.SQL("{}.id").format(alias))
+        joins.append(sql.SQL("LEFT JOIN {} {} ON {}.name = s.{}").format(
+            sql.Identifier(table), alias, alias, sql.Identifier(column)))
+    keys = [sql.Identifier(_KEYS.get(c, c)) for c in columns]
+    return sql.SQL("""
+        INSERT INTO applicant_facts ({facts})
+        SELECT {values} FROM {stage} s {joins}
+        ON CONFLICT (COALESCE(url, ''), COALESCE(program, ''), COALESCE(comments, '')) DO UPDATE
+        SET {sets}, load_run_id = EXCLUDED.load_run_id, loaded_at = EXCLUDED.loaded_at
+        WHERE ({current}) IS DISTINCT FROM ({excluded});""").format(
+        facts=sql.SQL(", ").join(map(sql.Identifier, FACT_COLUMNS)),
+        values=sql.SQL(", ").join(values),
+        stage=sql.Identifier(stage),
+        joins=sql.SQL(" ").join(joins),
+        sets=sql.SQL(", ").join(sql.SQL("{} = EXCLUDED.{}").format(k, k) for k in keys),
+        current=sql.SQL(", ").join(sql.SQL("applicant_facts.{}").format(k) for k in keys),
+        excluded=sql.SQL(", ").join(sql.SQL("EXCLUDED.{}").format(k) for k in keys))
+
+
+class IdCache:
+    """``name → id`` for one lookup table, filled on demand."""
+
+    def __init__(self, table: str):
+        self.table = table
+        self.ids: Dict[str, int] = {}
+
+    def resolve(self, cur, names: Iterable[Optional[str]]) -> None:
+        """Make sure every name in ``names`` has an id, inserting the new ones."""
+        missing = sorted({n for n in names if n is not None and n not in self.ids})
+        if not missing:
+            return
+        table = sql.Identifier(self.table)
+        cur.execute(sql.SQL("INSERT INTO {} (name) SELECT unnest(%s::text[]) "
+                            "ON CONFLICT (name) DO NOTHING").format(table), (missing,))
+        cur.execute(sql.SQL("SELECT name, id FROM {} WHERE name = ANY(%s)").format(table), (missing,))
+        self.ids.update(cur.fetchall())
+
+    def lookup(self, cur, names: Sequence[Optional[str]]) -> List[Optional[int]]:
+        """The id of every name in ``names`` (None stays None), resolving unseen ones first."""
+        self.resolve(cur, names)
+        ids = self.ids
+        return [None if name is None else ids[name] for name in names]
+
+
+class Encoder:
+    """Writes ``load_data.INSERT_SQL`` rows to ``applicant_facts`` with cached lookup ids."""
+
+    def __init__(self):
+        self.caches = {FIELDS.index(column): IdCache(table) for table, column, _ in DIMENSIONS}
+
+    def encode(self, cur, rows: Sequence[Sequence]) -> List[list]:
+        """The ``INSERT_SQL`` columns for ``rows``; unseen names cost one round trip per lookup table."""
+        columns = [list(col) for col in zip(*rows)] if rows else [[] for _ in FIELDS]
+        for i, cache in self.caches.items():
+            columns[i] = cache.lookup(cur, columns[i])
+        return columns
+
+    def write(self, cur, rows: Sequence[Sequence]) -> int:
+        """Insert ``rows`` with one statement; return how many were new."""
+        cur.execute(INSERT_SQL, self.encode(cur, rows))
+        return cur.rowcount
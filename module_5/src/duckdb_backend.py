@@ -0,0 +1,152 @@
+"""
+duckdb_backend.py – Embedded DuckDB storage for loading and the Q1–Q10 metrics.
+
+For single-machine deployments the ``applicants`` table can live in a DuckDB
+file instead of PostgreSQL. Point ``DATABASE_URL`` at it::
+
+    DATABASE_URL=duckdb:///var/lib/gradcafe/applicants.duckdb python src/load_data.py
+
+``load_data.main()`` / ``ensure_table()`` then write to the file and
+``app.fetch_metrics()`` runs the same :data:`metric_queries.METRIC_QUERIES` against it.
+DuckDB stores each column separately and compresses it (low-cardinality
+text is dictionary-encoded automatically), so the full-table scans and
+``ILIKE`` filters behind Q1–Q10 read only the columns they use, in
+vectorized batches.
+
+Only loading and metrics are supported; the job queue, data version
+triggers and ad-hoc query API still need PostgreSQL.
+"""
+
+import re
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import duckdb
+import pyarrow as pa
+from psycopg import sql
+
+import arrow_schema
+import metric_queries
+from db_utils import DUCKDB_SCHEME
+from records import ApplicantBatch
+
+SCHEME = DUCKDB_SCHEME
+
+# Rows per Arrow batch; each batch is one set-based INSERT ... SELECT.
+BATCH_SIZE = 50_000
+
+SCHEMA_SQL = """
+CREATE SEQUENCE IF NOT EXISTS applicants_p_id;
+CREATE TABLE IF NOT EXISTS applicants (
+    p_id                     INTEGER PRIMARY KEY DEFAULT nextval('applicants_p_id'),
+    program                  VARCHAR,
+    comments                 VARCHAR,
+    date_added               DATE,
+    url                      VARCHAR,
+    status                   VARCHAR,
+    term                     VARCHAR,
+    us_or_international      VARCHAR,
+    gpa                      DOUBLE,
+    gre                      DOUBLE,
+    gre_v                    DOUBLE,
+    gre_aw                   DOUBLE,
+    degree                   VARCHAR,
+    llm_generated_program    VARCHAR,
+    llm_generated_university VARCHAR
+);
+"""
+
+_COLUMNS = ", ".join(arrow_schema.APPLICANT_COLUMNS)
+
+# Same de-duplication as the PostgreSQL unique index + ON CONFLICT DO NOTHING:
+# the first row per (url, program, comments) wins, within the batch and
+# against the rows already stored.
+INSERT_SQL = f"""
+INSERT INTO applicants ({_COLUMNS})
+SELECT {_COLUMNS} FROM (
+    SELECT *, row_number() OVER (
+        PARTITION BY COALESCE(url, ''), COALESCE(program, ''), COALESCE(comments, '')
+        ORDER BY ord) AS rn
+    FROM (SELECT *, row_number() OVER () AS ord FROM batch)
+) b
+WHERE rn = 1 AND NOT EXISTS (
+    SELECT 1 FROM applicants a
+    WHERE COALESCE(a.url, '') = COALESCE(b.url, '')
+      AND COALESCE(a.program, '') = COALESCE(b.program, '')
+      AND COALESCE(a.comments, '') = COALESCE(b.comments, ''))
+ORDER BY ord;
+"""
+
+
+def database_path(url: str) -> str:
+    """``duckdb:///abs/file.duckdb`` → ``/abs/file.duckdb``; ``duckdb:rel.duckdb`` → ``rel.duckdb``."""
+    path = url[len(SCHEME):]
+    return path[2:] if path.startswith("//") else path
+
+
+def connect(url: str):
+    """Open the DuckDB database named by ``url``."""
+    return duckdb.connect(database_path(url))
+
+
+def ensure_table(url: str):
+    """Create the ``applicants`` table if it does not exist."""
+    with connect(url) as con:
+        con.execute(SCHEMA_SQL)
+
+
+def insert_records(url: str, records: Iterable[Any], batch_size: int = BATCH_SIZE,
+                   on_batch: Optional[Callable[[int, int], None]] = None,
+                   normalize: Optional[Callable[[Any], tuple]] = None):
+    """
+    Insert ``records`` in Arrow batches for ``load_data.insert_records`` (its ``LoadOptions`` unpacked).
+
+    ``normalize`` turns a record into an ``INSERT_SQL`` parameter tuple
+    (``load_data.normalize_record``); ``None`` means records already are tuples.
+    Returns ``(read_rows, inserted)``.
+    """
+    read_rows = inserted = 0
+    rows = ApplicantBatch()
+
+    def flush(con):
+        nonlocal inserted
+        batch = pa.Table.from_batches([arrow_schema.applicant_batch(rows)])
+        con.register("batch", batch)
+        inserted += con.execute(INSERT_SQL).fetchone()[0]
+        con.unregister("batch")
+        rows.clear()
+        if on_batch is not None:
+            on_batch(read_rows, inserted)
+
+    with connect(url) as con:
+        con.execute(SCHEMA_SQL)
+        for r in records:
+            read_rows += 1
+            rows.append(normalize(r) if normalize else r)
+            if len(rows) >= batch_size:
+                flush(con)
+        if len(rows):
+            flush(con)
+    return read_rows, inserted
+
+
+def translate(query) -> str:
+    """A psycopg query (``%s`` placeholders, ``%%`` escapes) as DuckDB SQL (``?``)."""
+    text = query.as_string(None) if isinstance(query, sql.Composable) else query
+    return re.sub(r"%%|%s", lambda m: "%" if m.group() == "%%" else "?", text)
+
+
+def _pg_types(rows):
+    """Floats as Decimal, the type PostgreSQL returns for ROUND(numeric)."""
+    return [tuple(Decimal(str(v)) if isinstance(v, float) else v for v in row) for row in rows]
+
+
+def fetch_metrics(url: str) -> Dict[str, Any]:
+    """Run the ``METRIC_QUERIES`` against DuckDB; same result as ``app.fetch_metrics``."""
+    metrics = metric_queries.default_metrics()
+    with connect(url) as con:
+        con.execute(SCHEMA_SQL)
+        for key, query, params, mode in metric_queries.METRIC_QUERIES:
+            rows = _pg_types(con.execute(translate(query), list(params)).fetchall())
+            metrics[key] = metric_queries.metric_value(mode, rows)
+    return metrics
@@ -0,0 +1,476 @@
+"""
+jobs.py – PostgreSQL-backed job queue for Pull Data and Update Analysis.
+
+Every web worker reads and writes the same ``jobs`` table, so busy state,
+progress and results are consistent no matter how many gunicorn workers
+serve the dashboard. Jobs are executed either inline (a daemon thread
+started by the web process right after enqueueing, the default) or by a
+separate worker process::
+
+    python src/worker.py            # poll forever
+    python src/worker.py --once     # run at most one job and exit
+
+A partial unique index allows at most one queued/running job per kind, which
+is what turns a second ``POST /pull-data`` into a 409 across processes.
+
+Every state change (enqueue, stage transition, progress write, finish) is
+also published with ``pg_notify`` on ``EVENTS_CHANNEL`` in the same
+transaction, so :func:`subscribe` consumers (the SSE stream) learn about
+progress without polling the table.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+from psycopg.rows import dict_row
+from psycopg.types.json import Jsonb
+
+from db_utils import build_conninfo, get_conn
+
+ACTIVE_STATUSES = ("queued", "running")
+FINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+# A running job whose row has not been touched for this long is assumed to
+# belong to a dead worker and is marked failed so new jobs can start.
+STALE_AFTER_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "1800"))
+
+# Minimum seconds between progress writes for a running job.
+PROGRESS_INTERVAL = 0.5
+
+# LISTEN/NOTIFY channel carrying job state changes as JSON.
+EVENTS_CHANNEL = "job_events"
+
+RUNNERS: Dict[str, Callable[[Any, "JobContext"], Optional[Dict[str, Any]]]] = {}
+
+# Reapers of other stale work, ``fn(app) -> count``, run by :func:`sweep`
+# next to the job reaper; app.py registers ``changes.reap_stale``.
+SWEEPERS: List[Callable[[Any], int]] = []
+
+_ENSURED: set = set()
+_ENSURE_LOCK = threading.Lock()
+
+
+class JobCancelled(Exception):
+    """Raised inside a runner when cancellation was requested."""
+
+
+def to_jsonable(value: Any) -> Any:
+    """Convert Decimals, dates and tuples from query results into JSON types."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    return value
+
+
+def event_payload(job: Dict[str, Any]) -> Dict[str, Any]:
+    """The subset of a job row published on ``EVENTS_CHANNEL``."""
+    return {
+        "id": job.get("id"), "kind": job.get("kind"), "status": job.get("status"),
+        "stage": job.get("stage"), "progress": job.get("progress") or {},
+        "message": job.get("message"),
+    }
+
+
+def _notify(cur, payload: Dict[str, Any]) -> None:
+    """Queue a job event; Postgres delivers it when the transaction commits."""
+    cur.execute("SELECT pg_notify(%s, %s);",
+                (EVENTS_CHANNEL, json.dumps(to_jsonable(payload))))
+
+
+# ---------------------------------------------------------------------------
+# Schema
+# ---------------------------------------------------------------------------
+
+def ensure_jobs_table(app=None):
+    """Create the ``jobs`` table and its indexes if they do not exist (idempotent)."""
+    conn = get_conn(app)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id               BIGSERIAL PRIMARY KEY,
+                    kind             TEXT NOT NULL,
+                    status           TEXT NOT NULL DEFAULT 'queued',
+                    stage            TEXT,
+                    progress         JSONB NOT NULL DEFAULT '{}'::jsonb,
+                    timings          JSONB NOT NULL DEFAULT '{}'::jsonb,
+                    params           JSONB NOT NULL DEFAULT '{}'::jsonb,
+                    result           JSONB,
+                    message          TEXT,
+                    cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
+                    worker           TEXT,
+                    created_at       TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    started_at       TIMESTAMPTZ,
+                    updated_at       TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    finished_at      TIMESTAMPTZ
+                );
+            """)
+            cur.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS jobs_one_active_per_kind
+                ON jobs (kind) WHERE status IN ('queued', 'running');
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS jobs_kind_id ON jobs (kind, id DESC);
+            """)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _connect(app=None):
+    """Open a connection, creating the jobs table once per process/database."""
+    key = build_conninfo(app)
+    if key not in _ENSURED:
+        with _ENSURE_LOCK:
+            if key not in _ENSURED:
+                ensure_jobs_table(app)
+                _ENSURED.add(key)
+    return get_conn(app)
+
+
+# ---------------------------------------------------------------------------
+# Queue operations
+# ---------------------------------------------------------------------------
+
+def reap_stale(app=None, max_age: int = STALE_AFTER_SECONDS) -> int:
+    """Fail running jobs whose worker stopped updating them; return the count."""
+    conn = _connect(app)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                UPDATE jobs
+                SET status = 'failed', message = 'Worker stopped responding.',
+                    finished_at = now(), updated_at = now()
+                WHERE status = 'running'
+                  AND updated_at < now() - make_interval(secs => %s);
+            """, (max_age,))
+            count = cur.rowcount
+        conn.commit()
+        return count
+    finally:
+        conn.close()
+
+
+def sweep(app=None) -> int:
+    """Run :func:`reap_stale` and every ``SWEEPERS`` entry; return how much was reaped."""
+    return reap_stale(app) + sum(fn(app) for fn in SWEEPERS)
+
+
+def enqueue(app, kind: str, params: Optional[Dict[str, Any]] = None) -> Optional[int]:
+    """
+    Queue a job of ``kind`` and return its id.
+
+    Returns ``None`` when a job of the same kind is already queued or running.
+    """
+    sweep(app)
+    conn = _connect(app)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO jobs (kind, params, message)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (kind) WHERE status IN ('queued', 'running') DO NOTHING
+                RETURNING id;
+            """, (kind, Jsonb(params or {}), "Queued."))
+            row = cur.fetchone()
+            if row:
+                _notify(cur, {"id": row[0], "kind": kind, "status": "queued",
+                              "message": "Queued."})
+        conn.commit()
+        return row[0] if row else None
+    finally:
+        conn.close()
+
+
+def get_job(app, job_id: int) -> Optional[Dict[str, Any]]:
+    """Return one job as a dict, or ``None`` if it does not exist."""
+    conn = _connect(app)
+    try:
+        with conn.cursor(row_factory=dict_row) as cur:
+            cur.execute("SELECT * FROM jobs WHERE id = %s;", (job_id,))
+            return cur.fetchone()
+    finally:
+        conn.close()
+
+
+def dashboard_state(app=None) -> Dict[str, Any]:
+    """
+    Return the busy flag, last pull message and last analysis result in one query.
+
+    Keys: ``pull_running``, ``pull_message``, ``pull_job_id``, ``last_analysis``.
+    """
+    conn = _connect(app)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT
+                  (SELECT status FROM jobs WHERE kind = 'pull' ORDER BY id DESC LIMIT 1),
+                  (SELECT message FROM jobs WHERE kind = 'pull' ORDER BY id DESC LIMIT 1),
+                  (SELECT id FROM jobs WHERE kind = 'pull' ORDER BY id DESC LIMIT 1),
+                  (SELECT result FROM jobs WHERE kind = 'analysis' AND status = 'succeeded'
+                   ORDER BY id DESC LIMIT 1);
+            """)
+            status, message, job_id, analysis = cur.fetchone()
+    finally:
+        conn.close()
+    return {
+        "pull_running": status in ACTIVE_STATUSES,
+        "pull_message": message or "No load has been run yet.",
+        "pull_job_id": job_id,
+        "last_analysis": analysis,
+    }
+
+
+def request_cancel(app, job_id: int) -> Optional[str]:
+    """
+    Ask a job to stop. A queued job is cancelled immediately; a running job
+    stops at its next cancellation check.
+
+    Returns the job's status after the request, or ``None`` if it does not exist.
+    """
+    conn = _connect(app)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                UPDATE jobs
+                SET cancel_requested = (status IN ('queued', 'running')),
+                    status = CASE WHEN status = 'queued' THEN 'cancelled' ELSE status END,
+                    message = CASE WHEN status = 'queued' THEN 'Cancelled before start.'
+                                   ELSE message END,
+                    finished_at = CASE WHEN status = 'queued' THEN now() ELSE finished_at END,
+                    updated_at = now()
+                WHERE id = %s
+                RETURNING id, kind, status, stage, progress, message;
+            """, (job_id,))
+            row = cur.fetchone()
+            if row:
+                _notify(cur, dict(zip(("id", "kind", "status", "stage", "progress", "message"),
+                                      row)))
+        conn.commit()
+        return row[2] if row else None
+    finally:
+        conn.close()
+
+
+def claim_next(app=None, worker: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Atomically move the oldest queued job to ``running`` and return it."""
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    conn = _connect(app)
+    try:
+        with conn.cursor(row_factory=dict_row) as cur:
+            cur.execute("""
+                UPDATE jobs
+                SET status = 'running', worker = %s, message = 'Running...',
+                    started_at = now(), updated_at = now()
+                WHERE id = (
+                    SELECT id FROM jobs WHERE status = 'queued'
+                    ORDER BY id FOR UPDATE SKIP LOCKED LIMIT 1
+                )
+                RETURNING *;
+            """, (worker,))
+            job = cur.fetchone()
+        conn.commit()
+        return job
+    finally:
+        conn.close()
+
+
+@contextmanager
+def subscribe(app=None):
+    """
+    ``LISTEN`` on ``EVENTS_CHANNEL`` for the duration of the block.
+
+    Yields ``events(heartbeat)``, a generator of event dicts that yields
+    ``None`` whenever ``heartbeat`` seconds pass without one. The connection
+    is idle while waiting, so subscribers put no query load on the database.
+    Subscribe *before* reading the current state so no event is missed.
+    """
+    conn = _connect(app)
+    try:
+        conn.autocommit = True
+        conn.execute(f"LISTEN {EVENTS_CHANNEL};")
+
+        def events(heartbeat: float = 15.0):
+            while True:
+                idle = True
+                for note in conn.notifies(timeout=heartbeat, stop_after=1):
+                    idle = False
+                    yield json.loads(note.payload)
+                if idle:
+                    yield None
+
+        yield events
+    finally:
+        conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Execution
+# ---------------------------------------------------------------------------
+
+class JobContext:
+    """
+    Handle given to a runner: records stage transitions, per-stage timings and
+    counters on the job row, and exposes cooperative cancellation.
+
+    All writes for the job share one connection, opened on the first write
+    and closed by :func:`run_job` once the job has finished.
+    """
+
+    def __init__(self, app, job: Dict[str, Any]):
+        self.app = app
+        self.job = job
+        self.stage_name: Optional[str] = None
+        self.counters: Dict[str, Any] = {}
+        self.timings: Dict[str, float] = {}
+        self._conn = None
+        self._last_write = 0.0
+
+    @property
+    def job_id(self) -> int:
+        """Id of the job row."""
+        return self.job["id"]
+
+    @property
+    def kind(self) -> Optional[str]:
+        """Job kind, i.e. the ``RUNNERS`` key."""
+        return self.job.get("kind")
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        """Parameters the job was enqueued with."""
+        return self.job.get("params") or {}
+
+    def execute(self, query: str, args: tuple, event: Dict[str, Any]) -> Optional[tuple]:
+        """Run one job-row statement and publish ``event`` in the same transaction.
+
+        Returns the statement's first row. A connection that fails is closed
+        and reopened by the next call.
+        """
+        if self._conn is None:
+            self._conn = get_conn(self.app)
+        try:
+            with self._conn.cursor() as cur:
+                cur.execute(query, args)
+                row = cur.fetchone() if cur.description else None
+                _notify(cur, event)
+            self._conn.commit()
+        except Exception:
+            self.close()
+            raise
+        return row
+
+    def close(self) -> None:
+        """Close the job's connection, if one is open."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _write(self) -> bool:
+        """Persist stage/progress/timings; return whether cancel was requested."""
+        row = self.execute("""
+            UPDATE jobs
+            SET stage = %s, progress = %s, timings = %s, updated_at = now()
+            WHERE id = %s
+            RETURNING cancel_requested;
+        """, (self.stage_name, Jsonb(self.counters),
+              Jsonb({k: round(v, 4) for k, v in self.timings.items()}),
+              self.job_id), self.event("running"))
+        self._last_write = time.monotonic()
+        return bool(row and row[0])
+
+    def event(self, status: str, message: Optional[str] = None) -> Dict[str, Any]:
+        """Event payload describing this job's current stage and counters."""
+        return {"id": self.job_id, "kind": self.kind, "status": status,
+                "stage": self.stage_name, "progress": self.counters, "message": message}
+
+    def check_cancel(self) -> None:
+        """Raise :class:`JobCancelled` if a cancel was requested for this job."""
+        if self._write():
+            raise JobCancelled()
+
+    def progress(self, force: bool = False, **counters: Any) -> None:
+        """Update counters; written to the job row at most every ``PROGRESS_INTERVAL``."""
+        self.counters.update(counters)
+        if force or time.monotonic() - self._last_write >= PROGRESS_INTERVAL:
+            if self._write():
+                raise JobCancelled()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mark ``name`` as the current stage and record its wall-clock time."""
+        self.stage_name = name
+        self.check_cancel()
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+        self._write()
+
+
+def _finish(ctx: JobContext, status: str, message: str, result=None) -> None:
+    ctx.execute("""
+        UPDATE jobs
+        SET status = %s, message = %s, result = %s, stage = %s,
+            progress = %s, timings = %s,
+            finished_at = now(), updated_at = now()
+        WHERE id = %s;
+    """, (status, message, Jsonb(to_jsonable(result)) if result is not None else None,
+          ctx.stage_name, Jsonb(ctx.counters), Jsonb({k: round(v, 4) for k, v in ctx.timings.items()}),
+          ctx.job_id), ctx.event(status, message))
+
+
+def run_job(app, job: Dict[str, Any]) -> str:
+    """Execute a claimed job with its registered runner; return the final status."""
+    ctx = JobContext(app, job)
+    runner = RUNNERS.get(job["kind"])
+    try:
+        if runner is None:
+            raise RuntimeError(f"no runner registered for job kind {job['kind']!r}")
+        result = runner(app, ctx)
+        status, message = "succeeded", (result or {}).pop("message", "Done.")
+    except JobCancelled:
+        result, status, message = None, "cancelled", "Cancelled."
+    except Exception as exc:
+        result, status, message = None, "failed", f"{exc}"
+    try:
+        _finish(ctx, status, message, result)
+    finally:
+        ctx.close()
+    return status
+
+
+def run_next(app=None, worker: Optional[str] = None) -> bool:
+    """Claim and run one queued job; return ``False`` if the queue was empty."""
+    job = claim_next(app, worker)
+    if job is None:
+        return False
+    run_job(app, job)
+    return True
+
+
+def worker_loop(app=None, poll_interval: float = 1.0, once: bool = False) -> None:
+    """Run queued jobs until interrupted (or after one attempt with ``once``).
+
+    Every poll starts with a :func:`sweep` of stale jobs and load runs.
+    """
+    while True:
+        sweep(app)
+        ran = run_next(app)
+        if once:
+            return
+        if not ran:
+            time.sleep(poll_interval)
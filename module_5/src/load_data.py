@@ -14,9 +14,15 @@ import json
 import os
 import re
 from datetime import datetime
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional, Tuple
 
 import psycopg  # psycopg3
+from psycopg import sql
+
+import changes
+import profiling
+from db_utils import duckdb_url
+from records import FIELDS, Applicant, intern
 
 # ---------------------------------------------------------------------------
 # Paths
@@ -47,7 +53,21 @@ def _build_conninfo(app=None) -> str:
 
 def get_conn(app=None):
     """Open and return a psycopg3 connection."""
-    return psycopg.connect(_build_conninfo(app))
+    return profiling.connect(_build_conninfo(app), app)
+
+
+LAYOUTS = ("wide", "normalized", "partitioned")
+
+
+def applicants_layout(app=None) -> str:
+    """``APPLICANTS_LAYOUT``: ``wide`` (default), ``normalized`` or ``partitioned``."""
+    layout = (app.config.get("APPLICANTS_LAYOUT") if app else None) or os.getenv("APPLICANTS_LAYOUT")
+    return layout or "wide"
+
+
+def normalized_layout(app=None) -> bool:
+    """True when ``APPLICANTS_LAYOUT=normalized`` (lookup tables, see ``dimensions.py``)."""
+    return applicants_layout(app) == "normalized"
 
 
 # ---------------------------------------------------------------------------
@@ -260,43 +280,141 @@ def ensure_table(app=None):
     """
     Create the ``applicants`` table and its unique index if they do not exist.
 
+    With the normalized layout this creates the lookup tables,
+    ``applicant_facts`` and the ``applicants`` view instead; with the
+    partitioned layout a term-partitioned ``applicants``. Either converts an
+    existing wide table. Every layout gets the ``load_runs`` table and the
+    ``load_run_id`` / ``loaded_at`` columns of the change feed (see
+    ``changes.py``). Safe to call repeatedly (idempotent).
+    """
+    duck = duckdb_url(app)
+    if duck:
+        import duckdb_backend
+        duckdb_backend.ensure_table(duck)
+        return
+    conn = get_conn(app)
+    try:
+        with conn.cursor() as cur:
+            layout = applicants_layout(app)
+            if layout == "normalized":
+                import dimensions
+                dimensions.ensure_schema(cur)
+            elif layout == "partitioned":
+                import partitions
+                partitions.ensure_schema(cur)
+            else:
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS applicants (
+                        p_id                    SERIAL PRIMARY KEY,
+                        program                 TEXT,
+                        comments                TEXT,
+                        date_added              DATE,
+                        url                     TEXT,
+                        status                  TEXT,
+                        term                    TEXT,
+                        us_or_international     TEXT,
+                        gpa                     NUMERIC,
+                        gre                     NUMERIC,
+                        gre_v                   NUMERIC,
+                        gre_aw                  NUMERIC,
+                        degree                  TEXT,
+                        llm_generated_program   TEXT,
+                        llm_generated_university TEXT
+                    );
+                """)
+                cur.execute("""
+                    CREATE UNIQUE INDEX IF NOT EXISTS applicants_sig_unique
+                    ON applicants (
+                        COALESCE(url, ''),
+                        COALESCE(program, ''),
+                        COALESCE(comments, '')
+                    );
+                """)
+            changes.ensure_schema(cur, "applicant_facts" if layout == "normalized" else "applicants")
+        conn.commit()
+    finally:
+        conn.close()
+    ensure_data_version(app)
+
+
+DATA_VERSION_SQL = """
+CREATE TABLE IF NOT EXISTS data_version (
+    id         BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version    BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+INSERT INTO data_version (id) VALUES (TRUE) ON CONFLICT DO NOTHING;
+
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_proc WHERE proname = 'bump_data_version') THEN
+    CREATE FUNCTION bump_data_version() RETURNS trigger LANGUAGE plpgsql AS $f$
+    BEGIN
+      UPDATE data_version SET version = version + 1, updated_at = now();
+      RETURN NULL;
+    END $f$;
+  END IF;
+
+  IF NOT EXISTS (SELECT 1 FROM pg_proc WHERE proname = 'bump_data_version_if_changed') THEN
+    CREATE FUNCTION bump_data_version_if_changed() RETURNS trigger LANGUAGE plpgsql AS $f$
+    BEGIN
+      IF EXISTS (SELECT 1 FROM changed) THEN
+        UPDATE data_version SET version = version + 1, updated_at = now();
+      END IF;
+      RETURN NULL;
+    END $f$;
+  END IF;
+
+  IF NOT EXISTS (SELECT 1 FROM pg_trigger
+                 WHERE tgrelid = '{table}'::regclass
+                   AND tgname = 'applicants_version_ins') THEN
+    CREATE TRIGGER applicants_version_ins AFTER INSERT ON {table}
+      REFERENCING NEW TABLE AS changed
+      FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version_if_changed();
+    CREATE TRIGGER applicants_version_upd AFTER UPDATE ON {table}
+      REFERENCING NEW TABLE AS changed
+      FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version_if_changed();
+    CREATE TRIGGER applicants_version_del AFTER DELETE ON {table}
+      REFERENCING OLD TABLE AS changed
+      FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version_if_changed();
+    CREATE TRIGGER applicants_version_trunc AFTER TRUNCATE ON {table}
+      FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+  END IF;
+END $$;
+"""
+
+
+def ensure_data_version(app=None):
+    """
+    Create the single-row ``data_version`` counter and the statement-level
+    triggers that bump it whenever ``applicants`` actually changes.
+
+    Inserts skipped by ``ON CONFLICT DO NOTHING`` do not bump the version, so
+    re-loading the same data keeps cached metrics (and their ETag) valid.
+    With the normalized layout the triggers sit on ``applicant_facts``.
     Safe to call repeatedly (idempotent).
     """
+    table = "applicant_facts" if normalized_layout(app) else "applicants"
     conn = get_conn(app)
     try:
         with conn.cursor() as cur:
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS applicants (
-                    p_id                    SERIAL PRIMARY KEY,
-                    program                 TEXT,
-                    comments                TEXT,
-                    date_added              DATE,
-                    url                     TEXT,
-                    status                  TEXT,
-                    term                    TEXT,
-                    us_or_international     TEXT,
-                    gpa                     NUMERIC,
-                    gre                     NUMERIC,
-                    gre_v                   NUMERIC,
-                    gre_aw                  NUMERIC,
-                    degree                  TEXT,
-                    llm_generated_program   TEXT,
-                    llm_generated_university TEXT
-                );
-            """)
-            cur.execute("""
-                CREATE UNIQUE INDEX IF NOT EXISTS applicants_sig_unique
-                ON applicants (
-                    COALESCE(url, ''),
-                    COALESCE(program, ''),
-                    COALESCE(comments, '')
-                );
-            """)
+            cur.execute(DATA_VERSION_SQL.format(table=table))
         conn.commit()
     finally:
         conn.close()
 
 
+def get_data_version(app=None) -> int:
+    """Return the current ``data_version`` counter."""
+    conn = get_conn(app)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT version FROM data_version;")
+            return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
 def ensure_index(app=None):
     """
     Deduplicate existing rows and ensure the unique index exists.
@@ -304,7 +422,15 @@ def ensure_index(app=None):
     Used by ``main()`` before bulk-inserting to guarantee idempotency on
     tables that may have been populated without the index.
     """
-    sql = """
+    duck = duckdb_url(app)
+    if duck:  # DuckDB de-duplicates on insert; there is no index to build
+        import duckdb_backend
+        duckdb_backend.ensure_table(duck)
+        return
+    if applicants_layout(app) != "wide":  # created with their unique index
+        ensure_table(app)
+        return
+    index_sql = """
     DO $$
     BEGIN
       WITH ranked AS (
@@ -338,94 +464,380 @@ def ensure_index(app=None):
     conn = get_conn(app)
     try:
         with conn.cursor() as cur:
-            cur.execute(sql)
+            cur.execute(index_sql)
+            changes.ensure_schema(cur)
         conn.commit()
     finally:
         conn.close()
+    ensure_data_version(app)
 
 
 # ---------------------------------------------------------------------------
-# Main ETL entry-point
+# Record normalisation / insertion
 # ---------------------------------------------------------------------------
 
-def main(app=None, jsonl_path: Optional[str] = None):
+# One statement per batch, the columns passed as arrays: ``executemany``
+# would send one INSERT per row and fire the statement-level data_version
+# triggers once per row.
+INSERT_SQL = """
+INSERT INTO applicants (
+    program, comments, date_added, url,
+    status, term, us_or_international,
+    gpa, gre, gre_v, gre_aw,
+    degree, llm_generated_program, llm_generated_university
+)
+SELECT * FROM unnest(
+    %s::text[], %s::text[], %s::date[], %s::text[],
+    %s::text[], %s::text[], %s::text[],
+    %s::numeric[], %s::numeric[], %s::numeric[], %s::numeric[],
+    %s::text[], %s::text[], %s::text[])
+ON CONFLICT DO NOTHING;
+"""
+
+
+def normalize_record(r: Dict[str, Any]) -> Applicant:
     """
-    Load records from the LLM-extended JSONL file into PostgreSQL.
+    Turn one raw/LLM-extended record into the parameter tuple for ``INSERT_SQL``.
 
-    Parameters
-    ----------
-    app :
-        Optional Flask app whose ``config["DATABASE_URL"]`` overrides the
-        default connection string.
-    jsonl_path :
-        Path to the JSONL file.  Defaults to ``LIV_LLM_JSONL``.
+    Accepts both the hyphenated (``llm-generated-program``) and underscored
+    key styles, and derives term/status/nationality/GPA/GRE from the combined
+    free text when they are not given explicitly. The result is a compact
+    :class:`records.Applicant` whose categorical strings are interned, so
+    buffered rows share one object per distinct status/term/degree/university.
     """
-    path = jsonl_path or LIV_LLM_JSONL
-    if not os.path.exists(path):
-        raise FileNotFoundError(
-            f"Missing JSONL at {path}\n"
-            "Fix: copy module_2/llm_extend_applicant_data.json → module_4/data/"
-        )
+    program  = clean_text(r.get("program"))
+    comments = clean_text(r.get("comments"))
+    url      = clean_text(r.get("url"))
+    date_added = parse_date(r.get("date_added") or r.get("date_added_raw"))
 
-    ensure_index(app)
+    deg      = normalize_degree(r.get("masters_or_phd") or r.get("degree"))
+    llm_prog = clean_text(r.get("llm-generated-program") or r.get("llm_generated_program"))
+    llm_uni  = clean_text(r.get("llm-generated-university") or r.get("llm_generated_university"))
+
+    status   = clean_text(r.get("status"))
+    combined = " ".join(filter(None, [program, comments, status, llm_prog, llm_uni]))
+
+    term = extract_term(combined)
+    if term is None and date_added and date_added.year == 2026:
+        term = FALL_2026
+
+    if not status:
+        status = extract_status(combined)
+    us_intl = extract_us_intl(combined)
+    gpa, gre_q, gre_v, gre_aw = extract_gpa_gre(combined)
 
-    insert_sql = """
-    INSERT INTO applicants (
+    return Applicant(
         program, comments, date_added, url,
-        status, term, us_or_international,
-        gpa, gre, gre_v, gre_aw,
-        degree, llm_generated_program, llm_generated_university
+        intern(status), intern(term), intern(us_intl),
+        gpa, gre_q, gre_v, gre_aw,
+        intern(deg), llm_prog, intern(llm_uni),
     )
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-    ON CONFLICT DO NOTHING;
+
+
+def _write_rows(cur, rows) -> int:
+    """Insert ``rows`` (``INSERT_SQL`` parameter tuples) with one statement; return how many were new."""
+    cur.execute(INSERT_SQL, [list(column) for column in zip(*rows)])
+    return cur.rowcount
+
+
+def _batch_writer(layout: str) -> Callable[[Any, list], int]:
+    """``write(cur, rows) -> inserted`` for one :func:`insert_records` call into ``layout``."""
+    if layout == "normalized":
+        import dimensions
+        return dimensions.Encoder().write
+    if layout == "partitioned":
+        import partitions
+        partitioner = partitions.Partitioner()
+
+        def write(cur, rows):
+            partitioner.ensure_rows(cur, rows)
+            return _write_rows(cur, rows)
+        return write
+    return _write_rows
+
+
+class LoadOptions(NamedTuple):
     """
+    Optional inputs and hooks of :func:`insert_records`.
+
+    ``batch_size`` defaults to 500 rows for PostgreSQL and to DuckDB's much
+    larger Arrow batches. ``on_batch(read_rows, inserted)`` is called after
+    every batch is written. Pass ``normalize=None`` when the records already
+    are ``INSERT_SQL`` parameter tuples. ``source`` is recorded in
+    ``load_runs``.
+    """
+
+    batch_size: Optional[int] = None
+    on_batch: Optional[Callable[[int, int], None]] = None
+    normalize: Optional[Callable[[Any], tuple]] = normalize_record
+    source: Optional[str] = None
+
 
+def insert_records(app, records: Iterable[Dict[str, Any]], options: Optional[LoadOptions] = None):
+    """
+    Normalise and insert ``records`` (any iterable, consumed lazily) in batches.
+
+    Returns ``(read_rows, inserted)``. Duplicates are skipped by the unique
+    index, so re-running with the same input is a no-op. Batch size, the
+    per-batch hook, normalisation and the run's source come from
+    ``options`` (see :class:`LoadOptions`).
+    With the normalized layout the rows go straight into ``applicant_facts``,
+    their names replaced by ids from a per-load ``dimensions.Encoder`` cache;
+    with the partitioned layout missing year partitions are created first.
+
+    On PostgreSQL the call is one load run (``changes.py``). ``source`` is
+    recorded in ``load_runs`` and the run id is stamped on every inserted
+    row. The run is finished in the same transaction as the rows, or marked
+    failed if the load raises. A ``changes.Heartbeat`` after each batch keeps
+    a long load from being reaped as stale.
+    """
+    batch_size, on_batch, normalize, source = options or LoadOptions()
+    duck = duckdb_url(app)
+    if duck:
+        import duckdb_backend
+        return duckdb_backend.insert_records(duck, records, batch_size or duckdb_backend.BATCH_SIZE,
+                                             on_batch, normalize)
+    batch_size = batch_size or 500
     inserted = 0
     read_rows = 0
-
+    batch: list = []
+    layout = applicants_layout(app)
+    normalized = layout == "normalized"
+    write = _batch_writer(layout)
+    run_id = changes.start_run(app, source)
+    heartbeat = changes.Heartbeat(app, run_id)
     conn = get_conn(app)
     try:
         with conn.cursor() as cur:
-            for r in load_jsonl(path):
+            changes.stamp(cur, run_id)
+            for r in records:
                 read_rows += 1
+                batch.append(normalize(r) if normalize else r)
+                if len(batch) >= batch_size:
+                    inserted += write(cur, batch)
+                    batch.clear()
+                    heartbeat.beat()
+                    if on_batch is not None:
+                        on_batch(read_rows, inserted)
+            if batch:
+                inserted += write(cur, batch)
+                if on_batch is not None:
+                    on_batch(read_rows, inserted)
+            if normalized and inserted:
+                import dimensions
+                cur.execute(dimensions.ANALYZE_SQL)  # plans through the view need row counts
+            changes.finish_run(cur, run_id, read_rows, inserted)
+        conn.commit()
+    except BaseException as exc:
+        conn.rollback()
+        changes.fail_run(app, run_id, exc)
+        raise
+    finally:
+        heartbeat.close()
+        conn.close()
+    return read_rows, inserted
+
+
+# ---------------------------------------------------------------------------
+# Refresh mode: upsert re-standardized rows
+# ---------------------------------------------------------------------------
+
+# What a new run of the LLM standardizer changes.
+REFRESH_COLUMNS = ("llm_generated_program", "llm_generated_university")
+# The unique signature: it identifies a row, so it is never refreshed.
+SIGNATURE_COLUMNS = ("url", "program", "comments")
+
+STAGE_TABLE = "applicants_stage"
+
+_STAGE_SQL = """
+CREATE TEMP TABLE {stage} ON COMMIT DROP AS SELECT {fields} FROM applicants WITH NO DATA;
+ALTER TABLE {stage} ADD COLUMN ord BIGINT GENERATED ALWAYS AS IDENTITY;
+"""
+
+# The last copy of a signature wins; ON CONFLICT cannot touch a row twice.
+_DEDUPE_SQL = """
+DELETE FROM {stage} WHERE ord NOT IN (
+    SELECT DISTINCT ON ({key}) ord FROM {stage} ORDER BY {key}, ord DESC);
+ANALYZE {stage};
+"""
+
+_DIFF_SQL = """
+SELECT COUNT(*), COUNT(*) FILTER (WHERE ({current}) IS DISTINCT FROM ({staged})), {per_column}
+FROM {stage} s JOIN applicants a ON {match};
+"""
+
+_UPSERT_SQL = """
+INSERT INTO applicants ({fields}) SELECT {fields} FROM {stage}
+ON CONFLICT ({key}) DO UPDATE
+SET {sets}, load_run_id = EXCLUDED.load_run_id, loaded_at = EXCLUDED.loaded_at
+WHERE ({current}) IS DISTINCT FROM ({excluded});
+"""
+
 
-                program  = clean_text(r.get("program"))
-                comments = clean_text(r.get("comments"))
-                url      = clean_text(r.get("url"))
-                date_added = parse_date(r.get("date_added") or r.get("date_added_raw"))
+def _signature(layout: str, alias: Optional[str] = None) -> list:
+    """The unique-index expressions of ``layout``, optionally on ``alias``."""
+    def col(name):
+        return sql.Identifier(alias, name) if alias else sql.Identifier(name)
+    key = [sql.SQL("COALESCE({}, '')").format(col(c)) for c in SIGNATURE_COLUMNS]
+    if layout == "partitioned":
+        key.append(col("term"))
+    return key
 
-                deg      = normalize_degree(r.get("masters_or_phd") or r.get("degree"))
-                llm_prog = clean_text(r.get("llm-generated-program") or r.get("llm_generated_program"))
-                llm_uni  = clean_text(r.get("llm-generated-university") or r.get("llm_generated_university"))
 
-                status   = clean_text(r.get("status"))
-                combined = " ".join(filter(None, [program, comments, status, llm_prog, llm_uni]))
+def _row(alias: str, names: Iterable[str]) -> sql.Composed:
+    return sql.SQL(", ").join(sql.Identifier(alias, c) for c in names)
 
-                term = extract_term(combined)
-                if term is None and date_added and date_added.year == 2026:
-                    term = FALL_2026
 
-                if not status:
-                    status = extract_status(combined)
-                us_intl = extract_us_intl(combined)
-                gpa, gre_q, gre_v, gre_aw = extract_gpa_gre(combined)
+def _diff_sql(layout: str, columns: Tuple[str, ...], stage: sql.Identifier) -> sql.Composed:
+    """Count the staged rows that match a stored one, and how many of them change ``columns``."""
+    match = [sql.SQL("{} = {}").format(a, s) for a, s in zip(_signature("wide", "a"), _signature("wide", "s"))]
+    if layout == "partitioned":
+        match.append(sql.SQL("a.term IS NOT DISTINCT FROM s.term"))
+    return sql.SQL(_DIFF_SQL).format(
+        current=_row("a", columns), staged=_row("s", columns), stage=stage,
+        per_column=sql.SQL(", ").join(
+            sql.SQL("COUNT(*) FILTER (WHERE a.{c} IS DISTINCT FROM s.{c})").format(c=sql.Identifier(c))
+            for c in columns),
+        match=sql.SQL(" AND ").join(match))
 
-                cur.execute(insert_sql, (
-                    program, comments, date_added, url,
-                    status, term, us_intl,
-                    gpa, gre_q, gre_v, gre_aw,
-                    deg, llm_prog, llm_uni,
-                ))
-                inserted += cur.rowcount
 
+def upsert_records(app, records: Iterable[Any], columns: Iterable[str] = REFRESH_COLUMNS,
+                   normalize: Optional[Callable[[Any], tuple]] = normalize_record,
+                   source: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Insert new ``records`` and refresh ``columns`` of the ones already stored.
+
+    Meant for re-running the LLM standardizer: the rows are copied into a
+    temporary staging table and merged with one ``INSERT … ON CONFLICT DO
+    UPDATE`` whose ``WHERE … IS DISTINCT FROM`` skips rows whose values did
+    not change: those keep their tuple and ``load_run_id``, and a refresh
+    that changes nothing leaves the ``data_version`` alone. Changed rows are
+    stamped with this load run and show up in the change feed. With the
+    normalized layout refreshed names are written as lookup keys.
+
+    Returns ``{"read", "inserted", "updated", "unchanged", "changed"}``, where
+    ``changed`` counts the updated rows per column. The signature columns
+    (and ``term`` on the partitioned layout, as it picks the partition) cannot
+    be refreshed. PostgreSQL only.
+    """
+    if duckdb_url(app):
+        raise ValueError("refresh mode needs PostgreSQL")
+    layout = applicants_layout(app)
+    columns = tuple(columns)
+    fixed = SIGNATURE_COLUMNS + (("term",) if layout == "partitioned" else ())
+    bad = [c for c in columns if c not in FIELDS or c in fixed]
+    if bad or not columns:
+        raise ValueError(f"cannot refresh {', '.join(bad) or 'no columns'}")
+
+    stage = sql.Identifier(STAGE_TABLE)
+    fields = sql.SQL(", ").join(map(sql.Identifier, FIELDS))
+    key = sql.SQL(", ").join(_signature(layout))
+
+    diff = _diff_sql(layout, columns, stage)
+    if layout == "normalized":
+        import dimensions
+        merge = dimensions.upsert_sql(STAGE_TABLE, columns)
+    else:
+        merge = sql.SQL(_UPSERT_SQL).format(
+            fields=fields, stage=stage, key=key, current=_row("applicants", columns),
+            excluded=_row("excluded", columns),
+            sets=sql.SQL(", ").join(sql.SQL("{c} = EXCLUDED.{c}").format(c=sql.Identifier(c)) for c in columns))
+
+    run_id = changes.start_run(app, source)
+    heartbeat = changes.Heartbeat(app, run_id)
+    conn = get_conn(app)
+    try:
+        with conn.cursor() as cur:
+            changes.stamp(cur, run_id)
+            cur.execute(sql.SQL(_STAGE_SQL).format(stage=stage, fields=fields))
+            read_rows = 0
+            with cur.copy(sql.SQL("COPY {} ({}) FROM STDIN").format(stage, fields)) as copy:
+                for r in records:
+                    read_rows += 1
+                    copy.write_row(normalize(r) if normalize else r)
+                    heartbeat.beat()
+            cur.execute(sql.SQL(_DEDUPE_SQL).format(stage=stage, key=key))
+            if layout == "partitioned":
+                import partitions
+                cur.execute(sql.SQL("SELECT DISTINCT term FROM {};").format(stage))
+                partitions.Partitioner().ensure(cur, [t for (t,) in cur.fetchall()])
+            elif layout == "normalized":
+                cur.execute(sql.SQL(dimensions.STAGE_LOOKUPS_SQL).format(stage=stage))
+            cur.execute(diff)
+            matched, updated, *per_column = cur.fetchone()
+            cur.execute(merge)
+            inserted = cur.rowcount - updated
+            changes.finish_run(cur, run_id, read_rows, inserted, updated)
         conn.commit()
+    except BaseException as exc:
+        conn.rollback()
+        changes.fail_run(app, run_id, exc)
+        raise
     finally:
+        heartbeat.close()
         conn.close()
+    return {"read": read_rows, "inserted": inserted, "updated": updated,
+            "unchanged": matched - updated, "changed": dict(zip(columns, per_column))}
+
+
+# ---------------------------------------------------------------------------
+# Main ETL entry-point
+# ---------------------------------------------------------------------------
+
+def main(app=None, jsonl_path: Optional[str] = None, refresh: Optional[Iterable[str]] = None):
+    """
+    Load records from the LLM-extended JSONL file into PostgreSQL (or into
+    DuckDB when ``DATABASE_URL`` is a ``duckdb:`` URL).
+
+    Parameters
+    ----------
+    app :
+        Optional Flask app whose ``config["DATABASE_URL"]`` overrides the
+        default connection string.
+    jsonl_path :
+        Path to the JSONL file.  Defaults to ``LIV_LLM_JSONL``. A ``.parquet``
+        file written by ``columnar.write_applicants`` is loaded as-is.
+    refresh :
+        Columns to refresh on rows that already exist (``upsert_records``),
+        e.g. ``REFRESH_COLUMNS`` after re-running the LLM standardizer.
+        By default existing rows are skipped.
+    """
+    path = jsonl_path or LIV_LLM_JSONL
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"Missing JSONL at {path}\n"
+            "Fix: copy module_2/llm_extend_applicant_data.json → module_4/data/"
+        )
+
+    ensure_index(app)
+    if path.endswith(".parquet"):
+        import arrow_schema
+        records, normalize = arrow_schema.iter_applicant_rows(path), None
+    else:
+        records, normalize = load_jsonl(path), normalize_record
+    if refresh:
+        result = upsert_records(app, records, refresh, normalize=normalize, source=os.path.basename(path))
+        read_rows, inserted = result["read"], result["inserted"]
+    else:
+        read_rows, inserted = insert_records(
+            app, records, LoadOptions(normalize=normalize, source=os.path.basename(path)))
 
     print("=== load_data.py completed ===")
     print(f"  Read rows  : {read_rows}")
     print(f"  Inserted   : {inserted}")
+    if refresh:
+        print(f"  Updated    : {result['updated']}")
+        print(f"  Unchanged  : {result['unchanged']}")
+        for column, count in result["changed"].items():
+            print(f"    {column:<26} {count}")
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Load the LLM-extended applicant data.")
+    parser.add_argument("path", nargs="?", help=f"JSONL or .parquet file (default: {LIV_LLM_JSONL})")
+    parser.add_argument("--refresh", nargs="?", const=",".join(REFRESH_COLUMNS), metavar="COLUMNS",
+                        help="update these comma-separated columns of existing rows "
+                             f"(default: {','.join(REFRESH_COLUMNS)})")
+    args = parser.parse_args()
+    main(jsonl_path=args.path, refresh=args.refresh.split(",") if args.refresh else None)
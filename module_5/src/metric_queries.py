@@ -0,0 +1,112 @@
+"""
+metric_queries.py – The Q1–Q10 dashboard metrics as data.
+
+``app.fetch_metrics()`` runs :data:`METRIC_QUERIES` against PostgreSQL,
+``async_app`` runs them concurrently and ``duckdb_backend.fetch_metrics()``
+against a DuckDB file; ``columnar.compute_metrics()`` computes the same
+dictionary from Parquet. They all start from :func:`default_metrics`.
+"""
+from psycopg import sql
+
+FALL_2026 = "Fall 2026"
+
+def default_metrics():
+    """Metric values shown when the database is empty or unreachable."""
+    return {
+        "fall_2026": 0, "pct_intl": None, "avg_gpa": None, "avg_gre": None,
+        "avg_gre_v": None, "avg_gre_aw": None, "avg_gpa_american_fall": None,
+        "acceptance_pct": None, "avg_gpa_accepted": None,
+        "q7": 0, "q8": 0, "q9": 0,
+        "q10a_title": "Top 5 terms by volume", "q10a_rows": [],
+        "q10b_title": "Top 5 universities in Fall 2026", "q10b_rows": [],
+        "term_dist": [], "decision_dist": [],
+    }
+
+# (metric key, query, params, mode). Every query is independent, so the sync
+# path runs them in order on one connection and async_app.py runs them
+# concurrently. Modes: "one" → first column of first row, "count" → same but
+# None becomes 0, "all" → every row.
+METRIC_QUERIES = [
+    ("fall_2026", "SELECT COUNT(*) FROM applicants WHERE term = %s LIMIT 1;", (FALL_2026,), "count"),
+    ("pct_intl", """
+        SELECT ROUND(
+            100.0 * SUM(CASE WHEN us_or_international ILIKE 'International%%' THEN 1 ELSE 0 END)
+            / NULLIF(SUM(CASE WHEN us_or_international IS NOT NULL
+                                  AND us_or_international <> '' THEN 1 ELSE 0 END), 0), 2)
+        FROM applicants;
+    """, (), "one"),
+] + [
+    (key, sql.SQL(
+        "SELECT ROUND(AVG({col})::numeric, 3) FROM applicants WHERE {col} IS NOT NULL"
+    ).format(col=sql.Identifier(col)), (), "one")
+    for col, key in [("gpa","avg_gpa"),("gre","avg_gre"),("gre_v","avg_gre_v"),("gre_aw","avg_gre_aw")]
+] + [
+    ("avg_gpa_american_fall", """
+        SELECT ROUND(AVG(gpa)::numeric, 3) FROM applicants
+        WHERE term = %s AND us_or_international ILIKE 'American%%' AND gpa IS NOT NULL;
+    """, (FALL_2026,), "one"),
+    ("acceptance_pct", """
+        SELECT ROUND(
+            100.0 * SUM(CASE WHEN status ILIKE 'Accepted%%' THEN 1 ELSE 0 END)
+            / NULLIF(SUM(CASE WHEN status ILIKE 'Accepted%%' OR status ILIKE 'Rejected%%'
+                OR status ILIKE 'Waitlisted%%' OR status ILIKE 'Interview%%'
+                THEN 1 ELSE 0 END), 0), 2)
+        FROM applicants WHERE term = %s;
+    """, (FALL_2026,), "one"),
+    ("avg_gpa_accepted", """
+        SELECT ROUND(AVG(gpa)::numeric, 3) FROM applicants
+        WHERE term = %s AND status ILIKE 'Accepted%%' AND gpa IS NOT NULL;
+    """, (FALL_2026,), "one"),
+    ("q7", """
+        SELECT COUNT(*) FROM applicants
+        WHERE (program ILIKE '%%johns hopkins%%' OR program ILIKE '%%jhu%%'
+            OR llm_generated_university ILIKE '%%johns hopkins%%')
+        AND (program ILIKE '%%computer science%%' OR comments ILIKE '%%computer science%%'
+            OR llm_generated_program ILIKE '%%computer science%%')
+        AND (degree ILIKE 'Master%%' OR program ILIKE '%%master%%');
+    """, (), "count"),
+    ("q8", """
+        SELECT COUNT(*) FROM applicants
+        WHERE status ILIKE 'Accepted%%'
+        AND date_added >= DATE '2026-01-01' AND date_added < DATE '2027-01-01'
+        AND (program ILIKE '%%computer science%%' OR comments ILIKE '%%computer science%%')
+        AND (degree = 'PhD' OR program ILIKE '%%phd%%')
+        AND (program ILIKE '%%mit%%' OR program ILIKE '%%stanford%%'
+            OR program ILIKE '%%carnegie mellon%%' OR program ILIKE '%%georgetown%%');
+    """, (), "count"),
+    ("q9", """
+        SELECT COUNT(*) FROM applicants
+        WHERE status ILIKE 'Accepted%%'
+        AND date_added >= DATE '2026-01-01' AND date_added < DATE '2027-01-01'
+        AND (llm_generated_program ILIKE '%%computer science%%' OR program ILIKE '%%computer science%%')
+        AND (degree = 'PhD' OR program ILIKE '%%phd%%')
+        AND (llm_generated_university ILIKE '%%mit%%' OR llm_generated_university ILIKE '%%stanford%%'
+            OR llm_generated_university ILIKE '%%carnegie mellon%%'
+            OR program ILIKE '%%mit%%' OR program ILIKE '%%stanford%%');
+    """, (), "count"),
+    ("q10a_rows", """
+        SELECT COALESCE(NULLIF(term,''), 'No term detected'), COUNT(*)::int
+        FROM applicants GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 5;
+    """, (), "all"),
+    ("q10b_rows", """
+        SELECT COALESCE(NULLIF(llm_generated_university,''), 'Unknown'), COUNT(*)::int
+        FROM applicants WHERE term = %s GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 5;
+    """, (FALL_2026,), "all"),
+    ("term_dist", """
+        SELECT COALESCE(NULLIF(term,''), 'No term detected'), COUNT(*)::int
+        FROM applicants GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 10;
+    """, (), "all"),
+    ("decision_dist", """
+        SELECT COALESCE(NULLIF(status,''), 'No status'), COUNT(*)::int
+        FROM applicants GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 10;
+    """, (), "all"),
+]
+
+def metric_value(mode, rows):
+    """Reduce the fetched ``rows`` of one METRIC_QUERIES entry to its value."""
+    if mode == "all":
+        return rows
+    value = rows[0][0] if rows else None
+    if mode == "count":
+        return value or 0
+    return value
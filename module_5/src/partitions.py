@@ -0,0 +1,230 @@
+"""
+partitions.py – Term-partitioned ``applicants`` table for PostgreSQL.
+
+With ``APPLICANTS_LAYOUT=partitioned`` the table is declared
+``PARTITION BY LIST (term)`` with one partition per admission year
+(``applicants_y2026`` holds ``Spring/Summer/Fall/Winter 2026``) and an
+``applicants_default`` partition for rows without a recognisable term.
+Queries that filter on ``term = %s`` – most of the dashboard metrics and
+``/api/aggregate?term=…`` – only scan that year's partition, however many
+years of history the table keeps.
+
+- :class:`Partitioner` creates missing year partitions while loading;
+  ``load_data.insert_records`` calls :meth:`Partitioner.ensure_rows` before
+  each batch. Rows that already
+  sit in the default partition for a new year are moved into it.
+- :func:`detach_before` is the retention step. Old years are detached,
+  which is a catalog-only change, and then moved to the ``applicants_archive``
+  schema or dropped. ``python src/partitions.py retain --before 2020`` runs
+  it from the shell, and ``python src/partitions.py list`` shows the
+  partitions.
+
+The unique index must contain the partition key, so it is on
+``(url, program, comments, term)`` with ``NULLS NOT DISTINCT``
+(PostgreSQL 15+). ``term`` is derived from the record itself, so the same
+record always lands on the same key. ``p_id`` keeps its sequence but is
+indexed rather than a primary key, for the same reason.
+"""
+
+import argparse
+import re
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+
+from psycopg import sql
+
+import changes
+import db_utils
+from records import FIELDS
+
+ARCHIVE_SCHEMA = "applicants_archive"
+SEASONS = ("Spring", "Summer", "Fall", "Winter")
+
+_YEAR_RE = re.compile(r"\b(\d{4})$")
+_PARTITION_RE = re.compile(r"^applicants_y(\d{4})$")
+_TERM = FIELDS.index("term")
+
+_TABLE_SQL = """
+CREATE SEQUENCE IF NOT EXISTS applicants_p_id_seq AS INTEGER;
+CREATE TABLE IF NOT EXISTS applicants (
+    p_id                    INTEGER NOT NULL DEFAULT nextval('applicants_p_id_seq'),
+    program                 TEXT,
+    comments                TEXT,
+    date_added              DATE,
+    url                     TEXT,
+    status                  TEXT,
+    term                    TEXT,
+    us_or_international     TEXT,
+    gpa                     NUMERIC,
+    gre                     NUMERIC,
+    gre_v                   NUMERIC,
+    gre_aw                  NUMERIC,
+    degree                  TEXT,
+    llm_generated_program   TEXT,
+    llm_generated_university TEXT
+) PARTITION BY LIST (term);
+ALTER SEQUENCE applicants_p_id_seq OWNED BY applicants.p_id;
+CREATE TABLE IF NOT EXISTS applicants_default PARTITION OF applicants DEFAULT;
+CREATE UNIQUE INDEX IF NOT EXISTS applicants_term_sig_unique
+ON applicants (COALESCE(url, ''), COALESCE(program, ''), COALESCE(comments, ''), term)
+NULLS NOT DISTINCT;
+CREATE INDEX IF NOT EXISTS applicants_p_id_idx ON applicants (p_id);
+"""
+
+# Serialises partition creation between concurrent loads (held to commit).
+_LOCK_SQL = "SELECT pg_advisory_xact_lock(hashtext('applicants_partitions'));"
+
+_PARTITIONS_SQL = """
+SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = 'applicants'::regclass ORDER BY c.relname;
+"""
+
+_BUMP_VERSION_SQL = "UPDATE data_version SET version = version + 1, updated_at = now();"
+
+
+def term_year(term: Optional[str]) -> Optional[int]:
+    """The admission year of a normalised term (``"Fall 2026"`` → 2026)."""
+    m = _YEAR_RE.search(term or "")
+    return int(m.group(1)) if m else None
+
+
+def partition_name(year: int) -> str:
+    """The table holding ``year``'s rows (``2026`` → ``applicants_y2026``)."""
+    return f"applicants_y{year}"
+
+
+def year_terms(year: int) -> Tuple[str, ...]:
+    """The ``term`` values stored in ``year``'s partition."""
+    return tuple(f"{season} {year}" for season in SEASONS)
+
+
+def partition_years(cur) -> List[int]:
+    """Years that have an attached partition."""
+    cur.execute(_PARTITIONS_SQL)
+    return [int(m.group(1)) for (name,) in cur.fetchall() if (m := _PARTITION_RE.match(name))]
+
+
+def create_partition(cur, year: int) -> bool:
+    """Attach ``year``'s partition, moving its rows out of the default one.
+
+    Returns False when it already exists (e.g. a concurrent load made it).
+    """
+    cur.execute(_LOCK_SQL)
+    name = partition_name(year)
+    cur.execute("SELECT to_regclass(%s) IS NOT NULL;", (name,))
+    if cur.fetchone()[0]:
+        return False
+    terms = list(year_terms(year))
+    ident = sql.Identifier(name)
+    cur.execute(sql.SQL("CREATE TABLE {} (LIKE applicants INCLUDING DEFAULTS);").format(ident))
+    cur.execute(sql.SQL("""
+        WITH moved AS (DELETE FROM applicants_default WHERE term = ANY(%s) RETURNING *)
+        INSERT INTO {} SELECT * FROM moved;""").format(ident), (terms,))
+    cur.execute(sql.SQL("ALTER TABLE applicants ATTACH PARTITION {} FOR VALUES IN ({});").format(
+        ident, sql.SQL(", ").join(map(sql.Literal, terms))))
+    return True
+
+
+def ensure_schema(cur) -> None:
+    """Create the partitioned ``applicants`` table.
+
+    An existing plain table is converted: its rows (and ``p_id`` values) are
+    copied into year partitions and the old table is dropped.
+    """
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('applicants');")
+    row = cur.fetchone()
+    if row is not None and row[0] == "r":
+        changes.ensure_columns(cur, "applicants")  # same trailing columns on both sides of the copy
+        cur.execute("ALTER TABLE applicants RENAME TO applicants_unpartitioned;")
+        cur.execute("ALTER INDEX IF EXISTS applicants_sig_unique RENAME TO applicants_unpartitioned_sig;")
+        cur.execute("ALTER INDEX IF EXISTS applicants_load_run_idx RENAME TO applicants_unpartitioned_load_run_idx;")
+        cur.execute(_TABLE_SQL)
+        changes.ensure_columns(cur, "applicants")
+        cur.execute("SELECT DISTINCT term FROM applicants_unpartitioned;")
+        for year in sorted({term_year(t) for (t,) in cur.fetchall()} - {None}):
+            create_partition(cur, year)
+        cur.execute("INSERT INTO applicants SELECT * FROM applicants_unpartitioned;")
+        cur.execute("DROP TABLE applicants_unpartitioned;")
+    else:
+        cur.execute(_TABLE_SQL)
+
+
+class Partitioner:
+    """Creates the year partitions a load needs; remembers the ones it has seen."""
+
+    def __init__(self):
+        self.years: Optional[Set[int]] = None
+
+    def ensure(self, cur, terms: Iterable[Optional[str]]) -> List[int]:
+        """Create partitions for the years in ``terms``; return the new ones."""
+        if self.years is None:
+            self.years = set(partition_years(cur))
+        missing = sorted({term_year(t) for t in terms} - self.years - {None})
+        created = [year for year in missing if create_partition(cur, year)]
+        self.years.update(missing)
+        return created
+
+    def ensure_rows(self, cur, rows: Iterable[Sequence]) -> List[int]:
+        """:meth:`ensure` for the terms of ``load_data.INSERT_SQL`` rows."""
+        return self.ensure(cur, {row[_TERM] for row in rows})
+
+
+def detach_before(cur, year: int, drop: bool = False) -> List[str]:
+    """Detach every year partition older than ``year``.
+
+    The detached tables move to the ``applicants_archive`` schema, or are
+    dropped with ``drop=True``. Both are catalog-only changes. The
+    ``data_version`` is bumped so cached metrics are recomputed.
+    """
+    old = [partition_name(y) for y in partition_years(cur) if y < year]
+    if not old:
+        return []
+    if not drop:
+        cur.execute(sql.SQL("CREATE SCHEMA IF NOT EXISTS {};").format(sql.Identifier(ARCHIVE_SCHEMA)))
+    for name in old:
+        ident = sql.Identifier(name)
+        cur.execute(sql.SQL("ALTER TABLE applicants DETACH PARTITION {};").format(ident))
+        if drop:
+            cur.execute(sql.SQL("DROP TABLE {};").format(ident))
+        else:
+            cur.execute(sql.SQL("ALTER TABLE {} SET SCHEMA {};").format(ident, sql.Identifier(ARCHIVE_SCHEMA)))
+    cur.execute(_BUMP_VERSION_SQL)
+    return old
+
+
+def partition_sizes(cur) -> List[Tuple[str, int]]:
+    """``(partition, estimated rows)`` for every attached partition."""
+    cur.execute("""
+        SELECT c.relname, GREATEST(c.reltuples, 0)::bigint
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'applicants'::regclass ORDER BY c.relname;""")
+    return cur.fetchall()
+
+
+def main(argv=None, app=None):
+    """``list`` prints the partitions; ``retain --before YEAR [--drop]`` detaches old years."""
+    parser = argparse.ArgumentParser(description="Partitions of the applicants table.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="show the partitions and their estimated row counts")
+    ret = sub.add_parser("retain", help="detach (archive or drop) partitions of old years")
+    ret.add_argument("--before", type=int, required=True, help="first year to keep")
+    ret.add_argument("--drop", action="store_true", help="drop the old partitions instead of archiving them")
+    args = parser.parse_args(argv)
+
+    conn = db_utils.get_conn(app)
+    try:
+        with conn.cursor() as cur:
+            if args.command == "list":
+                for name, rows in partition_sizes(cur):
+                    print(f"{name:<24} {rows:>10}")
+            else:
+                old = detach_before(cur, args.before, drop=args.drop)
+                where = "dropped" if args.drop else f"moved to {ARCHIVE_SCHEMA}"
+                print(f"{len(old)} partition(s) detached and {where}: {', '.join(old) or '-'}")
+        conn.commit()
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    main()
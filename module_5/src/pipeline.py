@@ -0,0 +1,219 @@
+"""
+pipeline.py – In-process Pull Data pipeline.
+
+Chains the Module 2 scraper, cleaner and LLM standardizer with the loader
+in ``load_data.py`` as generators inside one interpreter: each record flows
+scrape → clean → llm → load in memory, so the first rows are inserted while
+later pages are still being fetched and no stage pays interpreter start-up
+or re-imports bs4/llama_cpp/psycopg. File checkpoints between stages are
+optional (``checkpoint_dir``, as JSONL or Parquet).
+
+Every stage is wrapped in :meth:`Pipeline.stage`, which counts the records it
+yields and the time spent producing them. Because generators pull from their
+upstream, the time measured around ``next()`` is *inclusive*;
+:attr:`Pipeline.timings` subtracts the upstream stage to report the time
+spent in each stage itself.
+"""
+
+import importlib.util
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+import load_data
+
+DEFAULT_MAX_RECORDS = 200
+
+# Smaller than insert_records' default so rows_inserted progress moves often.
+LOAD_BATCH_SIZE = 100
+
+
+class PullOptions(NamedTuple):
+    """
+    Optional inputs and hooks of :func:`run_pull`.
+
+    ``source`` replaces the scraper (e.g. records already on disk); with
+    ``checkpoint_dir`` each stage's output is also written to
+    ``<checkpoint_dir>/<stage>.<checkpoint_format>`` (``jsonl`` or
+    ``parquet``). ``on_item(stage, count)`` fires for every record a stage
+    yields and, for ``load``, with the inserted count after each batch;
+    ``on_page(page, total)`` after each scraped page.
+    """
+
+    checkpoint_dir: Optional[str] = None
+    checkpoint_format: str = "jsonl"
+    source: Optional[Iterable[Dict[str, Any]]] = None
+    on_item: Optional[Callable[[str, int], None]] = None
+    on_page: Optional[Callable[[int, int], None]] = None
+
+
+class Pipeline:
+    """A linear chain of generator stages ending in a sink."""
+
+    def __init__(self, on_item: Optional[Callable[[str, int], None]] = None):
+        self.on_item = on_item
+        self.order: List[str] = []
+        self.counts: Dict[str, int] = {}
+        self._inclusive: Dict[str, float] = {}
+
+    def stage(self, name: str, records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Wrap ``records`` so items and time spent producing them are recorded."""
+        self.order.append(name)
+        self.counts[name] = 0
+        self._inclusive[name] = 0.0
+        return self._timed(name, iter(records))
+
+    def _timed(self, name: str, it: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        clock = time.perf_counter
+        while True:
+            start = clock()
+            try:
+                item = next(it)
+            except StopIteration:
+                self._inclusive[name] += clock() - start
+                return
+            self._inclusive[name] += clock() - start
+            self.counts[name] += 1
+            if self.on_item is not None:
+                self.on_item(name, self.counts[name])
+            yield item
+
+    def sink(self, name: str, consume: Callable[[Iterator[Dict[str, Any]]], Any],
+             records: Iterator[Dict[str, Any]]) -> Any:
+        """Run ``consume(records)`` to drive the whole chain; return its result."""
+        self.order.append(name)
+        start = time.perf_counter()
+        try:
+            return consume(records)
+        finally:
+            self._inclusive[name] = time.perf_counter() - start
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        """Seconds spent in each stage excluding its upstream stages."""
+        out: Dict[str, float] = {}
+        upstream = 0.0
+        for name in self.order:
+            inclusive = self._inclusive.get(name, 0.0)
+            out[name] = round(max(inclusive - upstream, 0.0), 4)
+            upstream = inclusive
+        return out
+
+
+# ---------------------------------------------------------------------------
+# Stages
+# ---------------------------------------------------------------------------
+
+_LOADED: Dict[str, Any] = {}
+
+
+def _import_path(name: str, path: str):
+    """Import ``path`` as module ``name`` (once per path), with its directory on sys.path."""
+    path = os.path.abspath(path)
+    if path in _LOADED:
+        return _LOADED[path]
+    directory = os.path.dirname(path)
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        sys.modules.pop(name, None)
+        raise
+    _LOADED[path] = module
+    return module
+
+
+def scrape_records(module2_dir: str, max_records: int = DEFAULT_MAX_RECORDS,
+                   on_page: Optional[Callable[[int, int], None]] = None):
+    """Raw survey records from ``module_2/scrape.py``, yielded page by page."""
+    scrape = _import_path("gradcafe_scrape", os.path.join(module2_dir, "scrape.py"))
+    return scrape.iter_records(max_records, on_page=on_page)
+
+
+def clean_records(module2_dir: str, records: Iterable[Dict[str, Any]]):
+    """Structured records via ``module_2/clean.py:clean_record``."""
+    clean = _import_path("gradcafe_clean", os.path.join(module2_dir, "clean.py"))
+    return (clean.clean_record(r) for r in records)
+
+
+def standardize_records(module2_dir: str, records: Iterable[Dict[str, Any]]):
+    """Add the llm-generated program/university fields via ``llm_hosting/app.py``."""
+    llm = _import_path("gradcafe_llm",
+                       os.path.join(module2_dir, "llm_hosting", "app.py"))
+    return (llm.standardize_row(r) for r in records)
+
+
+def checkpoint(records: Iterable[Dict[str, Any]], path: str) -> Iterator[Dict[str, Any]]:
+    """Pass records through unchanged while writing them to ``path`` as JSONL.
+
+    A ``.parquet`` path is written with ``columnar.write_records`` once the
+    stage is exhausted (the schema is inferred from all records, which are
+    buffered column-wise in a :class:`records.RecordColumns` meanwhile).
+    """
+    tmp = path + ".tmp"
+    if path.endswith(".parquet"):
+        import columnar
+        from records import RecordColumns
+        seen = RecordColumns()
+        for r in records:
+            seen.append(r)
+            yield r
+        columnar.write_records(seen, tmp)
+    else:
+        with open(tmp, "w", encoding="utf-8") as f:
+            for r in records:
+                f.write(json.dumps(r, ensure_ascii=False, default=str) + "\n")
+                yield r
+    os.replace(tmp, path)
+
+
+def run_pull(app, module2_dir: str, max_records: int = DEFAULT_MAX_RECORDS,
+             use_llm: bool = True, options: Optional[PullOptions] = None) -> Dict[str, Any]:
+    """
+    Run scrape → clean → llm → load in this process.
+
+    Checkpoints, a replacement source and progress callbacks come in
+    ``options`` (see :class:`PullOptions`). Returns per-stage counts, the
+    number of rows read/inserted by the loader and per-stage timings.
+    """
+    opts = options or PullOptions()
+    pipe = Pipeline(opts.on_item)
+    steps = [("clean", clean_records)]
+    if use_llm:
+        steps.append(("llm", standardize_records))
+
+    records = opts.source if opts.source is not None else scrape_records(module2_dir, max_records, opts.on_page)
+    if opts.checkpoint_dir:
+        os.makedirs(opts.checkpoint_dir, exist_ok=True)
+    records = pipe.stage("scrape", _checkpointed(records, opts.checkpoint_dir, "scrape", opts.checkpoint_format))
+    for name, build in steps:
+        records = pipe.stage(name, _checkpointed(build(module2_dir, records),
+                                                 opts.checkpoint_dir, name, opts.checkpoint_format))
+
+    def on_batch(_read, inserted):
+        if opts.on_item is not None:
+            opts.on_item("load", inserted)
+
+    load_data.ensure_index(app)
+    read_rows, inserted = pipe.sink(
+        "load", lambda recs: load_data.insert_records(
+            app, recs, load_data.LoadOptions(LOAD_BATCH_SIZE, on_batch, source="pull")),
+        records)
+    return {
+        "counts": dict(pipe.counts),
+        "rows_read": read_rows,
+        "rows_inserted": inserted,
+        "timings": pipe.timings,
+    }
+
+
+def _checkpointed(records, checkpoint_dir: Optional[str], name: str, fmt: str = "jsonl"):
+    if not checkpoint_dir:
+        return records
+    return checkpoint(records, os.path.join(checkpoint_dir, f"{name}.{fmt}"))
@@ -0,0 +1,245 @@
+"""
+profiling.py – Opt-in request profiling and query timing.
+
+With ``PROFILING`` enabled, :func:`init_app` gives every request a
+:class:`RequestProfile` that collects wall-clock timers (``connect``,
+``sql``, ``render``, ``total``) and one entry per SQL statement executed
+through :class:`TimedCursor`: a literal-free fingerprint of the SQL text,
+its duration and the rows it returned. Each response carries the timers in
+a ``Server-Timing`` header (shown by browser dev tools), and the per-query
+figures are aggregated per fingerprint for ``GET /debug/profile``.
+
+``POST /debug/profile/capture`` arms a cProfile run of the next request
+(optionally only for a given ``path``); its top functions by cumulative
+time are reported by ``/debug/profile`` afterwards.
+
+Connections only use :class:`TimedCursor` when opened through
+:func:`connect` for an app with ``PROFILING`` set, and timers are no-ops
+outside a profiled request, so the layer costs nothing when it is off.
+"""
+
+import contextlib
+import contextvars
+import cProfile
+import hashlib
+import io
+import pstats
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import psycopg
+from flask import before_render_template, jsonify, request, template_rendered
+from psycopg import sql
+
+RECENT_REQUESTS = 50
+MAX_SLOW_QUERIES = 100
+DEBUG_ENDPOINTS = ("debug_profile", "debug_profile_capture")
+CAPTURE_LINES = 40
+
+_current: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "request_profile", default=None)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def fingerprint(text: str) -> Dict[str, str]:
+    """Return the SQL with whitespace collapsed and literals replaced by ``?``, and its hash."""
+    normalized = _LITERALS.sub("?", " ".join(text.split()))
+    return {"fingerprint": hashlib.sha1(normalized.encode()).hexdigest()[:12],
+            "sql": normalized}
+
+
+class RequestProfile:
+    """Timers and executed queries for one request."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.started = time.perf_counter()
+        self.timers: Dict[str, float] = {}
+        self.queries: List[Dict[str, Any]] = []
+        self.render_started: Optional[float] = None
+        self.profiler: Optional[cProfile.Profile] = None
+
+    def add(self, name: str, seconds: float) -> None:
+        """Accumulate ``seconds`` under timer ``name``."""
+        self.timers[name] = self.timers.get(name, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        """The timers formatted as a ``Server-Timing`` header value."""
+        parts = [f"{name};dur={seconds * 1000:.2f}"
+                 for name, seconds in self.timers.items() if name != "sql"]
+        if "sql" in self.timers:
+            parts.append(f'sql;dur={self.timers["sql"] * 1000:.2f};desc="{len(self.queries)} queries"')
+        return ", ".join(parts)
+
+
+@contextlib.contextmanager
+def timer(name: str):
+    """Add the time spent in the block to timer ``name`` of the current request."""
+    prof = _current.get()
+    if prof is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        prof.add(name, time.perf_counter() - start)
+
+
+class TimedCursor(psycopg.Cursor):
+    """Client-side cursor that records each statement on the current request profile."""
+
+    def _timed(self, method, query, *args, **kwargs):
+        prof = _current.get()
+        if prof is None:
+            return method(query, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return method(query, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            prof.add("sql", elapsed)
+            if isinstance(query, sql.Composable):
+                query = query.as_string(self)
+            elif isinstance(query, bytes):
+                query = query.decode()
+            prof.queries.append({**fingerprint(query), "seconds": elapsed,
+                                 "rows": max(self.rowcount, 0)})
+
+    def execute(self, query, params=None, **kwargs):
+        return self._timed(super().execute, query, params, **kwargs)
+
+    def executemany(self, query, params_seq, **kwargs):
+        return self._timed(super().executemany, query, params_seq, **kwargs)
+
+
+def connect(conninfo: str, app=None) -> psycopg.Connection:
+    """``psycopg.connect`` that times the connect and queries when ``app`` is profiled."""
+    if app is None or not app.config.get("PROFILING"):
+        return psycopg.connect(conninfo)
+    with timer("connect"):
+        return psycopg.connect(conninfo, cursor_factory=TimedCursor)
+
+
+class ProfileStore:
+    """Per-app aggregate of query timings, recent requests and cProfile captures."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.queries: Dict[str, Dict[str, Any]] = {}
+        self.recent: deque = deque(maxlen=RECENT_REQUESTS)
+        self.capture_path: Optional[str] = None
+        self.capture_armed = False
+        self.last_capture: Optional[Dict[str, Any]] = None
+
+    def add(self, prof: RequestProfile) -> None:
+        """Fold a finished request into the aggregates."""
+        with self.lock:
+            self.requests += 1
+            self.recent.append({
+                "path": prof.path,
+                "timers_ms": {k: round(v * 1000, 3) for k, v in prof.timers.items()},
+                "queries": len(prof.queries),
+            })
+            for q in prof.queries:
+                agg = self.queries.setdefault(q["fingerprint"], {
+                    "fingerprint": q["fingerprint"], "sql": q["sql"],
+                    "calls": 0, "rows": 0, "total_ms": 0.0, "max_ms": 0.0,
+                })
+                ms = q["seconds"] * 1000
+                agg["calls"] += 1
+                agg["rows"] += q["rows"]
+                agg["total_ms"] += ms
+                agg["max_ms"] = max(agg["max_ms"], ms)
+
+    def top_queries(self, limit: int) -> List[Dict[str, Any]]:
+        """Query fingerprints ordered by total time, slowest first."""
+        with self.lock:
+            rows = sorted(self.queries.values(), key=lambda q: q["total_ms"], reverse=True)
+            return [{**q, "total_ms": round(q["total_ms"], 3), "max_ms": round(q["max_ms"], 3),
+                     "mean_ms": round(q["total_ms"] / q["calls"], 3)} for q in rows[:limit]]
+
+    def take_capture(self, path: str) -> bool:
+        """Consume the armed capture if it applies to ``path``."""
+        with self.lock:
+            if not self.capture_armed or self.capture_path not in (None, path):
+                return False
+            self.capture_armed = False
+            return True
+
+
+def _format_stats(profiler: cProfile.Profile) -> str:
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(CAPTURE_LINES)
+    return out.getvalue()
+
+
+def init_app(app) -> ProfileStore:
+    """Install the request hooks and ``/debug/profile`` routes on ``app``."""
+    store = ProfileStore()
+    app.extensions["profiling"] = store
+
+    @app.before_request
+    def _start_profile():
+        prof = RequestProfile(request.path)
+        _current.set(prof)
+        if request.endpoint not in DEBUG_ENDPOINTS and store.take_capture(request.path):
+            prof.profiler = cProfile.Profile()
+            prof.profiler.enable()
+
+    @app.after_request
+    def _finish_profile(response):
+        prof = _current.get()
+        if prof.profiler is not None:
+            prof.profiler.disable()
+            with store.lock:
+                store.last_capture = {"path": prof.path, "profiler": "cProfile",
+                                      "stats": _format_stats(prof.profiler)}
+        prof.add("total", time.perf_counter() - prof.started)
+        response.headers["Server-Timing"] = prof.server_timing()
+        if request.endpoint not in DEBUG_ENDPOINTS:
+            store.add(prof)
+        return response
+
+    @app.teardown_request
+    def _clear_profile(_exc):
+        _current.set(None)
+
+    def _before_render(_sender, **_extra):
+        prof = _current.get()
+        if prof is not None:
+            prof.render_started = time.perf_counter()
+
+    def _rendered(_sender, **_extra):
+        prof = _current.get()
+        if prof is not None and prof.render_started is not None:
+            prof.add("render", time.perf_counter() - prof.render_started)
+            prof.render_started = None
+
+    before_render_template.connect(_before_render, app, weak=False)
+    template_rendered.connect(_rendered, app, weak=False)
+
+    def debug_profile():
+        limit = max(1, min(request.args.get("limit", 20, type=int), MAX_SLOW_QUERIES))
+        with store.lock:
+            recent = list(store.recent)
+            summary = {"requests": store.requests, "capture": store.last_capture,
+                       "capture_armed": store.capture_armed}
+        return jsonify({**summary, "slow_queries": store.top_queries(limit),
+                        "recent": recent}), 200
+
+    def debug_profile_capture():
+        with store.lock:
+            store.capture_armed = True
+            store.capture_path = request.args.get("path") or None
+        return jsonify({"ok": True, "path": store.capture_path}), 202
+
+    app.add_url_rule("/debug/profile", "debug_profile", debug_profile, methods=["GET"])
+    app.add_url_rule("/debug/profile/capture", "debug_profile_capture",
+                     debug_profile_capture, methods=["POST"])
+    return store
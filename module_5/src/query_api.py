@@ -0,0 +1,296 @@
+"""
+query_api.py – Parameterized ad-hoc queries behind ``/api/applicants`` and
+``/api/aggregate``.
+
+Request arguments are mapped onto a fixed whitelist of columns, so callers
+choose *which* filters and groupings apply but never supply SQL: values are
+always bound parameters and identifiers come from :data:`FIELDS`.
+
+``/api/applicants`` pages with a keyset on ``p_id`` (``after=<last p_id>``)
+rather than OFFSET, so every page is an index range scan. Exports
+(``format=ndjson`` or ``csv``) read through a named server-side cursor and
+are streamed batch by batch, so neither the web process nor the database
+holds the whole result in memory.
+"""
+
+import csv
+import io
+import json
+import math
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from psycopg import sql
+
+import jobs
+from db_utils import clamp_limit, get_conn
+
+# Public field name → applicants column (filterable and groupable).
+FIELDS = {
+    "term": "term",
+    "status": "status",
+    "degree": "degree",
+    "nationality": "us_or_international",
+    "university": "llm_generated_university",
+    "program": "llm_generated_program",
+}
+
+
+def _number(value: str) -> float:
+    """Parse a finite number; ``nan``/``inf`` are as invalid as ``abc``."""
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(value)
+    return number
+
+
+# Range filters: argument → (column, operator, parser, what the value must be).
+# Values are parsed here so a bad one is a 400, not a database error.
+_NUMBER = (_number, "a number")
+_DATE = (date.fromisoformat, "a date (YYYY-MM-DD)")
+RANGE_FILTERS = {
+    "gpa_min": ("gpa", ">=", *_NUMBER), "gpa_max": ("gpa", "<=", *_NUMBER),
+    "gre_min": ("gre", ">=", *_NUMBER), "gre_max": ("gre", "<=", *_NUMBER),
+    "date_from": ("date_added", ">=", *_DATE), "date_to": ("date_added", "<=", *_DATE),
+}
+
+ACCEPTED = sql.SQL("status ILIKE 'Accepted%%'")
+DECIDED = sql.SQL("(status ILIKE 'Accepted%%' OR status ILIKE 'Rejected%%'"
+                  " OR status ILIKE 'Waitlisted%%' OR status ILIKE 'Interview%%')")
+
+# Aggregate name → SQL expression.
+AGGREGATES = {
+    "count": sql.SQL("COUNT(*)::int"),
+    "accepted": sql.SQL("(COUNT(*) FILTER (WHERE {}))::int").format(ACCEPTED),
+    "acceptance_rate": sql.SQL(
+        "ROUND(100.0 * COUNT(*) FILTER (WHERE {}) / NULLIF(COUNT(*) FILTER (WHERE {}), 0), 2)"
+    ).format(ACCEPTED, DECIDED),
+}
+AGGREGATES.update({
+    f"avg_{col}": sql.SQL("ROUND(AVG({})::numeric, 3)").format(sql.Identifier(col))
+    for col in ("gpa", "gre", "gre_v", "gre_aw")
+})
+DEFAULT_AGGREGATES = ("count", "acceptance_rate")
+
+APPLICANT_COLUMNS = (
+    "p_id", "program", "comments", "date_added", "url", "status", "term",
+    "us_or_international", "gpa", "gre", "gre_v", "gre_aw", "degree",
+    "llm_generated_program", "llm_generated_university",
+)
+
+FORMATS = ("json", "ndjson", "csv")
+CONTROL_ARGS = {"after", "limit", "format", "group_by", "metrics", "since", "until"}
+# The control arguments each endpoint takes; the others are a 400 there.
+APPLICANTS_ARGS = frozenset({"after", "limit", "format"})
+CHANGES_ARGS = APPLICANTS_ARGS | {"since", "until"}
+AGGREGATE_ARGS = frozenset({"limit", "format", "group_by", "metrics"})
+MAX_PAGE_SIZE = 1000
+DEFAULT_PAGE_SIZE = 100
+EXPORT_BATCH_SIZE = 2000
+
+
+class QueryError(ValueError):
+    """Raised for request arguments outside the whitelist (HTTP 400)."""
+
+
+def _split(value: str) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def parse_format(args) -> str:
+    """Return the requested output format (``json`` by default)."""
+    fmt = args.get("format", "json")
+    if fmt not in FORMATS:
+        raise QueryError(f"format must be one of {', '.join(FORMATS)}")
+    return fmt
+
+
+def build_filters(args, control: frozenset = frozenset()) -> Tuple[List[sql.Composable], List[Any]]:
+    """
+    Build WHERE conditions from whitelisted filter arguments.
+
+    Field filters repeat or comma-separate for ``IN`` semantics
+    (``status=Accepted&status=Rejected``); range filters compare against a
+    single number or ISO date. ``control`` names the :data:`CONTROL_ARGS`
+    the endpoint takes. Unknown arguments, control arguments the endpoint
+    does not take and range values that do not parse raise :class:`QueryError`.
+    """
+    clauses: List[sql.Composable] = []
+    params: List[Any] = []
+    for name in args:
+        if name in control:
+            continue
+        if name in CONTROL_ARGS:
+            raise QueryError(f"{name} is not supported by this endpoint")
+        if name in FIELDS:
+            values = [v for raw in args.getlist(name) for v in _split(raw)]
+            clauses.append(sql.SQL("{} = ANY(%s)").format(sql.Identifier(FIELDS[name])))
+            params.append(values)
+        elif name in RANGE_FILTERS:
+            column, op, parse, expected = RANGE_FILTERS[name]
+            try:
+                params.append(parse(args[name].strip()))
+            except ValueError as exc:
+                raise QueryError(f"{name} must be {expected}") from exc
+            clauses.append(sql.SQL("{} {} %s").format(sql.Identifier(column), sql.SQL(op)))
+        else:
+            raise QueryError(f"unknown filter: {name}")
+    return clauses, params
+
+
+def _where(clauses: List[sql.Composable]) -> sql.Composable:
+    if not clauses:
+        return sql.SQL("")
+    return sql.SQL(" WHERE ") + sql.SQL(" AND ").join(clauses)
+
+
+def page_size(args) -> int:
+    """The ``limit`` argument clamped to 1..:data:`MAX_PAGE_SIZE`."""
+    return clamp_limit(args.get("limit", DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE)
+
+
+def _keyset_query(args, paged: bool, columns: Tuple[str, ...], clauses: List[sql.Composable],
+                  params: List[Any]) -> Tuple[sql.Composable, List[Any], Tuple[str, ...]]:
+    if "after" in args:
+        try:
+            params.append(int(args["after"]))
+        except ValueError as exc:
+            raise QueryError("after must be an integer p_id") from exc
+        clauses.append(sql.SQL("p_id > %s"))
+    query = sql.SQL("SELECT {} FROM applicants{} ORDER BY p_id").format(
+        sql.SQL(", ").join(map(sql.Identifier, columns)), _where(clauses))
+    if paged:
+        query += sql.SQL(" LIMIT %s")
+        params.append(page_size(args))
+    return query, params, columns
+
+
+def applicants_query(args, paged: bool) -> Tuple[sql.Composable, List[Any], Tuple[str, ...]]:
+    """
+    Return ``(query, params, columns)`` for ``/api/applicants``.
+
+    Rows are ordered by ``p_id``; ``after`` continues from a previous page's
+    last id. ``paged`` queries are limited to ``limit`` (clamped to
+    1..:data:`MAX_PAGE_SIZE`), exports are not.
+    """
+    clauses, params = build_filters(args, APPLICANTS_ARGS)
+    return _keyset_query(args, paged, APPLICANT_COLUMNS, clauses, params)
+
+
+def change_window(args, watermark: int) -> Tuple[int, int]:
+    """``(since, until)`` load run ids for ``/api/changes``; ``until`` defaults to ``watermark``."""
+    try:
+        since = int(args.get("since", 0))
+        until = int(args.get("until", watermark))
+    except (TypeError, ValueError) as exc:
+        raise QueryError("since and until must be integer load run ids") from exc
+    return since, min(until, watermark)
+
+
+def changes_query(args, paged: bool, watermark: int) -> Tuple[sql.Composable, List[Any], Tuple[str, ...]]:
+    """
+    Return ``(query, params, columns)`` for ``/api/changes``.
+
+    Selects the rows of load runs ``since < load_run_id <= until`` (see
+    :func:`change_window`) with their ``load_run_id`` and ``loaded_at``,
+    keyset-paged on ``p_id`` like :func:`applicants_query`. Keep ``until``
+    fixed while paging through one window.
+    """
+    since, until = change_window(args, watermark)
+    clauses, params = build_filters(args, CHANGES_ARGS)
+    clauses.append(sql.SQL("load_run_id > %s AND load_run_id <= %s"))
+    params += [since, until]
+    columns = APPLICANT_COLUMNS + ("load_run_id", "loaded_at")
+    return _keyset_query(args, paged, columns, clauses, params)
+
+
+def aggregate_query(args, paged: bool) -> Tuple[sql.Composable, List[Any], Tuple[str, ...]]:
+    """
+    Return ``(query, params, columns)`` for ``/api/aggregate``.
+
+    ``group_by`` and ``metrics`` are comma-separated names from
+    :data:`FIELDS` and :data:`AGGREGATES`; groups are ordered by size.
+    """
+    group_by = _split(args.get("group_by", ""))
+    if not group_by:
+        raise QueryError("group_by is required")
+    metrics = _split(args.get("metrics", "")) or list(DEFAULT_AGGREGATES)
+    for name in group_by:
+        if name not in FIELDS:
+            raise QueryError(f"cannot group by {name}")
+    for name in metrics:
+        if name not in AGGREGATES:
+            raise QueryError(f"unknown metric: {name}")
+
+    clauses, params = build_filters(args, AGGREGATE_ARGS)
+    select = [sql.SQL("{} AS {}").format(sql.Identifier(FIELDS[g]), sql.Identifier(g))
+              for g in group_by]
+    select += [sql.SQL("{} AS {}").format(AGGREGATES[m], sql.Identifier(m)) for m in metrics]
+    positions = sql.SQL(", ").join(sql.Literal(i) for i in range(1, len(group_by) + 1))
+    query = sql.SQL(
+        "SELECT {select} FROM applicants{where} GROUP BY {groups} ORDER BY COUNT(*) DESC, {groups}"
+    ).format(select=sql.SQL(", ").join(select), where=_where(clauses), groups=positions)
+    if paged:
+        query += sql.SQL(" LIMIT %s")
+        params.append(page_size(args))
+    return query, params, tuple(group_by + metrics)
+
+
+def fetch_page(app, query, params) -> List[Tuple]:
+    """Run a bounded query and return all of its rows."""
+    with get_conn(app) as conn, conn.cursor() as cur:
+        cur.execute(query, params)
+        return cur.fetchall()
+
+
+def stream_rows(app, query, params, name: str = "api_export",
+                batch_size: Optional[int] = None) -> Iterator[List[Tuple]]:
+    """
+    Yield the rows of ``query`` in batches from a named server-side cursor.
+
+    The connection stays open (inside one read transaction) until the
+    generator is exhausted or closed, e.g. when the client disconnects.
+    """
+    batch_size = batch_size or EXPORT_BATCH_SIZE
+    conn = get_conn(app)
+    try:
+        with conn.cursor(name=name) as cur:
+            cur.itersize = batch_size
+            cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+    finally:
+        conn.close()
+
+
+def to_records(columns: Sequence[str], rows) -> List[Dict[str, Any]]:
+    """Rows as JSON-safe dicts keyed by ``columns``."""
+    return [jobs.to_jsonable(dict(zip(columns, row))) for row in rows]
+
+
+def encode_ndjson(columns: Sequence[str], batches: Iterator[List[Tuple]]) -> Iterator[str]:
+    """One JSON object per line, one chunk per batch."""
+    for rows in batches:
+        yield "".join(json.dumps(rec) + "\n" for rec in to_records(columns, rows))
+
+
+def encode_csv(columns: Sequence[str], batches: Iterator[List[Tuple]]) -> Iterator[str]:
+    """A header line, then one CSV chunk per batch."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    yield buf.getvalue()
+    for rows in batches:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(rows)
+        yield buf.getvalue()
+
+
+ENCODERS = {
+    "ndjson": (encode_ndjson, "application/x-ndjson"),
+    "csv": (encode_csv, "text/csv"),
+}
@@ -0,0 +1,165 @@
+"""
+records.py – Compact in-memory representations of applicant records.
+
+The Module 2 stages hand records around as dicts with up to 20 string keys,
+a cleaned record carrying both the raw and the structured fields. Streaming
+one record at a time that is harmless, but wherever rows are *held* (load
+batches, Parquet/DuckDB writers, checkpoints) this module stores them
+compactly instead:
+
+- :class:`Applicant` is the ``INSERT_SQL`` row as a ``NamedTuple`` (no
+  per-instance ``__dict__``). ``load_data.normalize_record`` returns it, so
+  load batches hold these instead of dicts.
+- :class:`ApplicantBatch` stores many applicants column-wise: scores in
+  ``array('d')`` (NaN for NULL), dates as ordinals in ``array('i')`` and the
+  low-cardinality columns (status, term, nationality, degree, university)
+  as ``array('i')`` codes into a list of interned labels. The Parquet writer
+  and the DuckDB loader build Arrow dictionary arrays straight from it.
+- :class:`RecordColumns` buffers arbitrary dict records (the scrape/clean
+  checkpoints) as one list per key, interning categorical values.
+
+``python benchmarks/record_memory.py`` measures the bytes per record of
+each representation.
+"""
+
+import math
+import sys
+from array import array
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+
+class Applicant(NamedTuple):
+    """One ``applicants`` row, in ``load_data.INSERT_SQL`` column order."""
+
+    program: Optional[str]
+    comments: Optional[str]
+    date_added: Optional[date]
+    url: Optional[str]
+    status: Optional[str]
+    term: Optional[str]
+    us_or_international: Optional[str]
+    gpa: Optional[float]
+    gre: Optional[float]
+    gre_v: Optional[float]
+    gre_aw: Optional[float]
+    degree: Optional[str]
+    llm_generated_program: Optional[str]
+    llm_generated_university: Optional[str]
+
+
+FIELDS = Applicant._fields
+CATEGORICAL = ("status", "term", "us_or_international", "degree", "llm_generated_university")
+NUMERIC = ("gpa", "gre", "gre_v", "gre_aw")
+TEXT = tuple(f for f in FIELDS if f not in CATEGORICAL + NUMERIC + ("date_added",))
+
+# Keys of the raw/cleaned/LLM dicts whose values repeat across records.
+CATEGORICAL_KEYS = frozenset(CATEGORICAL + (
+    "status_raw", "US/International", "Degree", "masters_or_phd",
+    "llm-generated-university", "date_added_raw",
+))
+
+_INDEX = {name: i for i, name in enumerate(FIELDS)}
+
+
+def intern(value: Any) -> Any:
+    """``sys.intern`` for strings; anything else is returned unchanged."""
+    # sys.intern rejects str subclasses; str() of a plain str is the same object.
+    return sys.intern(str(value)) if isinstance(value, str) else value
+
+
+class ApplicantBatch:
+    """Applicant rows stored column-wise; iterating yields :class:`Applicant` tuples."""
+
+    __slots__ = ("text", "codes", "labels", "numbers", "dates", "_lookup")
+
+    def __init__(self, rows: Iterable[Sequence[Any]] = ()):
+        self.text: Dict[str, List[Optional[str]]] = {name: [] for name in TEXT}
+        self.codes: Dict[str, array] = {name: array("i") for name in CATEGORICAL}
+        self.labels: Dict[str, List[str]] = {name: [] for name in CATEGORICAL}
+        self.numbers: Dict[str, array] = {name: array("d") for name in NUMERIC}
+        self.dates = array("i")  # date.toordinal(); 0 is NULL
+        self._lookup: Dict[str, Dict[str, int]] = {name: {} for name in CATEGORICAL}
+        self.extend(rows)
+
+    def append(self, row: Sequence[Any]) -> None:
+        """Add one ``INSERT_SQL`` parameter tuple (or :class:`Applicant`)."""
+        for name in TEXT:
+            self.text[name].append(row[_INDEX[name]])
+        for name in CATEGORICAL:
+            value = row[_INDEX[name]]
+            if value is None:
+                self.codes[name].append(-1)
+                continue
+            lookup = self._lookup[name]
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(self.labels[name])
+                self.labels[name].append(intern(value))
+            self.codes[name].append(code)
+        for name in NUMERIC:
+            value = row[_INDEX[name]]
+            self.numbers[name].append(math.nan if value is None else float(value))
+        day = row[_INDEX["date_added"]]
+        self.dates.append(day.toordinal() if day is not None else 0)
+
+    def extend(self, rows: Iterable[Sequence[Any]]) -> None:
+        """Add every row of ``rows``, as :meth:`append` does."""
+        for row in rows:
+            self.append(row)
+
+    def clear(self) -> None:
+        """Drop the rows; the label dictionaries are kept for the next batch."""
+        for col in self.text.values():
+            col.clear()
+        for name in CATEGORICAL:
+            self.codes[name] = array("i")
+        for name in NUMERIC:
+            self.numbers[name] = array("d")
+        self.dates = array("i")
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __iter__(self) -> Iterator[Applicant]:
+        columns = []
+        for name in FIELDS:
+            if name in self.text:
+                columns.append(self.text[name])
+            elif name in self.codes:
+                labels = self.labels[name]
+                columns.append([labels[c] if c >= 0 else None for c in self.codes[name]])
+            elif name in self.numbers:
+                columns.append([None if math.isnan(v) else v for v in self.numbers[name]])
+            else:
+                columns.append([date.fromordinal(d) if d else None for d in self.dates])
+        return (Applicant._make(values) for values in zip(*columns))
+
+
+class RecordColumns:
+    """Arbitrary dict records buffered as one list per key (missing keys are None)."""
+
+    __slots__ = ("columns", "rows")
+
+    def __init__(self, records: Iterable[Dict[str, Any]] = ()):
+        self.columns: Dict[str, List[Any]] = {}
+        self.rows = 0
+        for r in records:
+            self.append(r)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Add one record; earlier rows get None for a key seen for the first time."""
+        columns = self.columns
+        for key, value in record.items():
+            col = columns.get(key)
+            if col is None:
+                col = columns[key] = [None] * self.rows
+            col.append(intern(value) if key in CATEGORICAL_KEYS else value)
+        self.rows += 1
+        if len(record) < len(columns):
+            for col in columns.values():
+                if len(col) < self.rows:
+                    col.append(None)
+
+    def __len__(self) -> int:
+        return self.rows
@@ -0,0 +1,68 @@
+"""
+snapshot.py – Pre-rendered dashboard snapshots on disk.
+
+The ``analysis`` job computes the metrics once per data version, renders the
+metrics part of the dashboard (``templates/_metrics.html``) and writes both to
+``<SNAPSHOT_DIR>/dashboard.json`` together with the ``data_version`` they were
+computed at. ``/`` then embeds the stored HTML instead of querying and
+rendering Q1–Q10 on every request.
+
+Writes go to a temporary file in the same directory followed by
+``os.replace``, so readers see either the previous snapshot or the new one,
+never a partial file. Reads are cached in memory until the file's mtime or
+size changes, so a request costs one ``stat()``.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+SNAPSHOT_FILE = "dashboard.json"
+
+_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+_cache_lock = threading.Lock()
+
+
+def snapshot_path(directory: str) -> str:
+    """Path of the dashboard snapshot inside ``directory``."""
+    return os.path.join(directory, SNAPSHOT_FILE)
+
+
+def write_snapshot(directory: str, version: Optional[int], metrics: Dict[str, Any],
+                   html: str) -> Dict[str, Any]:
+    """Atomically replace the snapshot in ``directory``; return what was written."""
+    os.makedirs(directory, exist_ok=True)
+    snap = {"version": version, "created_at": time.time(), "metrics": metrics, "html": html}
+    fd, tmp = tempfile.mkstemp(prefix=".dashboard-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(snap, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, snapshot_path(directory))
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return snap
+
+
+def read_snapshot(directory: str) -> Optional[Dict[str, Any]]:
+    """Return the current snapshot in ``directory``, or None if there is none."""
+    path = snapshot_path(directory)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        cached = _cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with open(path, encoding="utf-8") as f:
+        snap = json.load(f)
+    with _cache_lock:
+        _cache[path] = (key, snap)
+    return snap
@@ -0,0 +1,198 @@
+"""
+stats.py – GPA/GRE distributions computed with NumPy from one table scan.
+
+The dashboard's averages each cost a SQL round trip. This module reads the
+numeric columns once, together with small integer codes for nationality,
+degree and decision, into NumPy arrays:
+
+- PostgreSQL: a single ``COPY (SELECT ...) TO STDOUT (FORMAT BINARY)``. Every
+  column is fixed-width (NULL numbers are sent as NaN, categories as
+  ``int2`` codes), so the whole stream is parsed with one
+  ``numpy.frombuffer`` call against a structured dtype.
+- DuckDB (``duckdb:`` URL): the same SELECT via ``fetchnumpy()``.
+- A Parquet file from ``columnar.write_applicants``: Arrow kernels.
+
+:func:`compute` then derives percentiles, histograms, per-group means and
+the acceptance rate per GPA bucket with vectorized NumPy. ``app.py`` caches
+the result per ``data_version`` and serves it on ``/`` and ``/api/stats``.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import load_data
+
+NUMERIC = ("gpa", "gre", "gre_v", "gre_aw")
+NATIONALITY = ("Unknown", "American", "International")
+DEGREE = ("Other", "PhD", "Masters", "Bachelors")
+OUTCOME = ("No decision", "Accepted", "Rejected", "Waitlisted", "Interview")
+CODES = ("nationality", "degree", "outcome")
+
+PERCENTILES = (10, 25, 50, 75, 90)
+HISTOGRAM_EDGES = {
+    "gpa": np.linspace(2.0, 4.0, 21),
+    "gre": np.arange(130, 172, 2),
+    "gre_v": np.arange(130, 172, 2),
+    "gre_aw": np.arange(0.0, 6.5, 0.5),
+}
+GPA_BUCKETS = (0.0, 3.0, 3.25, 3.5, 3.75, 4.0)
+
+SELECT_SQL = """
+SELECT COALESCE(gpa::float8, 'NaN') AS gpa, COALESCE(gre::float8, 'NaN') AS gre,
+       COALESCE(gre_v::float8, 'NaN') AS gre_v, COALESCE(gre_aw::float8, 'NaN') AS gre_aw,
+       (CASE WHEN us_or_international ILIKE 'American%' THEN 1
+             WHEN us_or_international ILIKE 'International%' THEN 2 ELSE 0 END)::int2 AS nationality,
+       (CASE WHEN degree = 'PhD' THEN 1 WHEN degree = 'Masters' THEN 2
+             WHEN degree = 'Bachelors' THEN 3 ELSE 0 END)::int2 AS degree,
+       (CASE WHEN status ILIKE 'Accepted%' THEN 1 WHEN status ILIKE 'Rejected%' THEN 2
+             WHEN status ILIKE 'Waitlisted%' THEN 3 WHEN status ILIKE 'Interview%' THEN 4
+             ELSE 0 END)::int2 AS outcome
+FROM applicants
+"""
+COPY_SQL = f"COPY ({SELECT_SQL}) TO STDOUT (FORMAT BINARY)"
+
+# One binary COPY tuple: field count, then (length, value) per column.
+ROW_DTYPE = np.dtype(
+    [("fields", ">i2")]
+    + [f for name in NUMERIC for f in ((f"{name}_len", ">i4"), (name, ">f8"))]
+    + [f for name in CODES for f in ((f"{name}_len", ">i4"), (name, ">i2"))]
+)
+_SIGNATURE = b"PGCOPY\n\xff\r\n\0"
+
+
+# ---------------------------------------------------------------------------
+# Loading columns
+# ---------------------------------------------------------------------------
+
+def parse_copy(data) -> Dict[str, np.ndarray]:
+    """Columns from a ``COPY ... (FORMAT BINARY)`` stream of :data:`SELECT_SQL` rows."""
+    buf = memoryview(data)
+    if bytes(buf[:11]) != _SIGNATURE:
+        raise ValueError("not a PostgreSQL binary COPY stream")
+    start = 19 + int.from_bytes(buf[15:19], "big")  # signature, flags, header extension
+    count = (len(buf) - start - 2) // ROW_DTYPE.itemsize  # 2-byte trailer
+    rows = np.frombuffer(buf, ROW_DTYPE, count=count, offset=start)
+    return {name: rows[name].astype(np.float64 if name in NUMERIC else np.int16)
+            for name in NUMERIC + CODES}
+
+
+def load_columns(app=None) -> Dict[str, np.ndarray]:
+    """Read the stats columns from the configured database in one scan."""
+    duck = load_data.duckdb_url(app)
+    if duck:
+        import duckdb_backend
+        with duckdb_backend.connect(duck) as con:
+            con.execute(duckdb_backend.SCHEMA_SQL)
+            arrays = con.execute(SELECT_SQL).fetchnumpy()
+        return {name: np.asarray(arrays[name]) for name in NUMERIC + CODES}
+    data = bytearray()
+    with load_data.get_conn(app) as conn:
+        with conn.cursor().copy(COPY_SQL) as copy:
+            for block in copy:
+                data += block
+    return parse_copy(data)
+
+
+def columns_from_parquet(source) -> Dict[str, np.ndarray]:
+    """The stats columns from an applicants Parquet file (or Arrow table)."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    import columnar
+
+    table = source if isinstance(source, pa.Table) else pq.read_table(source)
+    table = table.unify_dictionaries()
+    out = {name: table.column(name).to_numpy().astype(np.float64) for name in NUMERIC}
+    nat, degree, status = (columnar.flat_column(table, c) for c in ("us_or_international", "degree", "status"))
+
+    def codes(masks):
+        mask_arrays = [m.to_numpy(zero_copy_only=False) for m in masks]
+        return np.select(mask_arrays, np.arange(1, len(masks) + 1), 0).astype(np.int16)
+
+    out["nationality"] = codes([columnar.prefix_mask(nat, n) for n in NATIONALITY[1:]])
+    out["degree"] = codes([columnar.match_mask(degree, lambda a, d=d: pc.equal(a, d)) for d in DEGREE[1:]])
+    out["outcome"] = codes([columnar.prefix_mask(status, o) for o in OUTCOME[1:]])
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Statistics
+# ---------------------------------------------------------------------------
+
+def _r(x, digits=3) -> Optional[float]:
+    return None if x is None or not np.isfinite(x) else round(float(x), digits)
+
+
+def _summary(values: np.ndarray) -> Dict[str, Any]:
+    finite = values[~np.isnan(values)]
+    if not finite.size:
+        return {"n": 0, "mean": None, **{f"p{p}": None for p in PERCENTILES}}
+    points = np.percentile(finite, PERCENTILES)
+    return {"n": int(finite.size), "mean": _r(finite.mean()),
+            **{f"p{p}": _r(v) for p, v in zip(PERCENTILES, points)}}
+
+
+def _histogram(values: np.ndarray, edges: np.ndarray) -> Dict[str, List]:
+    counts, _ = np.histogram(values[~np.isnan(values)], bins=edges)
+    return {"edges": [_r(e) for e in edges], "counts": counts.tolist()}
+
+
+def _group_means(codes: np.ndarray, labels, columns) -> List[Dict[str, Any]]:
+    k = len(labels)
+    rows = [{"group": label, "n": int(n)} for label, n in zip(labels, np.bincount(codes, minlength=k))]
+    for name in ("gpa", "gre"):
+        values = columns[name]
+        ok = ~np.isnan(values)
+        n = np.bincount(codes[ok], minlength=k)
+        sums = np.bincount(codes[ok], weights=values[ok], minlength=k)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = sums / n
+        for row, mean in zip(rows, means):
+            row[f"avg_{name}"] = _r(mean)
+    return rows
+
+
+def _acceptance_by_gpa(columns) -> List[Dict[str, Any]]:
+    gpa, outcome = columns["gpa"], columns["outcome"]
+    decided = (outcome > 0) & ~np.isnan(gpa)
+    bucket = np.digitize(gpa[decided], GPA_BUCKETS[1:-1])
+    k = len(GPA_BUCKETS) - 1
+    totals = np.bincount(bucket, minlength=k)
+    accepted = np.bincount(bucket, weights=(outcome[decided] == 1), minlength=k).astype(int)
+    out = []
+    for i in range(k):
+        lo, hi = GPA_BUCKETS[i], GPA_BUCKETS[i + 1]
+        label = f"< {hi:.2f}" if i == 0 else (f"≥ {lo:.2f}" if i == k - 1 else f"{lo:.2f}–{hi:.2f}")
+        out.append({"bucket": label, "decided": int(totals[i]), "accepted": int(accepted[i]),
+                    "rate": _r(100.0 * accepted[i] / totals[i], 2) if totals[i] else None})
+    return out
+
+
+def compute(columns: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Percentiles, histograms, per-group means and acceptance-by-GPA from the columns."""
+    return {
+        "rows": int(columns["gpa"].size),
+        "percentiles": {name: _summary(columns[name]) for name in NUMERIC},
+        "histograms": {name: _histogram(columns[name], HISTOGRAM_EDGES[name]) for name in NUMERIC},
+        "group_means": {
+            "nationality": _group_means(columns["nationality"], NATIONALITY, columns),
+            "degree": _group_means(columns["degree"], DEGREE, columns),
+        },
+        "acceptance_by_gpa": _acceptance_by_gpa(columns),
+    }
+
+
+def empty_columns() -> Dict[str, np.ndarray]:
+    """Zero-row columns (the stats of an empty or unreachable database)."""
+    return {name: np.empty(0, np.float64 if name in NUMERIC else np.int16) for name in NUMERIC + CODES}
+
+
+def fetch_stats(app=None) -> Dict[str, Any]:
+    """:func:`compute` over the configured database; empty stats if it cannot be read."""
+    try:
+        columns = load_columns(app)
+    except Exception:
+        columns = empty_columns()
+    return compute(columns)
@@ -0,0 +1,33 @@
+"""
+worker.py – Stand-alone worker for the PostgreSQL job queue.
+
+Runs queued Pull Data / Update Analysis jobs outside the web process, for
+deployments that set ``JOBS_INLINE=0``::
+
+    python src/worker.py                # poll forever
+    python src/worker.py --once         # run at most one job and exit
+    python src/worker.py --poll 5       # seconds between polls of an empty queue
+
+The runners are registered by ``app.py``, so the Flask app is built first and
+the loop in :func:`jobs.worker_loop` runs against its configuration.
+"""
+
+import argparse
+
+import jobs
+from app import create_app
+
+
+def main(argv=None, app=None):
+    """Parse the command line and run :func:`jobs.worker_loop`."""
+    parser = argparse.ArgumentParser(description="GradCafe job worker")
+    parser.add_argument("--once", action="store_true", help="run at most one job and exit")
+    parser.add_argument("--poll", type=float, default=1.0, help="seconds between polls of an empty queue")
+    args = parser.parse_args(argv)
+
+    jobs.worker_loop(app or create_app(), poll_interval=args.poll, once=args.once)
+    return 0
+
+
+if __name__ == "__main__":
+    main()
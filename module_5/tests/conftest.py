@@ -1,7 +1,9 @@
 import os
 import sys
+import textwrap
 import pytest
 import psycopg
+from psycopg.conninfo import conninfo_to_dict, make_conninfo
 
 SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
 if SRC_DIR not in sys.path:
@@ -9,6 +11,8 @@ if SRC_DIR not in sys.path:
 
 from app import create_app
 from load_data import ensure_table
+from jobs import ensure_jobs_table
+import pipeline
 
 TEST_DATABASE_URL = os.getenv(
     "TEST_DATABASE_URL",
@@ -17,12 +21,44 @@ TEST_DATABASE_URL = os.getenv(
     ),
 )
 
+LAYOUT_DB = conninfo_to_dict(TEST_DATABASE_URL)["dbname"] + "_layout"
+
+@pytest.fixture()
+def layout_url():
+    """A fresh scratch database, for tests that change the ``applicants`` layout."""
+    with psycopg.connect(TEST_DATABASE_URL, autocommit=True) as conn:
+        conn.execute(f"DROP DATABASE IF EXISTS {LAYOUT_DB}")
+        conn.execute(f"CREATE DATABASE {LAYOUT_DB}")
+    yield make_conninfo(TEST_DATABASE_URL, dbname=LAYOUT_DB)
+    with psycopg.connect(TEST_DATABASE_URL, autocommit=True) as conn:
+        conn.execute(f"DROP DATABASE IF EXISTS {LAYOUT_DB} WITH (FORCE)")
+
+def layout_app(url, layout):
+    return create_app({"TESTING": True, "JOBS_INLINE": False,
+                       "DATABASE_URL": url, "APPLICANTS_LAYOUT": layout})
+
+def same_metrics(expected, actual):
+    """Assert two ``fetch_metrics`` results match; top-N lists may order ties differently."""
+    for key, value in expected.items():
+        if isinstance(value, list):
+            assert [c for _, c in actual[key]] == [c for _, c in value], key
+            cutoff = value[-1][1] if value else 0
+            assert {r for r in actual[key] if r[1] > cutoff} == {r for r in value if r[1] > cutoff}, key
+        else:
+            assert actual[key] == value, key
+
 @pytest.fixture()
 def app():
     flask_app = create_app({"TESTING": True, "DATABASE_URL": TEST_DATABASE_URL})
     ensure_table(flask_app)
+    ensure_jobs_table(flask_app)
     yield flask_app
 
+def reset_jobs():
+    """Delete every job row so no pull or analysis counts as queued/running."""
+    with psycopg.connect(TEST_DATABASE_URL) as conn:
+        conn.execute("DELETE FROM jobs;")
+
 @pytest.fixture()
 def client(app):
     return app.test_client()
@@ -65,3 +101,31 @@ def sample_rows():
          "gpa": 3.88, "gre": None, "gre_v": None, "gre_aw": None, "degree": "PhD",
          "llm_generated_program": "Computer Science", "llm_generated_university": "Stanford University"},
     ]
+
+@pytest.fixture()
+def module2_dir(tmp_path):
+    """A minimal module_2 tree exposing the functions the pipeline imports."""
+    (tmp_path / "scrape.py").write_text(textwrap.dedent('''
+        def iter_records(max_records, on_page=None):
+            for i in range(max_records):
+                if on_page is not None:
+                    on_page(i + 1, i + 1)
+                yield {"program_university_raw": f"Test University {i} - Masters Computer Science",
+                       "comments_raw": "GPA 3.70 American Fall 2026 Accepted",
+                       "source_url": f"https://example.com/pipe/{i}"}
+    '''))
+    (tmp_path / "clean.py").write_text(textwrap.dedent('''
+        def clean_record(r):
+            return {"program": r["program_university_raw"], "comments": r["comments_raw"],
+                    "url": r["source_url"], "degree": "Masters"}
+    '''))
+    (tmp_path / "llm_hosting").mkdir()
+    (tmp_path / "llm_hosting" / "app.py").write_text(textwrap.dedent('''
+        def standardize_row(row):
+            row["llm-generated-program"] = "Computer Science"
+            row["llm-generated-university"] = "Test University"
+            return row
+    '''))
+    yield str(tmp_path)
+    for name in ("scrape.py", "clean.py", os.path.join("llm_hosting", "app.py")):
+        pipeline._LOADED.pop(os.path.join(str(tmp_path), name), None)
@@ -0,0 +1,158 @@
+"""
+tests/test_api.py – JSON API endpoints.
+
+Covers:
+- GET /api/metrics returns typed JSON with an ETag tied to ``data_version``.
+- If-None-Match → 304, gzip negotiation with an ETag per encoding, and
+  Cache-Control headers.
+- ``data_version`` only moves when ``applicants`` actually changes, and
+  once per loaded batch rather than once per row.
+"""
+import gzip
+import json
+import os
+import sys
+
+import psycopg
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import app as app_module
+import load_data
+
+
+def _insert(db_conn, url, gpa=3.5):
+    with db_conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO applicants (program, url, status, term, gpa)
+            VALUES ('API Test', %s, 'Accepted', 'Fall 2026', %s)
+            ON CONFLICT DO NOTHING;
+        """, (url, gpa))
+    db_conn.commit()
+
+
+# ---------------------------------------------------------------------------
+# data_version
+# ---------------------------------------------------------------------------
+
+@pytest.mark.db
+def test_data_version_bumps_only_on_real_changes(app, empty_db, db_conn):
+    v0 = load_data.get_data_version(app)
+    _insert(db_conn, "https://example.com/api/1")
+    v1 = load_data.get_data_version(app)
+    assert v1 == v0 + 1
+
+    _insert(db_conn, "https://example.com/api/1")  # duplicate → skipped
+    assert load_data.get_data_version(app) == v1
+
+    with db_conn.cursor() as cur:
+        cur.execute("UPDATE applicants SET gpa = 3.9 WHERE url = 'https://example.com/api/1';")
+        cur.execute("DELETE FROM applicants WHERE url = 'nothing-matches';")
+    db_conn.commit()
+    assert load_data.get_data_version(app) == v1 + 1
+
+    load_data.ensure_data_version(app)  # idempotent
+    assert load_data.get_data_version(app) == v1 + 1
+
+
+@pytest.mark.db
+def test_data_version_bumps_once_per_batch(app, empty_db):
+    records = [{"program": "API Batch", "url": f"https://example.com/api/batch/{i % 7}"} for i in range(8)]
+    v0 = load_data.get_data_version(app)
+    assert load_data.insert_records(app, records, load_data.LoadOptions(batch_size=5)) == (8, 7)
+    assert load_data.get_data_version(app) == v0 + 2
+
+    assert load_data.insert_records(app, records, load_data.LoadOptions(batch_size=5)) == (8, 0)
+    assert load_data.get_data_version(app) == v0 + 2
+
+
+# ---------------------------------------------------------------------------
+# /api/metrics
+# ---------------------------------------------------------------------------
+
+@pytest.mark.web
+def test_api_metrics_typed_json_and_headers(client, empty_db, db_conn):
+    _insert(db_conn, "https://example.com/api/2", gpa=3.25)
+    resp = client.get("/api/metrics")
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/json"
+    body = resp.get_json()
+    assert body["fall_2026"] == 1
+    assert isinstance(body["avg_gpa"], float) and body["avg_gpa"] == 3.25
+    assert body["decision_dist"] == [["Accepted", 1]]
+
+    etag, weak = resp.get_etag()
+    assert etag == f"metrics-{load_data.get_data_version(client.application)}"
+    assert not weak
+    cc = resp.cache_control
+    assert cc.public and cc.must_revalidate and cc.max_age == 5
+    assert "Accept-Encoding" in resp.headers["Vary"]
+
+
+@pytest.mark.web
+def test_api_metrics_conditional_304_until_data_changes(client, empty_db, db_conn):
+    first = client.get("/api/metrics")
+    etag = first.get_etag()[0]
+
+    again = client.get("/api/metrics", headers={"If-None-Match": f'"{etag}"'})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.get_etag()[0] == etag
+
+    _insert(db_conn, "https://example.com/api/3")
+    changed = client.get("/api/metrics", headers={"If-None-Match": f'"{etag}"'})
+    assert changed.status_code == 200
+    assert changed.get_etag()[0] != etag
+    assert changed.get_json()["fall_2026"] == 1
+
+
+@pytest.mark.web
+def test_api_metrics_gzip(client, empty_db, monkeypatch):
+    plain = client.get("/api/metrics")
+    assert "Content-Encoding" not in plain.headers
+
+    monkeypatch.setattr(app_module, "GZIP_MIN_BYTES", 0)
+    resp = client.get("/api/metrics", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(resp.data)) == plain.get_json()
+    gz_etag = resp.get_etag()[0]
+    assert gz_etag == plain.get_etag()[0] + "-gz"
+
+    # Each encoding revalidates against its own ETag, weak validators included.
+    held = client.get("/api/metrics", headers={"Accept-Encoding": "gzip", "If-None-Match": f'W/"{gz_etag}"'})
+    assert held.status_code == 304 and held.get_etag()[0] == gz_etag
+    wrong = client.get("/api/metrics", headers={"If-None-Match": f'"{gz_etag}"'})
+    assert wrong.status_code == 200 and wrong.get_etag()[0] == plain.get_etag()[0]
+
+
+@pytest.mark.web
+def test_metrics_cached_per_data_version(client, empty_db, db_conn, monkeypatch):
+    calls = []
+    real = app_module.fetch_metrics
+
+    def counting(app):
+        calls.append(1)
+        return real(app)
+
+    monkeypatch.setattr(app_module, "fetch_metrics", counting)
+    client.get("/api/metrics")
+    client.get("/")
+    client.get("/api/metrics")
+    assert len(calls) == 1
+
+    _insert(db_conn, "https://example.com/api/4")
+    client.get("/")
+    assert len(calls) == 2
+
+
+@pytest.mark.web
+def test_api_metrics_without_data_version(client, monkeypatch):
+    def boom(_app):
+        raise psycopg.OperationalError("down")
+
+    monkeypatch.setattr(load_data, "get_data_version", boom)
+    resp = client.get("/api/metrics")
+    assert resp.status_code == 200
+    assert resp.get_etag() == (None, None)
+    assert "metrics_cache" not in client.application.extensions
@@ -0,0 +1,70 @@
+"""
+tests/test_async_app.py – Async serving variant.
+
+Covers:
+- METRIC_QUERIES fanned out over an AsyncConnectionPool match the sync
+  fetch_metrics() results.
+- The async ``/`` view renders the dashboard, from the snapshot when
+  ``SNAPSHOT_DIR`` is set.
+- A failing query leaves only its own metric at the default value.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import app as app_module
+import load_data
+import snapshot
+from async_app import create_async_app
+from conftest import TEST_DATABASE_URL
+
+
+@pytest.fixture()
+def async_app():
+    flask_app = create_async_app({"TESTING": True, "DATABASE_URL": TEST_DATABASE_URL,
+                                  "METRICS_CACHE": False})
+    yield flask_app
+    flask_app.extensions["async_metrics"].close()
+
+
+@pytest.mark.web
+def test_async_metrics_match_sync(async_app, app, empty_db, sample_rows):
+    app_module._load_rows(app, sample_rows)
+    concurrent = async_app.extensions["async_metrics"](async_app)
+    assert concurrent == app_module.fetch_metrics(app)
+    assert concurrent["fall_2026"] == 3
+
+
+@pytest.mark.web
+def test_async_index_renders(async_app, empty_db):
+    resp = async_app.test_client().get("/")
+    assert resp.status_code == 200
+    assert b"GradCafe Analytics Dashboard" in resp.data
+
+
+@pytest.mark.web
+def test_async_index_serves_snapshot(async_app, empty_db, tmp_path, monkeypatch):
+    version = load_data.get_data_version(async_app)
+    snapshot.write_snapshot(str(tmp_path), version, {}, "<p>pre-rendered snapshot</p>")
+    async_app.config["SNAPSHOT_DIR"] = str(tmp_path)
+
+    def no_live_metrics(_app):
+        raise AssertionError("snapshot view ran the metric queries")
+
+    monkeypatch.setattr(app_module, "metrics_snapshot", no_live_metrics)
+    resp = async_app.test_client().get("/")
+    assert resp.status_code == 200
+    assert b"<p>pre-rendered snapshot</p>" in resp.data
+
+
+@pytest.mark.web
+def test_async_failed_query_keeps_default(async_app, empty_db, monkeypatch):
+    broken = [("q7", "SELECT no_such_column FROM applicants;", (), "count")]
+    monkeypatch.setattr(app_module, "METRIC_QUERIES",
+                        broken + app_module.METRIC_QUERIES[1:])
+    metrics = async_app.extensions["async_metrics"]()
+    assert metrics["q7"] == 0
+    assert metrics["fall_2026"] == 0
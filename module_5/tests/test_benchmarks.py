@@ -0,0 +1,153 @@
+"""
+tests/test_benchmarks.py – Synthetic data generator and pipeline benchmark.
+
+Covers:
+- Generated survey pages parse back into exactly the generated raw records.
+- Generated LLM-extended records load into PostgreSQL with unique URLs.
+- The per-stage benchmark runner producing its JSON result document.
+- The baseline comparison gate: noise bands, readable regression report,
+  exit status, and the throwaway PostgreSQL cluster it runs against.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+MODULE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(MODULE_DIR, "src"))
+sys.path.insert(0, os.path.join(MODULE_DIR, "benchmarks"))
+
+import compare
+import load_data
+import pg_temp
+import pipeline_bench
+import synth
+from conftest import TEST_DATABASE_URL
+
+
+@pytest.fixture(scope="module")
+def gen():
+    return synth.Generator(synth.Templates.from_jsonl(), seed=1)
+
+
+@pytest.mark.integration
+def test_templates_learned_from_scrape():
+    summary = synth.Templates.from_jsonl().summary()
+    assert summary["universities"] > 100
+    assert summary["degrees"][0][0] == "PhD"
+    assert 0 < summary["notes_rate"] < 1
+    assert synth.parse_scale("100k") == 100_000 and synth.parse_scale("250") == 250
+
+
+@pytest.mark.integration
+def test_pages_parse_back_to_raw_records(gen):
+    scrape, clean = pipeline_bench._module2()
+    pages = list(gen.html_pages(250))
+    assert [p[2] for p in pages] == [1, 2, 3]
+    parsed = [r for html, url, page in pages for r in scrape._parse_rows_from_html(html, url, page)]
+    raw = list(gen.raw_records(250))
+    assert parsed == raw
+    cleaned = [clean.clean_record(r) for r in raw]
+    assert any(c["term"] == "Fall 2026" for c in cleaned)
+
+
+@pytest.mark.db
+def test_llm_records_load_without_duplicates(app, empty_db, gen):
+    assert load_data.insert_records(app, gen.llm_records(300)) == (300, 300)
+
+
+@pytest.mark.integration
+def test_benchmark_run_writes_result(app, empty_db, tmp_path):
+    out = tmp_path / "bench.json"
+    result = pipeline_bench.main(["--scale", "120", "--repeats", "2", "--warmup", "0",
+                                  "--stages", "parse_html,clean_record,fetch_metrics",
+                                  "--database-url", TEST_DATABASE_URL, "--out", str(out)])
+    assert json.loads(out.read_text()) == result
+    assert list(result["stages"]) == ["parse_html", "clean_record", "fetch_metrics"]
+    for stats in result["stages"].values():
+        assert len(stats["samples"]) == 2
+        assert stats["rows"] == 120
+        assert stats["min"] <= stats["median"]
+    assert result["scale"] == "120"
+
+    skipped = pipeline_bench.run(10, ("load_data",), repeats=1, warmup=0, log=lambda _m: None)
+    assert skipped["stages"] == {}
+    assert pipeline_bench.summarize([0.5], 10)["stdev"] == 0.0
+
+
+# ---------------------------------------------------------------------------
+# Regression gate
+# ---------------------------------------------------------------------------
+
+def _result(commit, **medians):
+    stages = {name: {"median": m, "stdev": sd, "rows": 1000, "rows_per_sec": round(1000 / m, 1)}
+              for name, (m, sd) in medians.items()}
+    return {"schema": pipeline_bench.SCHEMA_VERSION, "commit": commit, "dirty": False,
+            "rows": 1000, "seed": 0, "repeats": 5, "warmup": 1, "stages": stages}
+
+
+@pytest.mark.integration
+def test_compare_stage_noise_band():
+    quiet = {"median": 1.0, "stdev": 0.01}
+    assert compare.compare_stage(quiet, {"median": 1.2, "stdev": 0.01})["verdict"] == "regressed"
+    assert compare.compare_stage(quiet, {"median": 1.05, "stdev": 0.01})["verdict"] == "ok"
+    assert compare.compare_stage(quiet, {"median": 0.8, "stdev": 0.01})["verdict"] == "improved"
+    # 20% slower, but the runs jitter by ±10%: 3σ band ≈ 42%, so not a regression
+    noisy = compare.compare_stage({"median": 1.0, "stdev": 0.1}, {"median": 1.2, "stdev": 0.1})
+    assert noisy["verdict"] == "ok" and noisy["band"] == pytest.approx(0.424, abs=1e-3)
+
+
+@pytest.mark.integration
+def test_compare_cli_reports_regressed_stage(tmp_path, capsys):
+    base, cur = tmp_path / "base.json", tmp_path / "cur.json"
+    base.write_text(json.dumps(_result("a" * 40, parse_html=(0.5, 0.01), load_data=(2.0, 0.05))))
+    cur.write_text(json.dumps(_result("b" * 40, parse_html=(0.75, 0.01), load_data=(2.02, 0.05))))
+
+    assert compare.main(["--baseline", str(base), "--current", str(cur)]) == 1
+    out = capsys.readouterr().out
+    assert "REGRESSION parse_html: +50.0% slower (0.5000s → 0.7500s, 2000.0 → 1333.3 rows/s)" in out
+    assert "REGRESSION load_data" not in out
+    assert compare.main(["--baseline", str(base), "--current", str(cur), "--threshold", "0.6"]) == 0
+    assert "no stage regressed" in capsys.readouterr().out
+
+
+@pytest.mark.integration
+def test_compare_cli_baseline_handling(tmp_path, capsys):
+    base, cur = tmp_path / "base.json", tmp_path / "cur.json"
+    cur.write_text(json.dumps(_result("b" * 40, parse_html=(0.5, 0.01))))
+    with pytest.raises(SystemExit) as exc:
+        compare.main(["--baseline", str(base), "--current", str(cur)])
+    assert exc.value.code == 2
+
+    assert compare.main(["--baseline", str(base), "--current", str(cur), "--update-baseline"]) == 0
+    assert json.loads(base.read_text()) == json.loads(cur.read_text())
+
+    other = _result("c" * 40, parse_html=(0.5, 0.01))
+    other["rows"] = 10
+    cur.write_text(json.dumps(other))
+    with pytest.raises(SystemExit):
+        compare.main(["--baseline", str(base), "--current", str(cur)])
+    assert "rows differs" in capsys.readouterr().err
+
+
+@pytest.mark.integration
+def test_compare_reruns_with_baseline_settings(tmp_path, capsys):
+    base = tmp_path / "base.json"
+    baseline = _result("a" * 40, clean_record=(10.0, 0.1))
+    baseline["rows"] = 50
+    base.write_text(json.dumps(baseline))
+    assert compare.main(["--baseline", str(base)]) == 0  # no DB stage → no cluster needed
+    out = capsys.readouterr().out
+    assert "clean_record" in out and "IMPROVED" in out
+
+
+@pytest.mark.integration
+def test_temporary_postgres_cluster():
+    try:
+        with pg_temp.temporary_postgres() as conninfo:
+            import psycopg
+            with psycopg.connect(conninfo) as conn:
+                assert conn.execute("SELECT current_database()").fetchone()[0] == "gradcafe_bench"
+    except pg_temp.PostgresUnavailable as exc:
+        pytest.skip(str(exc))
@@ -17,7 +17,8 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
-import app as app_module
+import jobs
+from conftest import reset_jobs
 
 
 # ---------------------------------------------------------------------------
@@ -25,10 +26,8 @@ import app as app_module
 # ---------------------------------------------------------------------------
 
 def _reset_busy_state():
-    """Force the module-level busy flag back to False between tests."""
-    with app_module._LOCK:
-        app_module._PULL_RUNNING = False
-        app_module._PULL_MESSAGE = "No load has been run yet."
+    """Clear the jobs table so no pull is queued or running."""
+    reset_jobs()
 
 
 # ---------------------------------------------------------------------------
@@ -124,8 +123,7 @@ def test_update_analysis_returns_409_when_pull_running(client):
     with {"busy": true} and perform no update.
     """
     # Manually set the busy flag to simulate an in-progress pull
-    with app_module._LOCK:
-        app_module._PULL_RUNNING = True
+    jobs.enqueue(client.application, "pull")
 
     try:
         response = client.post("/update-analysis")
@@ -144,8 +142,7 @@ def test_pull_data_returns_409_when_already_running(client):
     with {"busy": true}.
     """
     # Manually set the busy flag to simulate an in-progress pull
-    with app_module._LOCK:
-        app_module._PULL_RUNNING = True
+    jobs.enqueue(client.application, "pull")
 
     try:
         response = client.post("/pull-data")
@@ -160,7 +157,7 @@ def test_pull_data_returns_409_when_already_running(client):
 @pytest.mark.buttons
 def test_busy_flag_resets_after_pull_completes(client, empty_db):
     """
-    After a pull completes, _PULL_RUNNING should be False again.
+    After a pull completes, the job should no longer count as running.
     """
     _reset_busy_state()
 
@@ -178,8 +175,7 @@ def test_busy_flag_resets_after_pull_completes(client, empty_db):
     done_event.wait(timeout=5)
     import time; time.sleep(0.2)
 
-    with app_module._LOCK:
-        still_running = app_module._PULL_RUNNING
+    still_running = jobs.dashboard_state(client.application)["pull_running"]
 
     assert still_running is False, "Busy flag should be False after pull completes"
 
@@ -0,0 +1,146 @@
+"""
+tests/test_changes.py – Load runs and the change feed.
+
+Covers:
+- Each ``insert_records`` call recorded in ``load_runs`` and stamped on the
+  rows it inserts; ``iter_changes`` returning only rows of later runs.
+- The watermark holding back behind running runs, stale runs being reaped
+  and unable to commit, and failed loads leaving no rows.
+- Runs reaped by their ``updated_at`` heartbeat rather than their age, by
+  the job sweep and never by reading the watermark.
+- ``GET /api/changes`` (JSON pages, NDJSON, bad arguments) and
+  ``GET /api/load-runs``.
+"""
+import os
+import sys
+
+import psycopg
+import pytest
+
+MODULE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(MODULE_DIR, "src"))
+
+import changes
+import jobs
+import load_data
+from conftest import TEST_DATABASE_URL
+
+
+@pytest.fixture()
+def runs(app, empty_db, db_conn):
+    db_conn.execute("TRUNCATE TABLE load_runs RESTART IDENTITY;")
+    db_conn.commit()
+    yield db_conn
+    db_conn.execute("TRUNCATE TABLE load_runs RESTART IDENTITY;")
+    db_conn.commit()
+
+
+def _urls(rows):
+    return [r["url"] for r in rows]
+
+
+# ---------------------------------------------------------------------------
+# Load runs and iter_changes
+# ---------------------------------------------------------------------------
+
+@pytest.mark.db
+def test_runs_stamp_rows_and_feed_returns_only_new_ones(app, runs, sample_rows):
+    assert changes.watermark(app) == 0
+    assert load_data.insert_records(app, sample_rows[:2], load_data.LoadOptions(source="first")) == (2, 2)
+    first = changes.watermark(app)
+    assert load_data.insert_records(app, sample_rows, load_data.LoadOptions(source="second")) == (3, 1)
+    second = changes.watermark(app)
+    assert second == first + 1
+
+    everything = list(changes.iter_changes(app))
+    assert _urls(everything) == [r["url"] for r in sample_rows]
+    assert [r["load_run_id"] for r in everything] == [first, first, second]
+    assert everything[0]["loaded_at"] is not None
+    new = list(changes.iter_changes(app, since=first, batch_size=1))
+    assert _urls(new) == [sample_rows[2]["url"]]
+    assert list(changes.iter_changes(app, since=second)) == []
+
+    latest, earlier = changes.list_runs(app, limit=2)
+    assert (latest["source"], latest["status"], latest["rows_read"], latest["rows_inserted"]) == \
+        ("second", "finished", 3, 1)
+    assert earlier["id"] == first and earlier["finished_at"] is not None
+
+
+@pytest.mark.db
+def test_watermark_waits_for_running_runs(app, runs, sample_rows):
+    slow = changes.start_run(app, "slow")
+    load_data.insert_records(app, sample_rows[:1])
+    assert changes.watermark(app) == slow - 1
+    assert list(changes.iter_changes(app)) == []  # the later run's rows wait for the slow one
+
+    changes.fail_run(app, slow, "gave up")
+    assert _urls(changes.iter_changes(app)) == [sample_rows[0]["url"]]
+
+    stuck = changes.start_run(app, "stuck")
+    assert changes.reap_stale(app, max_age=0) == 1
+    with psycopg.connect(TEST_DATABASE_URL) as conn, conn.cursor() as cur:
+        with pytest.raises(changes.RunAborted):
+            changes.finish_run(cur, stuck, 0, 0)
+    assert {r["id"]: r["status"] for r in changes.list_runs(app)} == {
+        stuck: "failed", stuck - 1: "finished", slow: "failed"}
+
+
+@pytest.mark.db
+def test_heartbeat_keeps_a_long_run_alive(app, runs):
+    run = changes.start_run(app, "long")
+    runs.execute("UPDATE load_runs SET started_at = now() - interval '2 hours' WHERE id = %s;", (run,))
+    runs.commit()
+    heartbeat = changes.Heartbeat(app, run, interval=0)
+    heartbeat.beat()
+    assert changes.reap_stale(app, max_age=60) == 0  # old, but still beating
+
+    runs.execute("UPDATE load_runs SET updated_at = now() - interval '2 hours' WHERE id = %s;", (run,))
+    runs.commit()
+    assert changes.watermark(app) == run - 1  # reading never reaps
+    assert changes.list_runs(app, limit=1)[0]["status"] == "running"
+    jobs.sweep(app)
+    run_row = changes.list_runs(app, limit=1)[0]
+    assert (run_row["status"], run_row["error"]) == ("failed", "Load stopped responding.")
+    with pytest.raises(changes.RunAborted):
+        heartbeat.beat()
+    heartbeat.close()
+    assert changes.reap_stale in jobs.SWEEPERS
+
+
+@pytest.mark.db
+def test_failed_load_marks_run_and_inserts_nothing(app, runs, sample_rows):
+    def records():
+        yield from sample_rows
+        raise ValueError("bad input")
+
+    with pytest.raises(ValueError):
+        load_data.insert_records(app, records(), load_data.LoadOptions(batch_size=1))
+    run = changes.list_runs(app, limit=1)[0]
+    assert run["status"] == "failed" and run["error"] == "bad input"
+    assert runs.execute("SELECT COUNT(*) FROM applicants").fetchone()[0] == 0
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+
+@pytest.mark.web
+def test_changes_api(app, client, runs, sample_rows):
+    load_data.insert_records(app, sample_rows[:1], load_data.LoadOptions(source="first"))
+    load_data.insert_records(app, sample_rows, load_data.LoadOptions(source="second"))
+
+    body = client.get("/api/changes?since=1&limit=1").get_json()
+    assert (body["since"], body["until"]) == (1, 2)
+    assert _urls(body["rows"]) == [sample_rows[1]["url"]] and body["next_after"] is not None
+    body = client.get(f"/api/changes?since=1&until=2&limit=1&after={body['next_after']}").get_json()
+    assert _urls(body["rows"]) == [sample_rows[2]["url"]]
+    assert client.get("/api/changes?until=1").get_json()["rows"][0]["load_run_id"] == 1
+
+    resp = client.get("/api/changes?format=ndjson&status=Accepted")
+    assert resp.headers["X-Changes-Until"] == "2"
+    assert resp.get_data(as_text=True).count("\n") == 2
+    assert client.get("/api/changes?since=x").status_code == 400
+
+    body = client.get("/api/load-runs?limit=1").get_json()
+    assert body["watermark"] == 2
+    assert [r["source"] for r in body["runs"]] == ["second"]
@@ -0,0 +1,162 @@
+"""
+tests/test_columnar.py – Parquet export and offline metrics.
+
+Covers:
+- Applicant records → dictionary-encoded Parquet → loaded back into PostgreSQL.
+- Offline Arrow/NumPy metrics matching ``fetch_metrics`` on the same data.
+- Generic record files, Module 2 JSON inputs and the CLI.
+- Parquet checkpoints in the in-process pipeline.
+"""
+import json
+import os
+import sys
+from decimal import Decimal
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+MODULE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(MODULE_DIR, "src"))
+sys.path.insert(0, os.path.join(MODULE_DIR, "benchmarks"))
+
+import app as app_module
+import arrow_schema
+import columnar
+import load_data
+import pipeline
+import synth
+
+
+@pytest.fixture(scope="module")
+def records():
+    gen = synth.Generator(synth.Templates.from_jsonl(), seed=7)
+    return list(gen.llm_records(1500))
+
+
+def _assert_same_metrics(expected, actual):
+    assert set(expected) == set(actual)
+    for key, want in expected.items():
+        got = actual[key]
+        if isinstance(want, (Decimal, float)):
+            assert got == pytest.approx(float(want), abs=1e-3), key
+        elif isinstance(want, list):
+            # Same counts in the same order; labels must agree except among ties at the cut-off.
+            assert [c for _, c in got] == [c for _, c in want], key
+            cutoff = want[-1][1] if want else 0
+            assert {r for r in got if r[1] > cutoff} == {tuple(r) for r in want if r[1] > cutoff}, key
+        else:
+            assert got == want, key
+
+
+# ---------------------------------------------------------------------------
+# Applicants files
+# ---------------------------------------------------------------------------
+
+@pytest.mark.db
+def test_offline_metrics_match_postgres(app, empty_db, records, sample_rows, tmp_path):
+    rows = records + sample_rows
+    path = str(tmp_path / "applicants.parquet")
+    assert columnar.write_applicants(rows, path, batch_size=400) == 1503
+    load_data.insert_records(app, rows)
+
+    expected = app_module.fetch_metrics(app)
+    actual = columnar.compute_metrics(path)
+    _assert_same_metrics(expected, actual)
+    assert actual["q7"] and actual["q8"] and actual["q10b_rows"]
+
+
+@pytest.mark.db
+def test_parquet_loads_into_postgres(app, empty_db, db_conn, sample_rows, tmp_path, capsys):
+    path = str(tmp_path / "sample.parquet")
+    columnar.write_applicants(sample_rows, path)
+
+    schema = pq.read_schema(path)
+    assert pa.types.is_dictionary(schema.field("status").type)
+    assert pa.types.is_dictionary(schema.field("llm_generated_university").type)
+    assert pa.types.is_string(schema.field("program").type)
+
+    load_data.main(app=app, jsonl_path=path)
+    assert "Inserted   : 3" in capsys.readouterr().out
+    with db_conn.cursor() as cur:
+        cur.execute("SELECT term, status, gpa, degree FROM applicants ORDER BY p_id;")
+        assert cur.fetchall() == [
+            ("Fall 2026", "Accepted", Decimal("3.8"), "Masters"),
+            ("Fall 2026", "Accepted", Decimal("3.95"), "PhD"),
+            ("Fall 2026", "Rejected", Decimal("3.88"), "PhD"),
+        ]
+
+
+@pytest.mark.analysis
+def test_offline_metrics_on_sample_and_empty(sample_rows):
+    table = pa.Table.from_batches([arrow_schema.applicant_batch(
+        [load_data.normalize_record(r) for r in sample_rows])])
+    metrics = columnar.compute_metrics(table)
+    assert metrics["fall_2026"] == 3
+    assert metrics["pct_intl"] == 66.67
+    assert metrics["acceptance_pct"] == 66.67
+    assert metrics["avg_gpa_accepted"] == 3.875
+    assert metrics["q7"] == 1
+    assert metrics["q10a_rows"] == [("Fall 2026", 3)]
+    assert metrics["decision_dist"] == [("Accepted", 2), ("Rejected", 1)]
+
+    empty = columnar.compute_metrics(table.slice(0, 0))
+    assert empty == app_module.default_metrics()
+
+
+# ---------------------------------------------------------------------------
+# Generic records and CLI
+# ---------------------------------------------------------------------------
+
+@pytest.mark.analysis
+def test_generic_records_round_trip(tmp_path):
+    rows = [{"program": "A", "status": "Accepted", "gpa": 3.5},
+            {"program": "B", "status": None, "gpa": None}]
+    path = str(tmp_path / "raw.parquet")
+    assert columnar.write_records(rows, path) == 2
+    assert pa.types.is_dictionary(pq.read_schema(path).field("status").type)
+    assert list(columnar.read_records(path)) == rows
+
+
+@pytest.mark.analysis
+def test_read_json_records_formats(tmp_path):
+    payload = tmp_path / "payload.json"
+    payload.write_text(json.dumps({"record_count": 1, "records": [{"a": 1}]}, indent=2))
+    llm_in = tmp_path / "llm_in.json"
+    llm_in.write_text(json.dumps({"rows": [{"a": 2}]}))
+    plain = tmp_path / "list.json"
+    plain.write_text(json.dumps([{"a": 3}]))
+    jsonl = tmp_path / "rows.jsonl"
+    jsonl.write_text('{"a": 4}\n{"a": 5}\n')
+
+    assert columnar.read_json_records(str(payload)) == [{"a": 1}]
+    assert columnar.read_json_records(str(llm_in)) == [{"a": 2}]
+    assert columnar.read_json_records(str(plain)) == [{"a": 3}]
+    assert columnar.read_json_records(str(jsonl)) == [{"a": 4}, {"a": 5}]
+
+
+@pytest.mark.analysis
+def test_cli_convert_and_metrics(sample_rows, tmp_path, capsys):
+    src = tmp_path / "llm.jsonl"
+    src.write_text("".join(json.dumps(r) + "\n" for r in sample_rows))
+    dst = tmp_path / "applicants.parquet"
+    assert columnar.main(["to-parquet", str(src), str(dst)]) == 0
+    assert capsys.readouterr().out.startswith("3 rows: ")
+
+    assert columnar.main(["metrics", str(dst)]) == 0
+    assert json.loads(capsys.readouterr().out)["fall_2026"] == 3
+
+    raw = tmp_path / "raw.parquet"
+    columnar.main(["to-parquet", str(src), str(raw), "--raw"])
+    assert "us_or_international" in pq.read_schema(raw).names
+
+
+@pytest.mark.db
+def test_run_pull_parquet_checkpoints(app, empty_db, module2_dir, tmp_path):
+    ckpt = tmp_path / "ckpt"
+    result = pipeline.run_pull(app, module2_dir, max_records=2,
+                               options=pipeline.PullOptions(checkpoint_dir=str(ckpt), checkpoint_format="parquet"))
+    assert result["rows_inserted"] == 2
+    assert sorted(os.listdir(ckpt)) == ["clean.parquet", "llm.parquet", "scrape.parquet"]
+    llm = list(columnar.read_records(str(ckpt / "llm.parquet")))
+    assert [r["llm-generated-university"] for r in llm] == ["Test University"] * 2
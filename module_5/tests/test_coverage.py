@@ -285,32 +285,25 @@ def test_query_main_runs(app, monkeypatch, capsys):
 
 
 # ---------------------------------------------------------------------------
-# app.py uncovered branches: _pull_worker subprocess path, _analysis_worker
+# app.py uncovered branches: _pull_worker pipeline path, _analysis_worker
 # ---------------------------------------------------------------------------
 
 @pytest.mark.web
 def test_pull_worker_no_scraper_fn_fails_gracefully(app, empty_db):
-    """_pull_worker without SCRAPER_FN runs subprocess path and handles failure."""
-    import threading
+    """_pull_worker without SCRAPER_FN runs the in-process pipeline and handles failure."""
+    import jobs
+    from conftest import reset_jobs
+    reset_jobs()
     app.config.pop("SCRAPER_FN", None)
     app.config["MODULE2_DIR"] = "/nonexistent/module2"
-    app.config["MODULE3_DIR"] = "/nonexistent/module3"
-
-    done = threading.Event()
-    original_worker = app_module._pull_worker
 
-    def patched_worker(a, m2, m3):
-        original_worker(a, m2, m3)
-        done.set()
-
-    t = threading.Thread(target=patched_worker,
-                         args=(app, app.config["MODULE2_DIR"], app.config["MODULE3_DIR"]),
-                         daemon=True)
-    t.start()
-    done.wait(timeout=5)
+    job_id = jobs.enqueue(app, "pull")
+    assert jobs.run_next(app) is True
 
-    with app_module._LOCK:
-        assert app_module._PULL_RUNNING is False
+    job = jobs.get_job(app, job_id)
+    assert job["status"] == "failed"
+    assert job["stage"] == "pull"
+    assert jobs.dashboard_state(app)["pull_running"] is False
 
 
 @pytest.mark.web
@@ -18,7 +18,7 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
-import app as app_module
+from conftest import reset_jobs
 from query_data import fetch_metrics
 
 
@@ -41,9 +41,8 @@ REQUIRED_COLUMNS = [
 
 
 def _reset_busy_state():
-    with app_module._LOCK:
-        app_module._PULL_RUNNING = False
-        app_module._PULL_MESSAGE = "No load has been run yet."
+    """Clear the jobs table so no pull is queued or running."""
+    reset_jobs()
 
 
 # ---------------------------------------------------------------------------
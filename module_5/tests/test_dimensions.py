@@ -0,0 +1,130 @@
+"""
+tests/test_dimensions.py – Normalized (lookup table) applicants layout.
+
+Covers:
+- Bulk loads into ``applicant_facts`` with cached lookup ids, giving the same
+  metrics and stats as the wide table.
+- Converting an existing wide table in place, keeping ``p_id`` values.
+- The ``applicants`` view: ad-hoc inserts, duplicates and ``data_version``.
+
+Runs in its own scratch database so the shared test database keeps the wide
+``applicants`` table the other tests truncate.
+"""
+import os
+import sys
+
+import psycopg
+import pytest
+
+MODULE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(MODULE_DIR, "src"))
+sys.path.insert(0, os.path.join(MODULE_DIR, "benchmarks"))
+
+import app as app_module
+import changes
+import dimensions
+import load_data
+import stats
+import synth
+from conftest import layout_app as _app
+from conftest import same_metrics as _same_metrics
+
+
+class _CountingCursor:
+    def __init__(self, cur):
+        self.cur, self.calls = cur, 0
+
+    def execute(self, *args):
+        self.calls += 1
+        return self.cur.execute(*args)
+
+    def fetchall(self):
+        return self.cur.fetchall()
+
+    @property
+    def rowcount(self):
+        return self.cur.rowcount
+
+
+# ---------------------------------------------------------------------------
+# Bulk load
+# ---------------------------------------------------------------------------
+
+@pytest.mark.db
+def test_normalized_load_matches_wide(app, empty_db, sample_rows, layout_url):
+    rows = list(synth.Generator(synth.Templates.from_jsonl(), seed=7).llm_records(1500)) + sample_rows
+    norm = _app(layout_url, "normalized")
+    load_data.ensure_index(norm)
+    assert load_data.insert_records(norm, rows) == load_data.insert_records(app, rows)
+    assert load_data.insert_records(norm, sample_rows) == (3, 0)
+
+    _same_metrics(app_module.fetch_metrics(app), app_module.fetch_metrics(norm))
+    assert {r["load_run_id"] for r in changes.iter_changes(norm)} == {1}  # the duplicate load adds none
+    assert stats.fetch_stats(norm) == stats.fetch_stats(app)
+    with psycopg.connect(layout_url) as conn:
+        assert conn.execute("SELECT relkind FROM pg_class WHERE relname = 'applicants'").fetchone() == ("v",)
+        terms = conn.execute("SELECT COUNT(*) FROM terms").fetchone()[0]
+        assert terms == conn.execute("SELECT COUNT(DISTINCT term) FROM applicants").fetchone()[0]
+    query = "/api/aggregate?group_by=university,status&term=Fall 2026"
+    body = norm.test_client().get(query).get_json()
+    assert body["rows"] and body == app.test_client().get(query).get_json()
+
+
+@pytest.mark.db
+def test_encoder_resolves_each_name_once(layout_url, sample_rows):
+    load_data.ensure_table(_app(layout_url, "normalized"))
+    encoder = dimensions.Encoder()
+    batch = [load_data.normalize_record(r) for r in sample_rows]
+    with psycopg.connect(layout_url) as conn:
+        cur = _CountingCursor(conn.cursor())
+        first = encoder.encode(cur, batch)
+        assert cur.calls == 2 * len(dimensions.DIMENSIONS)
+        assert encoder.encode(cur, batch) == first
+        assert cur.calls == 2 * len(dimensions.DIMENSIONS)  # all cached
+        term_id = first[dimensions.FACT_COLUMNS.index("term_id")][0]
+        assert conn.execute("SELECT name FROM terms WHERE id = %s", (term_id,)).fetchone() == ("Fall 2026",)
+        assert encoder.write(cur, batch + [batch[0]]) == len(batch)  # one statement, duplicate skipped
+        assert cur.calls == 2 * len(dimensions.DIMENSIONS) + 1
+        assert encoder.encode(cur, []) == [[] for _ in dimensions.FACT_COLUMNS]
+
+
+# ---------------------------------------------------------------------------
+# Migration and the applicants view
+# ---------------------------------------------------------------------------
+
+@pytest.mark.db
+def test_wide_table_migrates_in_place(layout_url, sample_rows):
+    wide = _app(layout_url, "wide")
+    load_data.ensure_table(wide)
+    load_data.insert_records(wide, sample_rows)
+    with psycopg.connect(layout_url) as conn:
+        before = conn.execute("SELECT * FROM applicants ORDER BY p_id").fetchall()
+
+    norm = _app(layout_url, "normalized")
+    load_data.ensure_table(norm)
+    load_data.ensure_table(norm)  # idempotent
+    version = load_data.get_data_version(norm)
+    with psycopg.connect(layout_url) as conn:
+        assert conn.execute("SELECT * FROM applicants ORDER BY p_id").fetchall() == before
+        cur = conn.execute("""
+            INSERT INTO applicants (program, url, status, term, degree)
+            VALUES ('New Program', 'https://example.com/view/1', 'Accepted', 'Spring 2027', 'PhD')
+            ON CONFLICT DO NOTHING;""")
+        assert cur.rowcount == 1
+        cur = conn.execute("""
+            INSERT INTO applicants (program, url) VALUES ('New Program', 'https://example.com/view/1')
+            ON CONFLICT DO NOTHING;""")
+        assert cur.rowcount == 0
+        conn.commit()
+        assert conn.execute("SELECT p_id, term FROM applicants WHERE url = 'https://example.com/view/1'"
+                            ).fetchone() == (len(before) + 1, "Spring 2027")
+    assert load_data.get_data_version(norm) == version + 1
+
+
+@pytest.mark.integration
+def test_pipeline_bench_normalized_layout(layout_url):
+    import pipeline_bench
+    result = pipeline_bench.run(200, ("load_data",), repeats=2, warmup=0, database_url=layout_url,
+                                log=lambda _m: None, layout="normalized")
+    assert result["layout"] == "normalized"
+    assert result["stages"]["load_data"]["rows"] == 200
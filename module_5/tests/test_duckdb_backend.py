@@ -0,0 +1,123 @@
+"""
+tests/test_duckdb_backend.py – DuckDB storage backend and backend parity.
+
+Covers:
+- ``duckdb:`` DATABASE_URLs routing load_data and fetch_metrics to DuckDB.
+- De-duplication matching the PostgreSQL unique index + ON CONFLICT DO NOTHING.
+- Q1–Q10 metrics identical between PostgreSQL and DuckDB on the same data.
+"""
+import os
+import sys
+
+import pytest
+
+MODULE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(MODULE_DIR, "src"))
+sys.path.insert(0, os.path.join(MODULE_DIR, "benchmarks"))
+
+import app as app_module
+import columnar
+import duckdb_backend
+import load_data
+import synth
+
+
+@pytest.fixture()
+def duck_app(tmp_path):
+    return app_module.create_app({"TESTING": True, "JOBS_INLINE": False,
+                                  "DATABASE_URL": f"duckdb://{tmp_path / 'gradcafe.duckdb'}"})
+
+
+@pytest.fixture(scope="module")
+def records():
+    gen = synth.Generator(synth.Templates.from_jsonl(), seed=7)
+    return list(gen.llm_records(2000))
+
+
+def _top_n_equal(pg_rows, duck_rows):
+    """Same counts in order; labels may only differ among ties at the cut-off."""
+    assert [c for _, c in duck_rows] == [c for _, c in pg_rows]
+    cutoff = pg_rows[-1][1] if pg_rows else 0
+    assert {r for r in duck_rows if r[1] > cutoff} == {r for r in pg_rows if r[1] > cutoff}
+
+
+# ---------------------------------------------------------------------------
+# Backend selection and loading
+# ---------------------------------------------------------------------------
+
+@pytest.mark.db
+def test_duckdb_url_selects_backend(duck_app, app, tmp_path):
+    assert load_data.duckdb_url(duck_app).startswith("duckdb://")
+    assert load_data.duckdb_url(app) is None
+    assert duckdb_backend.database_path("duckdb:///tmp/x.duckdb") == "/tmp/x.duckdb"
+    assert duckdb_backend.database_path("duckdb:x.duckdb") == "x.duckdb"
+    assert duckdb_backend.database_path("duckdb::memory:") == ":memory:"
+
+    load_data.ensure_table(duck_app)
+    load_data.ensure_index(duck_app)
+    assert app_module.fetch_metrics(duck_app) == app_module.default_metrics()
+    assert os.path.exists(tmp_path / "gradcafe.duckdb")
+
+
+@pytest.mark.db
+def test_duckdb_insert_deduplicates_like_postgres(duck_app, sample_rows):
+    dup = dict(sample_rows[0], status="Rejected")  # same url/program/comments → skipped
+    batches = []
+    result = load_data.insert_records(duck_app, sample_rows + [dup], load_data.LoadOptions(
+        batch_size=2, on_batch=lambda read, ins: batches.append((read, ins))))
+    assert result == (4, 3)
+    assert batches == [(2, 2), (4, 3)]
+    assert load_data.insert_records(duck_app, sample_rows) == (3, 0)
+
+    with duckdb_backend.connect(duck_app.config["DATABASE_URL"]) as con:
+        rows = con.execute("SELECT p_id, status FROM applicants ORDER BY p_id").fetchall()
+    assert rows == [(1, "Accepted"), (2, "Accepted"), (3, "Rejected")]
+
+
+@pytest.mark.db
+def test_load_data_main_into_duckdb(duck_app, sample_rows, tmp_path, capsys):
+    path = str(tmp_path / "sample.parquet")
+    columnar.write_applicants(sample_rows, path)
+    load_data.main(app=duck_app, jsonl_path=path)
+    assert "Inserted   : 3" in capsys.readouterr().out
+    assert app_module.fetch_metrics(duck_app)["fall_2026"] == 3
+
+
+# ---------------------------------------------------------------------------
+# Parity
+# ---------------------------------------------------------------------------
+
+@pytest.mark.db
+def test_metrics_identical_to_postgres(app, empty_db, duck_app, records, sample_rows):
+    rows = records + sample_rows
+    assert load_data.insert_records(app, rows) == load_data.insert_records(duck_app, rows)
+
+    pg = app_module.fetch_metrics(app)
+    duck = app_module.fetch_metrics(duck_app)
+    assert set(pg) == set(duck)
+    for key, value in pg.items():
+        if isinstance(value, list):
+            _top_n_equal(value, duck[key])
+        else:
+            assert duck[key] == value, key
+            assert type(duck[key]) is type(value), key
+    assert pg["q7"] and pg["q8"] and pg["avg_gpa"] is not None
+
+
+@pytest.mark.db
+def test_metric_queries_translate_for_duckdb():
+    for key, query, params, _ in app_module.METRIC_QUERIES:
+        text = duckdb_backend.translate(query)
+        assert text.count("?") == len(params) and "%%" not in text, key
+    q8 = duckdb_backend.translate(dict((k, q) for k, q, *_ in app_module.METRIC_QUERIES)["q8"])
+    assert "ILIKE '%stanford%'" in q8
+
+
+@pytest.mark.integration
+def test_pipeline_bench_runs_on_duckdb(tmp_path):
+    import pipeline_bench
+    result = pipeline_bench.run(200, ("load_data", "fetch_metrics"), repeats=2, warmup=0,
+                                database_url=f"duckdb://{tmp_path / 'bench.duckdb'}",
+                                log=lambda _m: None)
+    assert result["backend"] == "duckdb"
+    assert result["stages"]["load_data"]["rows"] == result["stages"]["fetch_metrics"]["rows"] > 0
@@ -22,7 +22,8 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
-import app as app_module
+import jobs
+from conftest import reset_jobs
 
 
 # ---------------------------------------------------------------------------
@@ -33,9 +34,8 @@ PERCENTAGE_RE = re.compile(r"\d+\.\d{2}%")
 
 
 def _reset_busy_state():
-    with app_module._LOCK:
-        app_module._PULL_RUNNING = False
-        app_module._PULL_MESSAGE = "No load has been run yet."
+    """Clear the jobs table so no pull is queued or running."""
+    reset_jobs()
 
 
 def _do_pull(client, rows):
@@ -156,8 +156,7 @@ def test_e2e_update_analysis_blocked_during_pull(client, empty_db):
     """
     POST /update-analysis must return 409 if called while pull is running.
     """
-    with app_module._LOCK:
-        app_module._PULL_RUNNING = True
+    jobs.enqueue(client.application, "pull")
 
     try:
         response = client.post("/update-analysis")
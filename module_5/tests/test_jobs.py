@@ -0,0 +1,319 @@
+"""
+tests/test_jobs.py – PostgreSQL-backed job queue.
+
+Covers:
+- enqueue/claim/run lifecycle and the one-active-job-per-kind rule.
+- Cooperative cancellation (queued and running jobs); one connection per
+  job for its progress writes.
+- Stale-job reaping, the worker loop and the ``worker.py`` CLI.
+- GET /jobs/<id> and POST /jobs/<id>/cancel.
+- LISTEN/NOTIFY job events and the /pull-data/events SSE stream.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+
+import psycopg
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import app as app_module
+import jobs
+import worker
+from conftest import reset_jobs
+
+
+@pytest.fixture()
+def queue(app, monkeypatch):
+    """Empty jobs table with the inline dispatcher disabled."""
+    app.config["JOBS_INLINE"] = False
+    reset_jobs()
+    yield app
+    reset_jobs()
+
+
+# ---------------------------------------------------------------------------
+# Queue operations
+# ---------------------------------------------------------------------------
+
+@pytest.mark.db
+def test_enqueue_allows_one_active_job_per_kind(queue):
+    first = jobs.enqueue(queue, "pull")
+    assert isinstance(first, int)
+    assert jobs.enqueue(queue, "pull") is None
+    assert jobs.enqueue(queue, "analysis") is not None
+
+
+@pytest.mark.db
+def test_claim_next_empty_queue(queue):
+    assert jobs.claim_next(queue) is None
+    assert jobs.run_next(queue) is False
+
+
+@pytest.mark.db
+def test_run_job_success_records_result_and_timings(queue, monkeypatch):
+    def runner(app, ctx):
+        with ctx.stage("work"):
+            ctx.progress(force=True, rows=3)
+            ctx.progress(rows=4)
+        return {"message": "All good.", "total": Decimal("1.5"), "day": date(2026, 1, 2)}
+
+    monkeypatch.setitem(jobs.RUNNERS, "test", runner)
+    job_id = jobs.enqueue(queue, "test")
+    assert jobs.run_next(queue, worker="w1") is True
+
+    job = jobs.get_job(queue, job_id)
+    assert job["status"] == "succeeded"
+    assert job["message"] == "All good."
+    assert job["worker"] == "w1"
+    assert job["result"] == {"total": 1.5, "day": "2026-01-02"}
+    assert job["progress"] == {"rows": 4}
+    assert "work" in job["timings"]
+
+
+@pytest.mark.db
+def test_job_writes_share_one_connection(queue, monkeypatch):
+    used = []
+
+    def runner(app, ctx):
+        with ctx.stage("work"):
+            for i in range(3):
+                ctx.progress(force=True, rows=i)
+                used.append(ctx._conn)
+        ctx._conn.close()  # the server went away: the next write fails, the one after reconnects
+        with pytest.raises(psycopg.OperationalError):
+            ctx.progress(force=True, rows=3)
+        ctx.progress(force=True, rows=4)
+        used.append(ctx._conn)
+        return {"params": ctx.params}
+
+    monkeypatch.setitem(jobs.RUNNERS, "test", runner)
+    job_id = jobs.enqueue(queue, "test")
+    jobs.run_next(queue)
+    assert len({id(conn) for conn in used}) == 2 and used[0] is used[2]
+    assert all(conn.closed for conn in used)
+    job = jobs.get_job(queue, job_id)
+    assert (job["status"], job["progress"], job["result"]) == ("succeeded", {"rows": 4}, {"params": {}})
+
+
+@pytest.mark.db
+def test_run_job_unknown_kind_fails(queue):
+    job_id = jobs.enqueue(queue, "no-such-kind")
+    jobs.run_next(queue)
+    job = jobs.get_job(queue, job_id)
+    assert job["status"] == "failed"
+    assert "no-such-kind" in job["message"]
+
+
+@pytest.mark.db
+def test_request_cancel_queued_job(queue):
+    job_id = jobs.enqueue(queue, "pull")
+    assert jobs.request_cancel(queue, job_id) == "cancelled"
+    assert jobs.dashboard_state(queue)["pull_running"] is False
+    assert jobs.request_cancel(queue, 10 ** 9) is None
+
+
+@pytest.mark.db
+def test_running_job_stops_at_next_check(queue, monkeypatch):
+    def runner(app, ctx):
+        with ctx.stage("first"):
+            jobs.request_cancel(app, ctx.job_id)
+            ctx.progress(force=True, rows=1)
+        return {}  # pragma: no cover - cancelled before reaching here
+
+    monkeypatch.setitem(jobs.RUNNERS, "test", runner)
+    job_id = jobs.enqueue(queue, "test")
+    jobs.run_next(queue)
+    job = jobs.get_job(queue, job_id)
+    assert job["status"] == "cancelled"
+    assert job["cancel_requested"] is True
+
+
+@pytest.mark.db
+def test_check_cancel_between_stages(queue, monkeypatch):
+    def runner(app, ctx):
+        with ctx.stage("first"):
+            jobs.request_cancel(app, ctx.job_id)
+        with ctx.stage("second"):  # pragma: no cover - never entered
+            pass
+
+    monkeypatch.setitem(jobs.RUNNERS, "test", runner)
+    job_id = jobs.enqueue(queue, "test")
+    jobs.run_next(queue)
+    job = jobs.get_job(queue, job_id)
+    assert job["status"] == "cancelled"
+    assert list(job["timings"]) == ["first"]
+
+
+@pytest.mark.db
+def test_reap_stale_fails_abandoned_running_job(queue):
+    job_id = jobs.enqueue(queue, "pull")
+    jobs.claim_next(queue)
+    with psycopg.connect(queue.config["DATABASE_URL"]) as conn:
+        conn.execute("UPDATE jobs SET updated_at = now() - interval '1 hour' WHERE id = %s;",
+                     (job_id,))
+    assert jobs.reap_stale(queue, max_age=60) == 1
+    assert jobs.get_job(queue, job_id)["status"] == "failed"
+    assert jobs.enqueue(queue, "pull") is not None
+
+
+@pytest.mark.db
+def test_worker_loop_once_and_polling(queue, monkeypatch):
+    jobs.worker_loop(queue, once=True)
+
+    def stop(_seconds):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(jobs.time, "sleep", stop)
+    with pytest.raises(KeyboardInterrupt):
+        jobs.worker_loop(queue, poll_interval=0)
+
+
+@pytest.mark.db
+def test_worker_cli_runs_one_job_with_the_app_runners(queue, monkeypatch):
+    monkeypatch.setitem(jobs.RUNNERS, "test", lambda app, ctx: {"message": f"ran on {app.name}"})
+    job_id = jobs.enqueue(queue, "test")
+    monkeypatch.setattr(worker, "create_app", lambda: queue)
+    assert worker.main(["--once"]) == 0
+    assert jobs.get_job(queue, job_id)["message"] == f"ran on {queue.name}"
+    assert {"pull", "analysis"} <= set(jobs.RUNNERS)  # registered by app.py, which the CLI imports
+
+
+@pytest.mark.db
+def test_to_jsonable_nested():
+    value = {"a": [Decimal("2.25"), ("x", 1)], "b": None}
+    assert jobs.to_jsonable(value) == {"a": [2.25, ["x", 1]], "b": None}
+
+
+# ---------------------------------------------------------------------------
+# Routes
+# ---------------------------------------------------------------------------
+
+@pytest.mark.web
+def test_job_status_route(queue):
+    client = queue.test_client()
+    job_id = jobs.enqueue(queue, "pull")
+    resp = client.get(f"/jobs/{job_id}")
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["id"] == job_id
+    assert body["status"] == "queued"
+    assert client.get("/jobs/999999999").status_code == 404
+
+
+@pytest.mark.web
+def test_job_cancel_route(queue):
+    client = queue.test_client()
+    job_id = jobs.enqueue(queue, "pull")
+    resp = client.post(f"/jobs/{job_id}/cancel")
+    assert resp.status_code == 200
+    assert resp.get_json() == {"ok": True, "status": "cancelled"}
+    assert client.post("/jobs/999999999/cancel").status_code == 404
+
+
+@pytest.mark.web
+def test_pull_data_without_inline_dispatch_stays_queued(queue):
+    client = queue.test_client()
+    resp = client.post("/pull-data")
+    assert resp.status_code == 200
+    job_id = resp.get_json()["job_id"]
+    assert jobs.get_job(queue, job_id)["status"] == "queued"
+    assert client.post("/pull-data").status_code == 409
+
+
+@pytest.mark.web
+def test_dashboard_state_falls_back_on_db_error(app, monkeypatch):
+    def boom(_app):
+        raise psycopg.OperationalError("down")
+
+    monkeypatch.setattr(jobs, "dashboard_state", boom)
+    state = app_module.dashboard_state(app)
+    assert state == app_module.DEFAULT_DASHBOARD_STATE
+    assert state is not app_module.DEFAULT_DASHBOARD_STATE
+
+
+# ---------------------------------------------------------------------------
+# Events (LISTEN/NOTIFY + SSE)
+# ---------------------------------------------------------------------------
+
+def _sse_messages(resp):
+    """Parse a streamed SSE body into (event, data) tuples; comments → (None, text)."""
+    out = []
+    for chunk in resp.response:
+        text = chunk.decode() if isinstance(chunk, bytes) else chunk
+        for block in filter(None, text.split("\n\n")):
+            if block.startswith(":"):
+                out.append((None, block))
+                continue
+            fields = dict(line.split(": ", 1) for line in block.splitlines())
+            out.append((fields["event"], json.loads(fields["data"])))
+    return out
+
+
+@pytest.mark.db
+def test_subscribe_receives_events_and_heartbeats(queue):
+    with jobs.subscribe(queue) as events:
+        stream = events(heartbeat=0.05)
+        assert next(stream) is None
+        job_id = jobs.enqueue(queue, "pull")
+        event = next(stream)
+        assert event["id"] == job_id
+        assert event["status"] == "queued"
+        jobs.request_cancel(queue, job_id)
+        assert next(stream)["status"] == "cancelled"
+
+
+@pytest.mark.web
+def test_pull_events_when_idle(queue):
+    resp = queue.test_client().get("/pull-data/events")
+    assert resp.mimetype == "text/event-stream"
+    assert resp.headers["Cache-Control"] == "no-cache"
+    assert _sse_messages(resp) == [
+        ("snapshot", {"kind": "pull", "status": None}),
+        ("done", {"kind": "pull", "status": None}),
+    ]
+
+
+@pytest.mark.web
+def test_pull_events_after_finished_pull(queue):
+    job_id = jobs.enqueue(queue, "pull")
+    jobs.request_cancel(queue, job_id)
+    messages = _sse_messages(queue.test_client().get("/pull-data/events"))
+    assert [m[0] for m in messages] == ["snapshot", "done"]
+    assert messages[0][1]["id"] == job_id
+    assert messages[0][1]["status"] == "cancelled"
+
+
+@pytest.mark.web
+def test_pull_events_streams_progress_until_done(queue, monkeypatch):
+    queue.config["SSE_HEARTBEAT"] = 0.05
+
+    def runner(app, ctx):
+        time.sleep(0.2)
+        jobs.enqueue(app, "analysis")
+        with ctx.stage("scrape"):
+            ctx.progress(force=True, pages_scraped=1, rows_scraped=100)
+        return {"message": "done"}
+
+    monkeypatch.setitem(jobs.RUNNERS, "pull", runner)
+    jobs.enqueue(queue, "pull")
+    job = jobs.claim_next(queue)
+
+    resp = queue.test_client().get("/pull-data/events", buffered=False)
+    worker = threading.Timer(0.1, jobs.run_job, args=(queue, job))
+    worker.start()
+    messages = _sse_messages(resp)
+    worker.join()
+
+    kinds = [m[0] for m in messages]
+    assert kinds[0] == "snapshot" and kinds[-1] == "done"
+    assert None in kinds
+    progress = [m[1] for m in messages if m[0] == "progress"]
+    assert all(p["kind"] == "pull" for p in progress)
+    assert {"pages_scraped": 1, "rows_scraped": 100} in [p["progress"] for p in progress]
+    assert messages[-1][1]["status"] == "succeeded"
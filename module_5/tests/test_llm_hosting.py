@@ -0,0 +1,426 @@
+"""
+tests/test_llm_hosting.py – The Module 2 LLM standardizer (``llm_hosting/app.py``).
+
+The real service module is loaded the way ``pipeline.standardize_records``
+loads it, with a stand-in ``llama_cpp`` whose model echoes the two halves of
+``"<program>, <university>"``.
+
+Covers:
+- ``/standardize`` answering 503 until the background load has built the
+  model pool, instead of loading it inside the request.
+- ``GET /ready`` starting the load when nothing else has.
+- Every worker of a multi-instance pool getting its own model, even when
+  the thread budget leaves each one all of ``N_THREADS``.
+- The JSON grammar parsed once per model instance, not per completion, and
+  a token budget that fits long program and university names.
+- ``/standardize/stream`` answering every input line in order, malformed
+  ones with an error and their line number.
+- The ``--chunks-dir`` driver resuming after a crash without redoing
+  finished chunks or rows, from any working directory, merging in chunk
+  order whatever order chunks finish in, and handling an empty chunk.
+- A torn last line truncated from a part file before appending resumes.
+- An alias file with a bad ``re:`` line keeping the previous aliases.
+- Canonical lists and aliases found next to ``app.py`` whatever the working
+  directory, through the public ``standardize_row`` the pipeline calls.
+- The fast resolver giving the same program and university as the LLM path,
+  degree label included, and taking university names with a comma.
+- ``NGramResolver``: top-k order, the score and margin thresholds, word
+  order for programs but not universities, the ``.npy`` cache round trip
+  and its invalidation when the list or any vectorizer setting changes,
+  and the difflib benchmark.
+"""
+import importlib
+import json
+import os
+import sys
+import threading
+import types
+
+import numpy as np
+import pytest
+
+MODULE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(MODULE_DIR, "src"))
+
+import pipeline
+
+LLM_APP = os.path.join(os.path.dirname(MODULE_DIR), "module_2", "llm_hosting", "app.py")
+
+
+class FakeLlama:
+    """Answers every chat completion with the input split at its first comma.
+
+    Output stops after ``max_tokens`` tokens of three characters each, a
+    pessimistic rate for English names.
+    """
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.grammars = []
+
+    def create_chat_completion(self, messages, **kwargs):
+        self.grammars.append(kwargs.get("grammar"))
+        program, _, university = json.loads(messages[-1]["content"])["program"].partition(", ")
+        content = json.dumps({"standardized_program": program, "standardized_university": university})
+        return {"choices": [{"message": {"content": content[:3 * kwargs["max_tokens"]]}}],
+                "usage": {"completion_tokens": 12}}
+
+
+class FakeGrammar:
+    parsed = 0
+
+    @classmethod
+    def from_string(cls, text, verbose=False):
+        cls.parsed += 1
+        return cls()
+
+
+@pytest.fixture()
+def llm(monkeypatch):
+    """The service module with a fake model backend and no pool loaded yet."""
+    monkeypatch.setitem(sys.modules, "llama_cpp",
+                        types.SimpleNamespace(Llama=FakeLlama, LlamaGrammar=FakeGrammar))
+    module = pipeline._import_path("gradcafe_llm", LLM_APP)
+    monkeypatch.setattr(module, "MODEL_PATH", "fake.gguf")
+    monkeypatch.setattr(module, "RESOLVER_ENABLED", False)
+    monkeypatch.setattr(module, "N_THREADS", module.N_THREADS)
+    monkeypatch.setattr(module, "LLM_WORKERS", module.LLM_WORKERS)
+    monkeypatch.setattr(module, "_DECODE_STATS", dict.fromkeys(module._DECODE_STATS, 0))
+    monkeypatch.setattr(module, "_LLM", None)
+    monkeypatch.setattr(module, "_POOL", None)
+    monkeypatch.setattr(module, "_READY", threading.Event())
+    monkeypatch.setattr(module, "_PREWARM_ERROR", None)
+    monkeypatch.setattr(module, "_PREWARM_THREAD", None)
+    return module
+
+
+class ExactResolver:
+    """An n-gram index that only knows the names it was given."""
+
+    def __init__(self, *names):
+        self.names = names
+
+    def match(self, name):
+        hits = [n for n in self.names if n.casefold() == name.casefold()]
+        return hits[0] if hits else None
+
+
+@pytest.fixture()
+def resolver(monkeypatch):
+    """The ``resolver`` module next to the service."""
+    monkeypatch.syspath_prepend(os.path.dirname(LLM_APP))
+    return importlib.import_module("resolver")
+
+
+def _rows(*programs):
+    return {"rows": [{"program": p} for p in programs]}
+
+
+# ---------------------------------------------------------------------------
+# Worker pool
+# ---------------------------------------------------------------------------
+
+@pytest.mark.web
+def test_standardize_is_503_until_the_pool_is_loaded(llm, monkeypatch):
+    started = []
+    monkeypatch.setattr(llm, "_start_prewarm", lambda: started.append(True))
+    client = llm.app.test_client()
+
+    resp = client.post("/standardize", json=_rows("Mathematics, University of Toronto"))
+    assert resp.status_code == 503 and resp.headers["Retry-After"] == "1"
+    assert started and llm._POOL is None  # the request asked for the load, it did not run it
+    stream = client.post("/standardize/stream", data='{"program": "Mathematics, University of Toronto"}\n')
+    assert "loading" in json.loads(stream.get_data(as_text=True))["error"]
+
+    llm._prewarm()
+    assert client.get("/ready").status_code == 200
+    rows = client.post("/standardize", json=_rows("Mathematics, University of Toronto")).get_json()["rows"]
+    assert (rows[0]["llm-generated-program"], rows[0]["llm-generated-university"]) == \
+        ("Mathematics", "University of Toronto")
+    assert client.get("/metrics").get_json()["served"] == 1
+
+
+@pytest.mark.web
+def test_first_request_starts_the_background_load(llm):
+    client = llm.app.test_client()
+    assert client.post("/standardize", json=_rows("Physics, University of Toronto")).status_code == 503
+    llm._PREWARM_THREAD.join(timeout=10)
+    assert client.post("/standardize", json=_rows("Physics, University of Toronto")).status_code == 200
+
+
+@pytest.mark.web
+def test_ready_probe_starts_the_load(llm):
+    client = llm.app.test_client()
+    assert client.get("/ready").status_code == 503
+    llm._PREWARM_THREAD.join(timeout=10)
+    assert client.get("/ready").get_json() == {"ready": True}
+
+
+@pytest.mark.web
+def test_pool_workers_never_share_an_instance(llm, monkeypatch):
+    monkeypatch.setattr(llm, "LLM_WORKERS", 2)
+    monkeypatch.setattr(llm, "N_THREADS", 1)  # 1 // 2 workers still rounds up to all of it
+    llm._prewarm()
+    pool = llm._POOL
+    instances = {id(pool._idle.get()) for _ in range(2)}
+    assert len(instances) == 2 and pool.threads_per_worker == 1
+
+
+# ---------------------------------------------------------------------------
+# Constrained decoding
+# ---------------------------------------------------------------------------
+
+@pytest.mark.web
+def test_grammar_is_parsed_once_per_instance(llm, monkeypatch):
+    monkeypatch.setattr(llm, "LLM_WORKERS", 2)
+    monkeypatch.setattr(llm, "N_THREADS", 4)
+    monkeypatch.setattr(FakeGrammar, "parsed", 0)
+    llm._prewarm()
+    for _ in range(5):
+        llm._call_llm("Physics, University of Toronto")
+    assert FakeGrammar.parsed == 2
+    pool = llm._POOL
+    instances = [pool._idle.get() for _ in range(2)]
+    assert sum(len(i.grammars) for i in instances) == 5
+    for instance in instances:
+        assert {id(g) for g in instance.grammars} <= {id(pool.grammar(instance))}
+
+
+@pytest.mark.web
+def test_token_budget_fits_long_names(llm):
+    program = "Master of Science in Environmental Science and Engineering with a Concentration in Water Resources"
+    university = "The University of Texas Health Science Center at San Antonio"
+    result = llm._call_llm(f"{program}, {university}")
+    assert result["standardized_university"] == llm._post_normalize_university(university)
+    assert llm._DECODE_STATS["fallbacks"] == 0
+
+
+# ---------------------------------------------------------------------------
+# NDJSON streaming
+# ---------------------------------------------------------------------------
+
+@pytest.mark.web
+def test_stream_answers_bad_lines_in_place(llm):
+    llm._prewarm()
+    body = "\n".join(['{"program": "Physics, University of Toronto"}', "{not json", "",
+                      '["a list"]', '{"program": "History, University of Toronto"}']) + "\n"
+    resp = llm.app.test_client().post("/standardize/stream", data=body)
+    out = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert [r.get("llm-generated-program") for r in out] == ["Physics", None, None, "History"]
+    assert (out[1]["line"], out[2]["line"]) == (2, 4)
+    assert "invalid JSON" in out[1]["error"] and out[2]["error"] == "expected a JSON object"
+
+
+# ---------------------------------------------------------------------------
+# Chunk driver (--chunks-dir)
+# ---------------------------------------------------------------------------
+
+class InlinePool:
+    """``multiprocessing.Pool`` stand-in that runs the chunks here, last one first."""
+
+    def __init__(self, processes, initializer, initargs):
+        initializer(*initargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def imap_unordered(self, func, jobs):
+        return map(func, reversed(jobs))
+
+
+def _write_chunks(directory, chunks):
+    directory.mkdir()
+    for name, programs in chunks.items():
+        (directory / name).write_text(json.dumps(_rows(*programs)))
+
+
+@pytest.mark.web
+def test_chunk_run_resumes_and_merges_in_chunk_order(llm, monkeypatch, tmp_path):
+    monkeypatch.setattr(llm, "multiprocessing", types.SimpleNamespace(Pool=InlinePool))
+    _write_chunks(tmp_path / "chunks", {
+        "chunk_1.json": ["Physics, University of Toronto", "History, McGill University"],
+        "chunk_2.json": ["Biology, University of Toronto"],
+        "chunk_3.json": [],
+    })
+    standardized, killed, real = [], [], llm.standardize_row
+
+    def killed_on_history(row, *args, **kwargs):
+        if row["program"].startswith("History") and not killed:
+            killed.append(row["program"])
+            raise RuntimeError("worker killed")
+        standardized.append(row["program"])
+        return real(row, *args, **kwargs)
+
+    monkeypatch.setattr(llm, "standardize_row", killed_on_history)
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(RuntimeError):
+        llm._cli_process_chunks("chunks", "out.jsonl", workers=2, manifest_path=None)
+    assert standardized == ["Biology, University of Toronto", "Physics, University of Toronto"]
+
+    # Resume from another directory with absolute paths: only the missing row runs.
+    monkeypatch.chdir(tmp_path / "chunks")
+    out = tmp_path / "out.jsonl"
+    llm._cli_process_chunks(str(tmp_path / "chunks"), str(out), workers=2, manifest_path=None)
+    assert standardized[2:] == ["History, McGill University"]
+    rows = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [r["llm-generated-program"] for r in rows] == ["Physics", "History", "Biology"]
+
+    manifest = json.loads((tmp_path / "out.jsonl.manifest.json").read_text())["chunks"]
+    assert manifest["chunk_3.json"] == {"part": os.path.join("out.jsonl.parts", "chunk_3.jsonl"),
+                                        "done": 0, "complete": True, "rows": 0}
+    assert all(entry["complete"] for entry in manifest.values())
+
+    llm._cli_process_chunks(str(tmp_path / "chunks"), str(out), workers=2, manifest_path=None)
+    assert len(standardized) == 3 and len(out.read_text().splitlines()) == 3
+
+
+@pytest.mark.web
+def test_torn_last_line_is_truncated_from_a_part_file(llm, tmp_path):
+    part = tmp_path / "chunk_1.jsonl"
+    good = json.dumps({"key": "chunk_1.json#0", "row": {"program": "Physics"}}) + "\n"
+    part.write_text(good + '{"key": "chunk_1.json#1", "ro')
+    assert llm._recover_part(str(part)) == {"chunk_1.json#0": {"program": "Physics"}}
+    assert part.read_text() == good
+    assert llm._recover_part(str(tmp_path / "missing.jsonl")) == {}
+
+
+# ---------------------------------------------------------------------------
+# Data files
+# ---------------------------------------------------------------------------
+
+@pytest.mark.web
+def test_data_files_load_from_any_working_directory(llm, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    assert os.path.dirname(llm.CANON_UNIS_PATH) == os.path.dirname(LLM_APP) == os.path.dirname(llm.MODELS_DIR)
+    assert "McGill University" in llm._canon_uni_set() and llm._canon_prog_set()
+    llm._prewarm()
+    module2_dir = os.path.dirname(os.path.dirname(LLM_APP))
+    rows = list(pipeline.standardize_records(module2_dir, [{"program": "Information Studies, Mcgill"}]))
+    assert rows[0]["llm-generated-university"] == "McGill University"
+
+
+# ---------------------------------------------------------------------------
+# Fast resolver
+# ---------------------------------------------------------------------------
+
+@pytest.mark.web
+def test_fast_path_gives_the_llm_normal_form(llm, monkeypatch):
+    monkeypatch.setattr(llm, "_uni_resolver", lambda: ExactResolver("University of California, Davis"))
+    monkeypatch.setattr(llm, "_prog_resolver", lambda: ExactResolver("Sociology", "Anthropology", "Statistics"))
+    llm._prewarm()
+    for text in ("Sociology PhD, University of California, Davis", "anthropology, University of California, Davis",
+                 "Statistics MS, University of California, Davis"):
+        fast = llm._resolve_fast(text)
+        assert fast is not None and fast == llm._call_llm(text)
+    assert llm._resolve_fast("Statistics MS, University of California, Davis")["standardized_program"] == \
+        "Statistics Ms"
+    # A comma inside the program name leaves a university half nobody knows.
+    assert llm._resolve_fast("Sociology, Applied, University of California, Davis") is None
+    assert llm._resolve_fast("Sociology") is None and llm._resolve_fast(", Davis") is None
+
+
+@pytest.mark.web
+def test_fast_path_word_order(llm, monkeypatch):
+    monkeypatch.chdir(os.path.dirname(LLM_APP))  # the real canonical lists and aliases
+    llm._prewarm()
+    assert llm._uni_resolver().match("Washington University") is None  # 0.90 vs UW, 0.85 vs WSU
+    assert llm._resolve_fast("Statistics MS, Washington University") == {
+        "standardized_program": "Statistics Ms",
+        "standardized_university": "Washington University in St. Louis",  # from the alias file
+    }
+    assert llm._resolve_fast("Computer and Electrical Engineering, University of Toronto") == {
+        "standardized_program": "Electrical and Computer Engineering",
+        "standardized_university": "University of Toronto",
+    }
+
+
+NAMES = ["University of Toronto", "University of Washington", "Washington State University", "McGill University"]
+
+
+@pytest.mark.web
+def test_resolver_top_k_and_thresholds(resolver):
+    index = resolver.NGramResolver(NAMES)
+    hits = index.top_k(["Universty of Toronto", "mcgill university"], k=3)
+    assert [h[0][0] for h in hits] == ["University of Toronto", "McGill University"]
+    assert all(len(h) == 3 and h[0][1] >= h[1][1] >= h[2][1] for h in hits)
+    assert hits[1][0][1] == pytest.approx(1.0)
+    assert len(index.top_k(["Toronto"], k=10)[0]) == len(NAMES)
+    assert index.top_k([]) == [] and resolver.NGramResolver([]).top_k(["x"]) == [[]]
+    assert resolver.NGramResolver([]).best("x") == (None, 0.0)
+
+    assert index.match("McGill University") == "McGill University"
+    assert index.match("Universty of Toronto") is None  # a typo scores 0.85 here
+    assert resolver.NGramResolver(NAMES, min_score=0.8).match("Universty of Toronto") == "University of Toronto"
+    # "Washington University" scores 0.79 against UW and 0.68 against WSU here.
+    assert resolver.NGramResolver(NAMES, min_score=0.75).match("Washington University") == \
+        "University of Washington"
+    assert resolver.NGramResolver(NAMES, min_score=0.75, min_margin=0.2).match("Washington University") is None
+
+
+@pytest.mark.web
+def test_resolver_word_order_is_opt_in(resolver):
+    programs = ["Electrical and Computer Engineering", "Computer Science"]
+    assert resolver.NGramResolver(programs).match("Computer and Electrical Engineering") is None
+    assert resolver.NGramResolver(programs, sort_tokens=True).best("Computer and Electrical Engineering") == \
+        ("Electrical and Computer Engineering", pytest.approx(1.0))
+
+
+@pytest.mark.web
+def test_resolver_cache_round_trip_and_invalidation(resolver, tmp_path):
+    cache = str(tmp_path / "canon.txt")
+    built = resolver.NGramResolver(NAMES, cache_path=cache)
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert len(files) == 2 and all(f.startswith("canon.txt.ngram-4096-") for f in files)
+
+    loaded = resolver.NGramResolver(NAMES, cache_path=cache)
+    assert isinstance(loaded.matrix, np.memmap)  # read back, not rebuilt
+    assert loaded.top_k(["Universty of Toronto"], k=4) == built.top_k(["Universty of Toronto"], k=4)
+
+    # Any change to the list or to how vectors are built gets its own cache files.
+    resolver.NGramResolver(NAMES[:-1], cache_path=cache)
+    resolver.NGramResolver(NAMES, cache_path=cache, ngram_sizes=(3,))
+    resolver.NGramResolver(NAMES, cache_path=cache, sort_tokens=True)
+    resolver.NGramResolver(NAMES, cache_path=cache, dim=1024)
+    assert len(list(tmp_path.iterdir())) == 2 * 5
+    # The thresholds do not change the vectors, so they share the cache.
+    resolver.NGramResolver(NAMES, cache_path=cache, min_score=0.5, min_margin=0.0)
+    assert len(list(tmp_path.iterdir())) == 2 * 5
+
+
+@pytest.mark.web
+def test_resolver_benchmark_against_difflib(resolver):
+    names = [f"University of {city}" for city in ("Toronto", "Ottawa", "Calgary", "Regina", "Victoria", "Halifax")]
+    report = resolver.benchmark(names, n_queries=50)
+    assert (report["names"], report["queries"]) == (6, 50)
+    assert report["ngram"]["accuracy"] >= 0.9 and report["difflib"]["accuracy"] >= 0.9
+    assert report["ngram"]["qps"] > 0 and report["difflib"]["qps"] > 0
+
+
+# ---------------------------------------------------------------------------
+# University aliases
+# ---------------------------------------------------------------------------
+
+@pytest.mark.web
+def test_bad_alias_file_keeps_the_previous_aliases(llm, monkeypatch, tmp_path, caplog):
+    path = tmp_path / "aliases.txt"
+    path.write_text("UofT\tUniversity of Toronto\nre:^mit$\tMassachusetts Institute of Technology\n")
+    registry = llm.AliasRegistry(str(path), check_interval=0)
+    monkeypatch.setattr(llm, "_uni_aliases", lambda: registry)
+
+    path.write_text("UBC\tUniversity of British Columbia\nre:(unclosed\tNowhere\n")
+    os.utime(path, ns=(1, 1))  # a new mtime even on a coarse-grained filesystem
+    assert registry.lookup("uoft") == "University of Toronto"  # the mtime check reloads, and fails
+    assert registry.lookup("MIT") == "Massachusetts Institute of Technology"
+    assert registry.lookup("UBC") is None
+    assert ":2: re:(unclosed" in registry.error
+    assert "aliases.txt:2" in caplog.text
+
+    resp = llm.app.test_client().post("/aliases/reload")
+    assert resp.status_code == 422 and ":2:" in resp.get_json()["error"]
+
+    path.write_text("UBC\tUniversity of British Columbia\n")
+    assert llm.app.test_client().post("/aliases/reload").get_json() == {"aliases": 1}
+    assert registry.lookup("ubc") == "University of British Columbia" and registry.error is None
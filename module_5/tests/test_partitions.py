@@ -0,0 +1,143 @@
+"""
+tests/test_partitions.py – Term-partitioned applicants layout.
+
+Covers:
+- Loads creating year partitions on demand, with the same counts, metrics
+  and de-duplication (NULL terms included) as the wide table.
+- Partition pruning for ``term = …`` filters.
+- New partitions taking over rows that landed in the default partition.
+- Converting an existing wide table, keeping ``p_id`` values.
+- Retention: detaching old years into the archive schema or dropping them,
+  from Python and from the ``partitions.py`` CLI.
+
+Runs in its own scratch database so the shared test database keeps the wide
+``applicants`` table the other tests truncate.
+"""
+import os
+import sys
+
+import psycopg
+import pytest
+
+MODULE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(MODULE_DIR, "src"))
+sys.path.insert(0, os.path.join(MODULE_DIR, "benchmarks"))
+
+import app as app_module
+import changes
+import load_data
+import partitions
+import synth
+from conftest import layout_app as _app
+from conftest import same_metrics as _same_metrics
+
+
+def _partitions(url):
+    with psycopg.connect(url) as conn:
+        return [name for name, _ in partitions.partition_sizes(conn.cursor())]
+
+
+def _history(sample_rows):
+    """The sample rows plus copies filed under older terms and no term at all."""
+    rows = list(sample_rows)
+    for year, term in ((2024, "Fall 2024"), (2025, "Spring 2025"), (None, "")):
+        for r in sample_rows:
+            rows.append(dict(r, url=f"{r['url']}/{year}", comments=r["comments"].replace("Fall 2026", term),
+                             date_added=f"January 15, {year}" if year else None))
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Loading and pruning
+# ---------------------------------------------------------------------------
+
+@pytest.mark.db
+def test_partitioned_load_matches_wide(app, empty_db, sample_rows, layout_url):
+    rows = list(synth.Generator(synth.Templates.from_jsonl(), seed=3).llm_records(800)) + _history(sample_rows)
+    part = _app(layout_url, "partitioned")
+    load_data.ensure_index(part)
+    assert load_data.insert_records(part, rows) == load_data.insert_records(app, rows)
+    version = load_data.get_data_version(part)
+    assert load_data.insert_records(part, rows)[1] == 0  # NULL terms de-duplicate too
+    assert load_data.get_data_version(part) == version
+
+    _same_metrics(app_module.fetch_metrics(app), app_module.fetch_metrics(part))
+    assert {r["load_run_id"] for r in changes.iter_changes(part)} == {1}
+    names = _partitions(layout_url)
+    assert {"applicants_default", "applicants_y2024", "applicants_y2025", "applicants_y2026"} <= set(names)
+    with psycopg.connect(layout_url) as conn:
+        plan = "\n".join(r[0] for r in conn.execute(
+            "EXPLAIN SELECT COUNT(*) FROM applicants WHERE term = 'Fall 2026'").fetchall())
+        assert conn.execute("SELECT COUNT(*) FROM applicants_default WHERE term IS NOT NULL "
+                            "AND term ~ '20[0-9][0-9]$'").fetchone()[0] == 0
+    assert "applicants_y2026" in plan
+    assert "applicants_y2025" not in plan and "applicants_default" not in plan
+    query = "/api/aggregate?group_by=university,status&term=Fall 2026"
+    assert part.test_client().get(query).get_json() == app.test_client().get(query).get_json()
+
+
+@pytest.mark.db
+def test_new_partition_takes_rows_from_default(layout_url):
+    load_data.ensure_table(_app(layout_url, "partitioned"))
+    with psycopg.connect(layout_url) as conn:
+        conn.execute("INSERT INTO applicants (program, url, term) "
+                     "VALUES ('P', 'u1', 'Fall 2030'), ('P', 'u2', 'Winter 2030')")
+        cur = conn.cursor()
+        partitioner = partitions.Partitioner()
+        assert partitioner.ensure(cur, ["Fall 2030", None, "Fall 2030"]) == [2030]
+        assert partitioner.ensure(cur, ["Spring 2030"]) == []
+        assert partitions.create_partition(cur, 2030) is False  # made meanwhile by another load
+        assert conn.execute("SELECT COUNT(*) FROM applicants_y2030").fetchone()[0] == 2
+        assert conn.execute("SELECT COUNT(*) FROM applicants_default").fetchone()[0] == 0
+    assert partitions.term_year("Fall 2030") == 2030 and partitions.term_year(None) is None
+
+
+# ---------------------------------------------------------------------------
+# Migration and retention
+# ---------------------------------------------------------------------------
+
+@pytest.mark.db
+def test_wide_table_converts_to_partitions(layout_url, sample_rows):
+    wide = _app(layout_url, "wide")
+    load_data.ensure_table(wide)
+    load_data.insert_records(wide, _history(sample_rows))
+    with psycopg.connect(layout_url) as conn:
+        before = conn.execute("SELECT * FROM applicants ORDER BY p_id").fetchall()
+
+    part = _app(layout_url, "partitioned")
+    load_data.ensure_table(part)
+    load_data.ensure_table(part)  # idempotent
+    version = load_data.get_data_version(part)
+    with psycopg.connect(layout_url) as conn:
+        assert conn.execute("SELECT relkind FROM pg_class WHERE relname = 'applicants'").fetchone() == ("p",)
+        assert conn.execute("SELECT * FROM applicants ORDER BY p_id").fetchall() == before
+    assert load_data.insert_records(part, sample_rows) == (3, 0)
+    assert load_data.insert_records(part, [dict(sample_rows[0], url="https://example.com/new")]) == (1, 1)
+    with psycopg.connect(layout_url) as conn:
+        new_id = conn.execute("SELECT p_id FROM applicants WHERE url = 'https://example.com/new'").fetchone()[0]
+    assert new_id > before[-1][0]  # the wide table's sequence carries on
+    assert load_data.get_data_version(part) == version + 1
+
+
+@pytest.mark.db
+def test_retention_archives_or_drops_old_years(layout_url, sample_rows, capsys):
+    part = _app(layout_url, "partitioned")
+    load_data.ensure_index(part)
+    load_data.insert_records(part, _history(sample_rows))
+    version = load_data.get_data_version(part)
+
+    assert partitions.main(["retain", "--before", "2025"], app=part) == 0
+    assert "applicants_y2024" in capsys.readouterr().out
+    assert "applicants_y2024" not in _partitions(layout_url)
+    with psycopg.connect(layout_url) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM applicants_archive.applicants_y2024").fetchone()[0] == 3
+        assert conn.execute("SELECT COUNT(*) FROM applicants").fetchone()[0] == 9
+        assert partitions.detach_before(conn.cursor(), 2025) == []
+        assert partitions.detach_before(conn.cursor(), 2026, drop=True) == ["applicants_y2025"]
+        conn.commit()
+        assert conn.execute("SELECT to_regclass('applicants_y2025')").fetchone()[0] is None
+    assert load_data.get_data_version(part) == version + 2
+
+    partitions.main(["list"], app=part)
+    out = capsys.readouterr().out
+    assert "applicants_y2026" in out and "applicants_y2025" not in out
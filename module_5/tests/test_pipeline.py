@@ -0,0 +1,104 @@
+"""
+tests/test_pipeline.py – In-process Pull Data pipeline.
+
+Covers:
+- Pipeline stage counting and exclusive per-stage timings.
+- scrape → clean → llm → load chained in one process against a stand-in
+  Module 2 directory, with and without JSONL checkpoints.
+- The ``pull`` job runner using the pipeline when no SCRAPER_FN is set.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import jobs
+import load_data
+import pipeline
+from conftest import reset_jobs
+
+
+@pytest.mark.db
+def test_pipeline_counts_and_exclusive_timings():
+    pipe = pipeline.Pipeline()
+    seen = []
+    pipe.on_item = lambda stage, n: seen.append((stage, n))
+    doubled = pipe.stage("double", ({"v": r["v"] * 2} for r in pipe.stage("src", [{"v": 1}, {"v": 2}])))
+    total = pipe.sink("sum", lambda recs: sum(r["v"] for r in recs), doubled)
+
+    assert total == 6
+    assert pipe.counts == {"src": 2, "double": 2}
+    assert list(pipe.timings) == ["src", "double", "sum"]
+    assert all(t >= 0 for t in pipe.timings.values())
+    assert ("src", 2) in seen and ("double", 2) in seen
+
+
+@pytest.mark.db
+def test_run_pull_streams_into_postgres(app, empty_db, module2_dir, db_conn):
+    result = pipeline.run_pull(app, module2_dir, max_records=3)
+
+    assert result["counts"] == {"scrape": 3, "clean": 3, "llm": 3}
+    assert result["rows_read"] == 3
+    assert result["rows_inserted"] == 3
+    assert set(result["timings"]) == {"scrape", "clean", "llm", "load"}
+    with db_conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*), MIN(llm_generated_university), MIN(term) FROM applicants;")
+        assert cur.fetchone() == (3, "Test University", "Fall 2026")
+
+    again = pipeline.run_pull(app, module2_dir, max_records=3)
+    assert again["rows_inserted"] == 0
+
+
+@pytest.mark.db
+def test_run_pull_checkpoints_and_source(app, empty_db, module2_dir, tmp_path):
+    ckpt = tmp_path / "ckpt"
+    source = [{"program_university_raw": "Given U", "comments_raw": "", "source_url": "u"}]
+    result = pipeline.run_pull(app, module2_dir, use_llm=False,
+                               options=pipeline.PullOptions(checkpoint_dir=str(ckpt), source=source))
+
+    assert result["counts"] == {"scrape": 1, "clean": 1}
+    assert sorted(os.listdir(ckpt)) == ["clean.jsonl", "scrape.jsonl"]
+    rows = [json.loads(line) for line in (ckpt / "clean.jsonl").read_text().splitlines()]
+    assert rows == [{"program": "Given U", "comments": "", "url": "u", "degree": "Masters"}]
+
+
+@pytest.mark.db
+def test_insert_records_flushes_full_batches(app, empty_db):
+    records = [{"program": f"Batch {i}", "url": f"https://example.com/batch/{i}"}
+               for i in range(5)]
+    batches = []
+    result = load_data.insert_records(app, iter(records), load_data.LoadOptions(
+        batch_size=2, on_batch=lambda read, ins: batches.append((read, ins))))
+    assert result == (5, 5)
+    assert batches == [(2, 2), (4, 4), (5, 5)]
+
+
+@pytest.mark.db
+def test_import_path_failure_is_not_cached(tmp_path):
+    bad = tmp_path / "broken.py"
+    bad.write_text("raise RuntimeError('boom')\n")
+    with pytest.raises(RuntimeError):
+        pipeline._import_path("gradcafe_broken", str(bad))
+    assert "gradcafe_broken" not in sys.modules
+    assert str(bad) not in pipeline._LOADED
+
+
+@pytest.mark.buttons
+def test_pull_job_runs_pipeline(app, empty_db, module2_dir):
+    reset_jobs()
+    app.config.pop("SCRAPER_FN", None)
+    app.config["MODULE2_DIR"] = module2_dir
+    app.config["PULL_MAX_RECORDS"] = 2
+
+    job_id = jobs.enqueue(app, "pull")
+    jobs.run_next(app)
+
+    job = jobs.get_job(app, job_id)
+    assert job["status"] == "succeeded"
+    assert job["result"]["rows_inserted"] == 2
+    assert job["progress"]["rows_standardized"] == 2
+    assert {"pull", "scrape", "clean", "llm", "load"} <= set(job["timings"])
+    reset_jobs()
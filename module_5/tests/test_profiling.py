@@ -0,0 +1,136 @@
+"""
+tests/test_profiling.py – Opt-in request profiling.
+
+Covers:
+- SQL fingerprints ignore whitespace and literal values.
+- Server-Timing headers with connect/sql/render/total timers.
+- GET /debug/profile slow-query aggregates and armed cProfile captures.
+- No hooks, routes or timed cursors when PROFILING is off.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import app as app_module
+import load_data
+import profiling
+from conftest import TEST_DATABASE_URL
+
+
+@pytest.fixture()
+def prof_client(empty_db):
+    flask_app = app_module.create_app({"TESTING": True, "DATABASE_URL": TEST_DATABASE_URL,
+                                       "PROFILING": True, "JOBS_INLINE": False})
+    return flask_app.test_client()
+
+
+def _timings(resp):
+    out = {}
+    for part in resp.headers["Server-Timing"].split(", "):
+        name, dur, *_ = part.split(";")
+        out[name] = float(dur.split("=")[1])
+    return out
+
+
+@pytest.mark.web
+def test_fingerprint_normalizes_literals():
+    a = profiling.fingerprint("SELECT  *\n FROM t WHERE term = 'Fall 2026' AND gpa > 3.5")
+    b = profiling.fingerprint("SELECT * FROM t WHERE term = 'Spring 2025' AND gpa > 2")
+    assert a == b
+    assert a["sql"] == "SELECT * FROM t WHERE term = ? AND gpa > ?"
+
+
+@pytest.mark.web
+def test_index_server_timing_header(prof_client):
+    resp = prof_client.get("/")
+    assert resp.status_code == 200
+    timings = _timings(resp)
+    assert {"connect", "sql", "render", "total"} <= set(timings)
+    assert timings["total"] >= timings["sql"]
+    queries = int(resp.headers["Server-Timing"].rsplit('desc="', 1)[1].split()[0])
+    assert queries >= len(app_module.METRIC_QUERIES)
+
+
+@pytest.mark.web
+def test_debug_profile_reports_slow_queries(prof_client):
+    prof_client.get("/")
+    prof_client.get("/api/applicants?limit=5")
+    body = prof_client.get("/debug/profile?limit=3").get_json()
+
+    assert body["requests"] == 2
+    assert [r["path"] for r in body["recent"]] == ["/", "/api/applicants"]
+    assert len(body["slow_queries"]) == 3
+    totals = [q["total_ms"] for q in body["slow_queries"]]
+    assert totals == sorted(totals, reverse=True)
+    assert {"fingerprint", "sql", "calls", "rows", "mean_ms", "max_ms"} <= set(body["slow_queries"][0])
+    assert body["capture"] is None
+
+
+@pytest.mark.web
+def test_debug_profile_capture_next_matching_request(prof_client):
+    resp = prof_client.post("/debug/profile/capture?path=/api/metrics")
+    assert resp.status_code == 202
+    prof_client.get("/")  # different path → not captured
+    assert prof_client.get("/debug/profile").get_json()["capture_armed"] is True
+
+    prof_client.get("/api/metrics")
+    body = prof_client.get("/debug/profile").get_json()
+    assert body["capture_armed"] is False
+    assert body["capture"]["path"] == "/api/metrics"
+    assert "cumulative" in body["capture"]["stats"]
+
+
+@pytest.mark.web
+def test_load_queries_are_timed(app, prof_client):
+    records = [{"program": "Prof", "url": "https://example.com/prof/1"}]
+    flask_app = prof_client.application
+
+    @flask_app.get("/_insert")
+    def _insert():
+        return {"inserted": load_data.insert_records(flask_app, records)[1]}
+
+    resp = prof_client.get("/_insert")
+    assert resp.get_json() == {"inserted": 1}
+    # start_run, the load_run_id stamp, one INSERT for the batch, finish_run
+    assert 'desc="4 queries"' in resp.headers["Server-Timing"]
+
+
+@pytest.mark.db
+def test_timed_cursor_outside_and_inside_a_profile(prof_client):
+    flask_app = prof_client.application
+    with profiling.connect(TEST_DATABASE_URL, flask_app) as conn:
+        assert conn.cursor_factory is profiling.TimedCursor
+        conn.execute(b"SELECT 1")  # no request → not recorded
+        prof = profiling.RequestProfile("/manual")
+        token = profiling._current.set(prof)
+        try:
+            conn.execute(b"SELECT 2")
+        finally:
+            profiling._current.reset(token)
+    assert [(q["sql"], q["rows"]) for q in prof.queries] == [("SELECT ?", 1)]
+
+
+@pytest.mark.db
+def test_executemany_is_timed(prof_client):
+    with profiling.connect(TEST_DATABASE_URL, prof_client.application) as conn:
+        prof = profiling.RequestProfile("/manual")
+        token = profiling._current.set(prof)
+        try:
+            conn.cursor().executemany("SELECT %s", [(1,), (2,)])
+        finally:
+            profiling._current.reset(token)
+    assert [q["sql"] for q in prof.queries] == ["SELECT %s"]
+
+
+@pytest.mark.web
+def test_profiling_off_by_default(client, app):
+    resp = client.get("/")
+    assert "Server-Timing" not in resp.headers
+    assert client.get("/debug/profile").status_code == 404
+    with app_module.get_conn(app) as conn:
+        assert conn.cursor_factory is not profiling.TimedCursor
+    with profiling.timer("noop"):
+        pass
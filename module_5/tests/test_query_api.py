@@ -0,0 +1,201 @@
+"""
+tests/test_query_api.py – Ad-hoc query API.
+
+Covers:
+- GET /api/applicants: whitelisted filters, keyset pagination, clamped limits.
+- GET /api/aggregate: group-by/metric whitelists and acceptance rates.
+- NDJSON/CSV exports streamed from named server-side cursors.
+- 400s for arguments outside the whitelist, control arguments the endpoint
+  does not take (``after`` on ``/api/aggregate``) and range values that do
+  not parse, before any export starts streaming.
+- db_utils connection-string fallbacks and clamp_limit.
+"""
+import csv
+import io
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import db_utils
+import query_api
+
+
+ROWS = [
+    # (url, status, term, degree, university, gpa)
+    ("q/1", "Accepted", "Fall 2026", "PhD", "MIT", 3.9),
+    ("q/2", "Rejected", "Fall 2026", "PhD", "MIT", 3.5),
+    ("q/3", "Accepted", "Fall 2026", "Masters", "MIT", 3.7),
+    ("q/4", "Accepted", "Fall 2026", "PhD", "Stanford", 3.8),
+    ("q/5", "Waitlisted", "Spring 2026", "PhD", "Stanford", None),
+]
+
+
+@pytest.fixture()
+def seeded(client, empty_db, db_conn):
+    with db_conn.cursor() as cur:
+        cur.executemany("""
+            INSERT INTO applicants (url, status, term, degree, llm_generated_university, gpa)
+            VALUES (%s, %s, %s, %s, %s, %s);
+        """, [(f"https://example.com/{u}", s, t, d, uni, g) for u, s, t, d, uni, g in ROWS])
+    db_conn.commit()
+    return client
+
+
+# ---------------------------------------------------------------------------
+# /api/applicants
+# ---------------------------------------------------------------------------
+
+@pytest.mark.web
+def test_applicants_filters_and_keyset_pages(seeded):
+    resp = seeded.get("/api/applicants?university=MIT&status=Accepted,Rejected&limit=2")
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert [r["url"] for r in body["rows"]] == ["https://example.com/q/1", "https://example.com/q/2"]
+    assert body["rows"][0]["gpa"] == 3.9
+    assert body["next_after"] == body["rows"][-1]["p_id"]
+
+    nxt = seeded.get(f"/api/applicants?university=MIT&status=Accepted,Rejected"
+                     f"&limit=2&after={body['next_after']}").get_json()
+    assert [r["url"] for r in nxt["rows"]] == ["https://example.com/q/3"]
+    assert nxt["next_after"] is None
+
+
+@pytest.mark.web
+def test_applicants_range_filters_and_limit_clamp(seeded, monkeypatch):
+    body = seeded.get("/api/applicants?gpa_min=3.75&term=Fall 2026").get_json()
+    assert sorted(r["url"][-3:] for r in body["rows"]) == ["q/1", "q/4"]
+
+    monkeypatch.setattr(query_api, "MAX_PAGE_SIZE", 3)
+    body = seeded.get("/api/applicants?limit=50").get_json()
+    assert len(body["rows"]) == 3
+    assert body["next_after"] is not None
+    assert len(seeded.get("/api/applicants?limit=0").get_json()["rows"]) == 1
+
+
+@pytest.mark.web
+def test_applicants_date_range(seeded, db_conn):
+    db_conn.execute("UPDATE applicants SET date_added = DATE '2026-01-15' WHERE url LIKE '%%/q/1';")
+    db_conn.commit()
+    body = seeded.get("/api/applicants?date_from=2026-01-01&date_to=2026-01-31").get_json()
+    assert [r["url"][-3:] for r in body["rows"]] == ["q/1"]
+
+
+@pytest.mark.web
+@pytest.mark.parametrize("query, name", [
+    ("/api/applicants?gpa_min=abc", "gpa_min"),
+    ("/api/applicants?gre_max=nan", "gre_max"),
+    ("/api/applicants?date_from=xx&format=csv", "date_from"),
+    ("/api/applicants?date_to=2026-13-01&format=ndjson", "date_to"),
+    ("/api/aggregate?group_by=term&gpa_max=3,5", "gpa_max"),
+    ("/api/aggregate?group_by=term&date_from=yesterday&format=csv", "date_from"),
+])
+def test_rejects_range_values_that_do_not_parse(client, query, name):
+    resp = client.get(query)
+    assert resp.status_code == 400
+    assert resp.get_json()["error"].startswith(f"{name} must be")
+
+
+@pytest.mark.web
+@pytest.mark.parametrize("query", [
+    "/api/applicants?password=x",
+    "/api/applicants?after=abc",
+    "/api/applicants?format=xml",
+    "/api/aggregate",
+    "/api/aggregate?group_by=comments",
+    "/api/aggregate?group_by=term&metrics=sum_gpa",
+])
+def test_rejects_arguments_outside_whitelist(client, query):
+    resp = client.get(query)
+    assert resp.status_code == 400
+    assert "error" in resp.get_json()
+
+
+@pytest.mark.web
+@pytest.mark.parametrize("query, name", [
+    ("/api/aggregate?group_by=term&after=10", "after"),
+    ("/api/aggregate?group_by=term&since=1&format=csv", "since"),
+    ("/api/applicants?until=3", "until"),
+    ("/api/applicants?group_by=term&format=ndjson", "group_by"),
+    ("/api/changes?metrics=count", "metrics"),
+])
+def test_rejects_control_arguments_the_endpoint_does_not_take(client, query, name):
+    resp = client.get(query)
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == f"{name} is not supported by this endpoint"
+
+
+# ---------------------------------------------------------------------------
+# /api/aggregate
+# ---------------------------------------------------------------------------
+
+@pytest.mark.web
+def test_aggregate_acceptance_rate_by_university_and_degree(seeded):
+    resp = seeded.get("/api/aggregate?group_by=university,degree&term=Fall 2026"
+                      "&metrics=count,accepted,acceptance_rate,avg_gpa")
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["columns"] == ["university", "degree", "count", "accepted",
+                               "acceptance_rate", "avg_gpa"]
+    assert body["rows"][0] == {"university": "MIT", "degree": "PhD", "count": 2,
+                               "accepted": 1, "acceptance_rate": 50.0, "avg_gpa": 3.7}
+    assert {(r["university"], r["degree"]) for r in body["rows"][1:]} == {
+        ("MIT", "Masters"), ("Stanford", "PhD")}
+
+
+# ---------------------------------------------------------------------------
+# Streaming exports
+# ---------------------------------------------------------------------------
+
+@pytest.mark.web
+def test_applicants_ndjson_export_streams_in_batches(seeded, monkeypatch):
+    monkeypatch.setattr(query_api, "EXPORT_BATCH_SIZE", 2)
+    resp = seeded.get("/api/applicants?format=ndjson&degree=PhD", buffered=False)
+    assert resp.mimetype == "application/x-ndjson"
+    chunks = [c.decode() if isinstance(c, bytes) else c for c in resp.response]
+    assert len(chunks) == 2
+    records = [json.loads(line) for line in "".join(chunks).splitlines()]
+    assert [r["url"][-3:] for r in records] == ["q/1", "q/2", "q/4", "q/5"]
+
+
+@pytest.mark.web
+def test_aggregate_csv_export(seeded):
+    resp = seeded.get("/api/aggregate?group_by=term&metrics=count&format=csv")
+    assert resp.mimetype == "text/csv"
+    assert list(csv.reader(io.StringIO(resp.get_data(as_text=True)))) == [
+        ["term", "count"], ["Fall 2026", "4"], ["Spring 2026", "1"]]
+
+
+@pytest.mark.db
+def test_stream_rows_empty_result(app, empty_db):
+    query, params, _ = query_api.applicants_query({}, paged=False)
+    batches = query_api.stream_rows(app, query, params, name="probe")
+    assert list(batches) == []
+
+
+# ---------------------------------------------------------------------------
+# db_utils
+# ---------------------------------------------------------------------------
+
+@pytest.mark.db
+def test_build_conninfo_env_fallback(monkeypatch):
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    for name, value in {"DB_NAME": "gc", "DB_USER": "u", "DB_HOST": "h", "DB_PORT": "6543"}.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.delenv("DB_PASSWORD", raising=False)
+    monkeypatch.delenv("PGPASSWORD", raising=False)
+    assert db_utils.build_conninfo() == "dbname=gc user=u host=h port=6543"
+
+    monkeypatch.setenv("DB_PASSWORD", "pw")
+    assert db_utils.build_conninfo().endswith(" password=pw")
+
+
+@pytest.mark.db
+@pytest.mark.parametrize("limit,expected", [
+    (None, 100), ("25", 25), (0, 1), (10_000, 100), ("many", 100),
+])
+def test_clamp_limit(limit, expected):
+    assert db_utils.clamp_limit(limit) == expected
@@ -0,0 +1,90 @@
+"""
+tests/test_records.py – Compact applicant record representations.
+
+Covers:
+- ``normalize_record`` returning ``Applicant`` tuples with interned categories;
+  ``intern`` also taking str subclasses.
+- ``ApplicantBatch`` round-tripping rows (NULLs, dates, shared labels) and
+  feeding the Arrow/Parquet writer.
+- ``RecordColumns`` buffering records with differing keys.
+- The memory benchmark ranking the compact forms below plain dicts.
+"""
+import os
+import sys
+from datetime import date
+
+import pytest
+
+MODULE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(MODULE_DIR, "src"))
+sys.path.insert(0, os.path.join(MODULE_DIR, "benchmarks"))
+
+import arrow_schema
+import load_data
+import record_memory
+from records import Applicant, ApplicantBatch, RecordColumns, intern
+
+
+# ---------------------------------------------------------------------------
+# Applicant / ApplicantBatch
+# ---------------------------------------------------------------------------
+
+@pytest.mark.analysis
+def test_normalize_record_returns_interned_applicant(sample_rows):
+    a, b, c = (load_data.normalize_record(r) for r in sample_rows)
+    assert isinstance(a, Applicant) and not hasattr(a, "__dict__")
+    assert a.status == "Accepted" and a.gpa == 3.8 and a.degree == "Masters"
+    assert b.term is c.term and b.degree is c.degree
+
+    class Label(str):
+        pass
+
+    assert intern(Label("Fall 2026")) is b.term and intern(3.5) == 3.5
+
+
+@pytest.mark.analysis
+def test_applicant_batch_round_trip(sample_rows):
+    rows = [load_data.normalize_record(r) for r in sample_rows]
+    rows.append(Applicant(*[None] * len(Applicant._fields)))
+    batch = ApplicantBatch(rows)
+    assert len(batch) == 4
+    assert list(batch) == rows
+    assert batch.labels["term"] == ["Fall 2026"]
+    assert list(batch.codes["status"]) == [0, 0, 1, -1]
+
+    arrow = arrow_schema.applicant_batch(batch)
+    assert arrow.column(arrow.schema.get_field_index("date_added")).to_pylist()[-1] is None
+    assert [tuple(r.values()) for r in arrow.to_pylist()] == [tuple(r) for r in rows]
+
+    batch.clear()
+    assert len(batch) == 0 and list(batch) == []
+    batch.append(rows[1]._replace(date_added=date(2026, 3, 1)))
+    assert batch.labels["term"] == ["Fall 2026"] and list(batch.codes["term"]) == [0]
+    assert next(iter(batch)).date_added == date(2026, 3, 1)
+
+
+# ---------------------------------------------------------------------------
+# RecordColumns
+# ---------------------------------------------------------------------------
+
+@pytest.mark.analysis
+def test_record_columns_fill_missing_keys():
+    cols = RecordColumns([{"a": 1, "status": "Accepted"}, {"b": 2}, {"a": 3, "b": 4, "status": "Accepted"}])
+    assert len(cols) == 3
+    assert cols.columns == {"a": [1, None, 3], "status": ["Accepted", None, "Accepted"], "b": [None, 2, 4]}
+    assert cols.columns["status"][0] is cols.columns["status"][2]
+
+
+# ---------------------------------------------------------------------------
+# Memory benchmark
+# ---------------------------------------------------------------------------
+
+@pytest.mark.integration
+def test_record_memory_benchmark(capsys):
+    result = record_memory.main(["--scale", "300", "--json"])
+    assert set(result) == set(record_memory.FORMS)
+    assert result["clean_columns"]["bytes"] < result["clean_dicts"]["bytes"]
+    assert result["applicant_batch"]["bytes"] < result["applicant_tuples"]["bytes"] < result["llm_dicts"]["bytes"]
+    assert '"applicant_batch"' in capsys.readouterr().out
+    record_memory.main(["--scale", "50"])
+    assert capsys.readouterr().out.startswith("form")
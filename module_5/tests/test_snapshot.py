@@ -0,0 +1,165 @@
+"""
+tests/test_snapshot.py – Pre-rendered dashboard snapshots.
+
+Covers:
+- Atomic snapshot writes and stat-based read caching.
+- The analysis job writing a versioned snapshot (metrics JSON + HTML).
+- GET / serving the snapshot, and refreshing it in the background once the
+  data version moves on.
+- Snapshot hits inside ``SNAPSHOT_CHECK_SECONDS`` doing no database work,
+  and a new pull showing on the next view.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import app as app_module
+import jobs
+import load_data
+import profiling
+import snapshot
+from conftest import reset_jobs
+
+
+@pytest.fixture()
+def snap_app(app, tmp_path):
+    """App serving / from a snapshot in ``tmp_path`` with inline jobs disabled.
+
+    ``SNAPSHOT_CHECK_SECONDS`` is 0, so every view re-reads the job state and
+    the data version.
+    """
+    app.config["SNAPSHOT_DIR"] = str(tmp_path)
+    app.config["SNAPSHOT_CHECK_SECONDS"] = 0
+    app.config["JOBS_INLINE"] = False
+    reset_jobs()
+    yield app
+    reset_jobs()
+
+
+def _insert(db_conn, url):
+    with db_conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO applicants (program, url, status, term)
+            VALUES ('Snapshot Test', %s, 'Accepted', 'Fall 2026');
+        """, (url,))
+    db_conn.commit()
+
+
+# ---------------------------------------------------------------------------
+# snapshot.py
+# ---------------------------------------------------------------------------
+
+@pytest.mark.analysis
+def test_write_and_read_snapshot(tmp_path):
+    directory = str(tmp_path / "snaps")
+    assert snapshot.read_snapshot(directory) is None
+
+    written = snapshot.write_snapshot(directory, 7, {"q7": 1}, "<div>1</div>")
+    first = snapshot.read_snapshot(directory)
+    assert first == written
+    assert snapshot.read_snapshot(directory) is first  # served from the cache
+
+    snapshot.write_snapshot(directory, 8, {"q7": 22}, "<div>22</div>")
+    assert snapshot.read_snapshot(directory)["version"] == 8
+    assert os.listdir(directory) == [snapshot.SNAPSHOT_FILE]
+
+
+@pytest.mark.analysis
+def test_failed_write_keeps_previous_snapshot(tmp_path, monkeypatch):
+    snapshot.write_snapshot(str(tmp_path), 1, {}, "old")
+
+    def boom(*_args, **_kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(snapshot.json, "dump", boom)
+    with pytest.raises(OSError):
+        snapshot.write_snapshot(str(tmp_path), 2, {}, "new")
+    assert os.listdir(tmp_path) == [snapshot.SNAPSHOT_FILE]
+    assert json.loads((tmp_path / snapshot.SNAPSHOT_FILE).read_text())["html"] == "old"
+
+
+# ---------------------------------------------------------------------------
+# Analysis job and GET /
+# ---------------------------------------------------------------------------
+
+@pytest.mark.analysis
+def test_analysis_job_writes_versioned_snapshot(snap_app, empty_db, db_conn):
+    _insert(db_conn, "https://example.com/snap/1")
+    job_id = jobs.enqueue(snap_app, "analysis")
+    jobs.run_next(snap_app)
+
+    result = jobs.get_job(snap_app, job_id)["result"]
+    snap = snapshot.read_snapshot(snap_app.config["SNAPSHOT_DIR"])
+    assert snap["version"] == load_data.get_data_version(snap_app) == result["data_version"]
+    assert snap["metrics"]["fall_2026"] == result["fall_2026"] == 1
+    assert "Answer:</span> 1" in snap["html"]
+
+
+@pytest.mark.analysis
+def test_analysis_worker_without_snapshot_dir(app, empty_db):
+    result = app_module._analysis_worker(app)
+    assert result["message"] == "Analysis updated."
+    assert result["fall_2026"] == 0
+
+
+@pytest.mark.web
+def test_index_serves_snapshot_and_refreshes_when_stale(snap_app, empty_db, db_conn, monkeypatch):
+    calls = []
+    real = app_module.fetch_metrics
+
+    def counting(app):
+        calls.append(1)
+        return real(app)
+
+    monkeypatch.setattr(app_module, "fetch_metrics", counting)
+    client = snap_app.test_client()
+    first = client.get("/")
+    assert first.status_code == 200
+    assert b"Answer:" in first.data
+    client.get("/")
+    assert len(calls) == 1  # built once, then served from disk
+    assert jobs.dashboard_state(snap_app)["last_analysis"] is None
+
+    _insert(db_conn, "https://example.com/snap/2")
+    stale = client.get("/")
+    assert stale.data == first.data  # stale page while the refresh is queued
+    assert jobs.run_next(snap_app) is True
+
+    fresh = client.get("/")
+    assert len(calls) == 2
+    assert fresh.data != first.data
+    assert jobs.run_next(snap_app) is False  # up to date → nothing queued
+
+
+@pytest.mark.web
+def test_index_skips_refresh_during_pull(snap_app, empty_db, db_conn):
+    client = snap_app.test_client()
+    client.get("/")
+    jobs.enqueue(snap_app, "pull")
+    _insert(db_conn, "https://example.com/snap/3")
+    client.get("/")
+    assert jobs.claim_next(snap_app)["kind"] == "pull"
+    assert jobs.claim_next(snap_app) is None
+
+
+@pytest.mark.web
+def test_snapshot_hits_do_no_db_work(snap_app, empty_db, db_conn, monkeypatch):
+    snap_app.config["SNAPSHOT_CHECK_SECONDS"] = 60
+    client = snap_app.test_client()
+    first = client.get("/")
+
+    def no_db(*_args, **_kwargs):
+        raise AssertionError("snapshot hit opened a connection")
+
+    monkeypatch.setattr(profiling, "connect", no_db)
+    _insert(db_conn, "https://example.com/snap/4")
+    assert client.get("/").data == first.data
+    monkeypatch.undo()
+
+    # Starting a pull drops the cached job state, so the next view shows it.
+    assert client.post("/pull-data").status_code == 200
+    assert b"Pull Data is currently running" in client.get("/").data
@@ -0,0 +1,140 @@
+"""
+tests/test_stats.py – NumPy score distributions.
+
+Covers:
+- Binary COPY parsing and the same columns from PostgreSQL, DuckDB and Parquet.
+- Percentiles, group means and acceptance-by-GPA on known rows.
+- ``/api/stats`` (ETag, per-version cache) and the dashboard card.
+"""
+import os
+import sys
+
+import numpy as np
+import pyarrow as pa
+import psycopg
+import pytest
+
+MODULE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(MODULE_DIR, "src"))
+sys.path.insert(0, os.path.join(MODULE_DIR, "benchmarks"))
+
+import app as app_module
+import arrow_schema
+import columnar
+import load_data
+import stats
+import synth
+
+
+def _sample_table(rows):
+    return pa.Table.from_batches([arrow_schema.applicant_batch([load_data.normalize_record(r) for r in rows])])
+
+
+# ---------------------------------------------------------------------------
+# Columns
+# ---------------------------------------------------------------------------
+
+@pytest.mark.analysis
+def test_parse_copy_rejects_other_streams():
+    with pytest.raises(ValueError):
+        stats.parse_copy(b"gpa,gre\n3.5,160\n")
+
+
+@pytest.mark.db
+def test_columns_identical_across_backends(app, empty_db, sample_rows, tmp_path):
+    rows = list(synth.Generator(synth.Templates.from_jsonl(), seed=7).llm_records(1000)) + sample_rows
+    duck_app = app_module.create_app({"TESTING": True,
+                                      "DATABASE_URL": f"duckdb://{tmp_path / 'stats.duckdb'}"})
+    load_data.insert_records(app, rows)
+    load_data.insert_records(duck_app, rows)
+    path = str(tmp_path / "applicants.parquet")
+    columnar.write_applicants(rows, path)
+
+    pg = stats.load_columns(app)
+    assert pg["gpa"].size == len(rows) and pg["gpa"].dtype == np.float64
+    assert pg["outcome"].dtype == np.int16
+    for other in (stats.load_columns(duck_app), stats.columns_from_parquet(path)):
+        for name in stats.NUMERIC + stats.CODES:
+            assert np.array_equal(np.sort(pg[name]), np.sort(other[name]), equal_nan=True), name
+        assert stats.compute(other) == stats.compute(pg)
+
+
+# ---------------------------------------------------------------------------
+# Statistics
+# ---------------------------------------------------------------------------
+
+@pytest.mark.analysis
+def test_compute_on_sample_rows(sample_rows):
+    result = stats.compute(stats.columns_from_parquet(_sample_table(sample_rows)))
+    assert result["rows"] == 3
+    assert result["percentiles"]["gpa"] == {"n": 3, "mean": 3.877, "p10": 3.816, "p25": 3.84,
+                                            "p50": 3.88, "p75": 3.915, "p90": 3.936}
+    assert result["percentiles"]["gre"]["n"] == 2
+    assert sum(result["histograms"]["gpa"]["counts"]) == 3
+
+    buckets = {b["bucket"]: b for b in result["acceptance_by_gpa"]}
+    assert buckets["≥ 3.75"] == {"bucket": "≥ 3.75", "decided": 3, "accepted": 2, "rate": 66.67}
+    assert buckets["< 3.00"]["rate"] is None
+
+    nat = {g["group"]: g for g in result["group_means"]["nationality"]}
+    assert nat["International"] == {"group": "International", "n": 2, "avg_gpa": 3.915, "avg_gre": 170.0}
+    assert nat["Unknown"]["avg_gpa"] is None
+    assert [g["n"] for g in result["group_means"]["degree"]] == [0, 2, 1, 0]
+
+
+@pytest.mark.analysis
+def test_empty_and_unreachable_database():
+    empty = stats.compute(stats.empty_columns())
+    assert empty["rows"] == 0
+    assert empty["percentiles"]["gpa"]["p50"] is None
+    broken = app_module.create_app({"TESTING": True, "DATABASE_URL": "dbname=x host=/nonexistent"})
+    assert stats.fetch_stats(broken) == empty
+
+
+# ---------------------------------------------------------------------------
+# Web
+# ---------------------------------------------------------------------------
+
+@pytest.mark.web
+def test_api_stats_cached_per_data_version(client, app, empty_db, sample_rows, monkeypatch):
+    calls = []
+    real = stats.fetch_stats
+
+    def counting(app):
+        calls.append(1)
+        return real(app)
+
+    monkeypatch.setattr(stats, "fetch_stats", counting)
+    load_data.insert_records(app, sample_rows[:2])
+    resp = client.get("/api/stats")
+    version = resp.get_json()["data_version"]
+    assert resp.get_json()["rows"] == 2
+    assert resp.get_etag() == (f"stats-{version}", False)
+    assert client.get("/api/stats", headers={"If-None-Match": f'"stats-{version}"'}).status_code == 304
+    client.get("/")
+    assert len(calls) == 1
+
+    load_data.insert_records(app, sample_rows[2:])
+    assert client.get("/api/stats").get_json()["rows"] == 3
+    assert len(calls) == 2
+
+
+@pytest.mark.web
+def test_api_stats_without_data_version(client, monkeypatch):
+    def boom(_app):
+        raise psycopg.OperationalError("down")
+
+    monkeypatch.setattr(load_data, "get_data_version", boom)
+    resp = client.get("/api/stats")
+    assert resp.status_code == 200
+    assert resp.get_etag() == (None, None)
+    assert "stats_cache" not in client.application.extensions
+
+
+@pytest.mark.web
+def test_dashboard_shows_distributions(client, app, empty_db, sample_rows):
+    load_data.insert_records(app, sample_rows)
+    text = client.get("/").get_data(as_text=True)
+    assert "Score Distributions (3 rows)" in text
+    assert 'data-testid="stats-acceptance"' in text
+    assert "66.67%" in text
@@ -0,0 +1,127 @@
+"""
+tests/test_upsert.py – Refresh mode (``load_data.upsert_records``).
+
+Covers:
+- Existing rows getting the re-standardized columns while unchanged rows keep
+  their ``load_run_id``; new rows inserted; the last copy of a duplicate in
+  one batch winning; a no-op refresh leaving the ``data_version`` alone.
+- Counts: read / inserted / updated / unchanged and changed rows per column,
+  also recorded on the load run; only changed rows entering the change feed.
+- The partitioned and normalized layouts giving the same results.
+- A refresh that raises changing nothing and failing its run.
+- Columns that cannot be refreshed, DuckDB, and ``main(refresh=…)``.
+"""
+import json
+import os
+import sys
+
+import psycopg
+import pytest
+
+MODULE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(MODULE_DIR, "src"))
+
+import changes
+import load_data
+from conftest import layout_app as _app
+
+UNI = "llm_generated_university"
+
+
+def _restandardized(sample_rows):
+    """A second standardizer pass: one university renamed, one row repeated, one new row."""
+    renamed = dict(sample_rows[0], llm_generated_university="The Johns Hopkins University")
+    new = dict(sample_rows[2], url="https://example.com/applicant/4",
+               comments=sample_rows[2]["comments"].replace("Fall 2026", "Fall 2031"))
+    return [renamed, dict(sample_rows[1], llm_generated_university="MIT"), sample_rows[1],
+            sample_rows[2], new]
+
+
+def _stored(url):
+    with psycopg.connect(url) as conn:
+        return conn.execute(f"SELECT url, p_id, term, {UNI}, load_run_id FROM applicants ORDER BY url").fetchall()
+
+
+def _check_refresh(app, url, sample_rows):
+    assert load_data.insert_records(app, sample_rows, load_data.LoadOptions(source="initial")) == (3, 3)
+    first = changes.watermark(app)
+    before = _stored(url)
+    version = load_data.get_data_version(app)
+
+    result = load_data.upsert_records(app, _restandardized(sample_rows), source="restandardize")
+    assert result == {"read": 5, "inserted": 1, "updated": 1, "unchanged": 2,
+                      "changed": {"llm_generated_program": 0, UNI: 1}}
+    after = _stored(url)
+    assert after[0][:4] == (before[0][0], before[0][1], "Fall 2026", "The Johns Hopkins University")
+    assert after[1:3] == before[1:3]  # untouched, still stamped with the first run
+    assert after[3][2] == "Fall 2031"
+    version, old = load_data.get_data_version(app), version
+    assert version > old
+
+    run = changes.list_runs(app, limit=1)[0]
+    assert (run["source"], run["rows_read"], run["rows_inserted"], run["rows_updated"]) == \
+        ("restandardize", 5, 1, 1)
+    assert [r["url"] for r in changes.iter_changes(app, since=first)] == [after[0][0], after[3][0]]
+
+    again = load_data.upsert_records(app, _restandardized(sample_rows))
+    assert (again["inserted"], again["updated"], again["unchanged"]) == (0, 0, 4)
+    assert load_data.get_data_version(app) == version
+
+
+# ---------------------------------------------------------------------------
+# Refreshing
+# ---------------------------------------------------------------------------
+
+@pytest.mark.db
+def test_refresh_updates_only_changed_rows(app, empty_db, db_conn, sample_rows):
+    db_conn.execute("TRUNCATE TABLE load_runs RESTART IDENTITY;")
+    db_conn.commit()
+    _check_refresh(app, app.config["DATABASE_URL"], sample_rows)
+
+
+@pytest.mark.db
+@pytest.mark.parametrize("layout", ["partitioned", "normalized"])
+def test_refresh_on_other_layouts(layout_url, sample_rows, layout):
+    app = _app(layout_url, layout)
+    load_data.ensure_index(app)
+    _check_refresh(app, layout_url, sample_rows)
+    result = load_data.upsert_records(app, sample_rows[:1], columns=["status"])
+    assert (result["updated"], result["changed"]) == (0, {"status": 0})
+
+
+@pytest.mark.db
+def test_failed_refresh_changes_nothing(app, empty_db, sample_rows):
+    load_data.insert_records(app, sample_rows)
+    before = _stored(app.config["DATABASE_URL"])
+
+    def records():
+        yield from _restandardized(sample_rows)
+        raise ValueError("standardizer crashed")
+
+    with pytest.raises(ValueError):
+        load_data.upsert_records(app, records())
+    assert _stored(app.config["DATABASE_URL"]) == before
+    run = changes.list_runs(app, limit=1)[0]
+    assert (run["status"], run["error"]) == ("failed", "standardizer crashed")
+
+
+@pytest.mark.db
+def test_refresh_rejects_columns_it_cannot_update(app, layout_url, sample_rows):
+    for columns in (["url"], ["comments", UNI], ["p_id"], []):
+        with pytest.raises(ValueError):
+            load_data.upsert_records(app, sample_rows, columns=columns)
+    with pytest.raises(ValueError, match="term"):
+        load_data.upsert_records(_app(layout_url, "partitioned"), sample_rows, columns=["term"])
+    with pytest.raises(ValueError, match="PostgreSQL"):
+        load_data.upsert_records(_app("duckdb:" + layout_url, "wide"), sample_rows)
+
+
+@pytest.mark.db
+def test_main_refresh_prints_counts(app, empty_db, sample_rows, tmp_path, capsys):
+    load_data.insert_records(app, sample_rows)
+    path = tmp_path / "restandardized.jsonl"
+    path.write_text("\n".join(json.dumps(r) for r in _restandardized(sample_rows)))
+    load_data.main(app=app, jsonl_path=str(path), refresh=[UNI])
+    out = capsys.readouterr().out
+    assert "Inserted   : 1" in out and "Updated    : 1" in out and "Unchanged  : 2" in out
+    assert f"{UNI:<26} 1" in out